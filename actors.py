@@ -0,0 +1,113 @@
+"""
+Sérialisation des commandes par salon.
+
+Une commande de jeu lit et modifie la partie en traversant plusieurs await
+(chargement, rendu, envoi, sauvegarde) : deux commandes tapées coup sur coup
+dans un salon pourraient s'entrelacer. Chaque salon a donc sa file de
+commandes, exécutées une à une par un travailleur, comme les files d'envoi
+(dispatcher.py) ; les salons différents avancent en parallèle, sans verrou
+global.
+
+La file est bornée : au-delà de max_pending commandes en attente, les
+suivantes sont refusées. Une commande identique (même auteur, même commande,
+mêmes arguments) à une autre déjà en attente ou en cours est ignorée, et une
+commande qui a attendu plus de max_age secondes n'est pas exécutée.
+"""
+import asyncio
+import time
+from collections import deque
+from functools import wraps
+from dispatcher import outbound
+from metrics import metrics
+
+class PendingCommand:
+    __slots__ = ("key", "run", "future", "enqueued_at")
+
+    def __init__(self, key, run):
+        self.key = key
+        self.run = run
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+class ChannelActors:
+    def __init__(self, max_pending: int = 8, max_age: float = 30.0):
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.queues: dict[int, deque[PendingCommand]] = {}
+        self.running: dict[int, tuple] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+        self.waits: deque[float] = deque(maxlen=1000)
+        self.counters = {"run": 0, "rejected": 0, "duplicates": 0, "expired": 0}
+
+    def is_duplicate(self, channel_id: int, key: tuple) -> bool:
+        return self.running.get(channel_id) == key or any(pending.key == key for pending in self.queues.get(channel_id, ()))
+
+    def is_full(self, channel_id: int) -> bool:
+        return len(self.queues.get(channel_id, ())) >= self.max_pending
+
+    def submit(self, channel_id: int, key: tuple, run) -> asyncio.Future:
+        """
+        Met run() (fabrique de coroutine) dans la file du salon. Le futur vaut
+        True une fois la commande exécutée, False si elle a expiré en file.
+        """
+        pending = PendingCommand(key, run)
+        self.queues.setdefault(channel_id, deque()).append(pending)
+        if channel_id not in self.workers:
+            self.workers[channel_id] = asyncio.create_task(self._drain(channel_id))
+        return pending.future
+
+    async def _drain(self, channel_id: int) -> None:
+        queue = self.queues[channel_id]
+        try:
+            while queue:
+                pending = queue.popleft()
+                waited = time.monotonic() - pending.enqueued_at
+                self.waits.append(waited)
+                if metrics.enabled:
+                    metrics.observe("queue_wait", waited)
+                if waited > self.max_age:
+                    self.counters["expired"] += 1
+                    pending.future.set_result(False)
+                    continue
+                self.running[channel_id] = pending.key
+                self.counters["run"] += 1
+                try:
+                    await pending.run()
+                except Exception as e:
+                    pending.future.set_exception(e)
+                else:
+                    pending.future.set_result(True)
+                finally:
+                    self.running.pop(channel_id, None)
+        finally:
+            self.queues.pop(channel_id, None)
+            self.workers.pop(channel_id, None)
+
+    def serialized(self, func):
+        """
+        Décorateur de commande : le corps s'exécute dans la file du salon.
+        """
+        @wraps(func)
+        async def wrapper(ctx, *args, **kwargs):
+            channel_id = ctx.channel.id
+            key = (ctx.author.id, func.__name__, args, tuple(sorted(kwargs.items())))
+            if self.is_duplicate(channel_id, key):
+                self.counters["duplicates"] += 1
+                return
+            if self.is_full(channel_id):
+                self.counters["rejected"] += 1
+                outbound.post(ctx.channel, "Trop de commandes en attente dans ce salon, réessayez dans un instant.")
+                return
+            if not await self.submit(channel_id, key, lambda: func(ctx, *args, **kwargs)):
+                outbound.post(ctx.channel, f"{ctx.author.mention} : commande ignorée (attente trop longue), rejouez.")
+        return wrapper
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def stats(self) -> dict:
+        waits = sorted(self.waits)
+        p99 = waits[min(len(waits) - 1, int(0.99 * len(waits)))] if waits else 0.0
+        return {**self.counters, "queued": self.queue_depth(), "wait_p99_ms": round(p99 * 1000, 3)}
+
+channel_actors = ChannelActors()
@@ -0,0 +1,130 @@
+"""
+Contrôle d'admission : limites de parties en cours et de coups par seconde.
+
+- au plus max_games parties dans le processus et max_games_per_guild par
+  guilde (les parties hors serveur, en message privé, n'ont que la limite
+  globale) ; une nouvelle partie au-delà de la limite globale attend qu'une
+  place se libère (au plus queue_seconds), puis est refusée ;
+- une seule partie par salon ;
+- les coups passent par un seau à jetons global (max_moves_per_second) ;
+- quand la boucle d'événements prend du retard (au-delà de max_loop_lag),
+  les nouvelles parties sont refusées avant que la boucle ne sature.
+
+Une limite à 0 est désactivée. Les compteurs sont exposés en jauges.
+"""
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Optional
+from metrics import metrics
+
+class AdmissionControl:
+    def __init__(self, max_games: int = 10_000, max_games_per_guild: int = 50, max_moves_per_second: float = 0,
+                 max_loop_lag: float = 0.25, queue_seconds: float = 10.0):
+        self.max_games = max_games
+        self.max_games_per_guild = max_games_per_guild
+        self.max_moves_per_second = max_moves_per_second
+        self.max_loop_lag = max_loop_lag
+        self.queue_seconds = queue_seconds
+        # Salon -> guilde des parties en cours
+        self.games: dict[int, Optional[int]] = {}
+        self.per_guild: Counter = Counter()
+        self.waiters: deque[asyncio.Future] = deque()
+        # Seau plein au départ : une seconde de coups d'avance (au moins un)
+        self.move_tokens = float("inf")
+        self.move_updated = time.monotonic()
+        self.counters = {
+            "admitted": 0, "queued": 0, "rejected_capacity": 0, "rejected_guild": 0,
+            "rejected_overload": 0, "moves_shed": 0,
+        }
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self.games
+
+    def register(self, channel_id: int, guild_id: Optional[int]) -> None:
+        """
+        Compte une partie sans contrôle (partie rechargée depuis le stockage).
+        """
+        if channel_id not in self.games:
+            self.games[channel_id] = guild_id
+            if guild_id is not None:
+                self.per_guild[guild_id] += 1
+
+    def release(self, channel_id: int) -> None:
+        if channel_id not in self.games:
+            return
+        guild_id = self.games.pop(channel_id)
+        if guild_id is not None:
+            self.per_guild[guild_id] -= 1
+            if self.per_guild[guild_id] <= 0:
+                del self.per_guild[guild_id]
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    def overloaded(self) -> bool:
+        return bool(self.max_loop_lag) and metrics.loop_lag > self.max_loop_lag
+
+    async def admit(self, channel_id: int, guild_id: Optional[int]) -> Optional[str]:
+        """
+        Réserve une place pour une nouvelle partie. Retourne None si elle est
+        admise, sinon le message de refus à afficher.
+        """
+        if channel_id in self.games:
+            return "Une partie est déjà en cours dans ce salon."
+        if self.overloaded():
+            self.counters["rejected_overload"] += 1
+            return "Le bot est surchargé : réessayez dans une minute."
+        if self.max_games_per_guild and guild_id is not None and self.per_guild[guild_id] >= self.max_games_per_guild:
+            self.counters["rejected_guild"] += 1
+            return f"Limite de {self.max_games_per_guild} parties simultanées atteinte sur ce serveur."
+        if self.max_games and len(self.games) >= self.max_games:
+            self.counters["queued"] += 1
+            deadline = time.monotonic() + self.queue_seconds
+            loop = asyncio.get_running_loop()
+            while len(self.games) >= self.max_games:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters["rejected_capacity"] += 1
+                    return "Trop de parties en cours : réessayez dans quelques minutes."
+                waiter = loop.create_future()
+                self.waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter, remaining)
+                except asyncio.TimeoutError:
+                    pass
+            # La place a pu être prise par une autre partie du même salon entre-temps
+            if channel_id in self.games:
+                return "Une partie est déjà en cours dans ce salon."
+        self.register(channel_id, guild_id)
+        self.counters["admitted"] += 1
+        return None
+
+    def allow_move(self) -> bool:
+        """
+        Seau à jetons global des coups : False si le coup doit être refusé.
+        """
+        if not self.max_moves_per_second:
+            return True
+        now = time.monotonic()
+        rate = self.max_moves_per_second
+        self.move_tokens = min(max(rate, 1.0), self.move_tokens + (now - self.move_updated) * rate)
+        self.move_updated = now
+        if self.move_tokens < 1:
+            self.counters["moves_shed"] += 1
+            return False
+        self.move_tokens -= 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "live_games": len(self.games),
+            "guilds": len(self.per_guild),
+            "busiest_guild_games": max(self.per_guild.values(), default=0),
+            "waiting": sum(1 for waiter in self.waiters if not waiter.done()),
+            **self.counters,
+        }
+
+admission = AdmissionControl()
@@ -0,0 +1,54 @@
+"""
+Compare la mémoire et le temps de création d'une partie entre l'ancienne
+grille (dict de dicts) et la grille en plans plats de MinesweeperGame.
+
+Usage : python benchmarks/bench_board_memory.py [nb_parties] [taille]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games import MinesweeperGame
+
+
+def legacy_board(size):
+    return {
+        (r, c): {
+            "value": 0,
+            "status": "hidden",
+            "flag_owner": None
+        }
+        for r in range(size)
+        for c in range(size)
+    }
+
+
+def measure(factory, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    keep = [factory() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return current / count, elapsed / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+
+    legacy_mem, legacy_time = measure(lambda: legacy_board(size), count)
+    game_mem, game_time = measure(lambda: MinesweeperGame(size=size, bomb_count=size * 2), count)
+
+    print(f"{count} parties {size}x{size}")
+    print(f"  dict de dicts : {legacy_mem:10.0f} octets/partie  {legacy_time * 1e6:8.1f} µs/partie")
+    print(f"  plans plats   : {game_mem:10.0f} octets/partie  {game_time * 1e6:8.1f} µs/partie")
+    print(f"  ratio mémoire : x{legacy_mem / game_mem:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Mesure le temps de generate_bombs : ancien tirage avec rejet + comptage
+case par case, contre le tirage sans remise et le comptage en une passe
+(numpy si disponible, sinon Python pur).
+
+Usage : python benchmarks/bench_generation.py [répétitions]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import games
+from games import adjacent_counts_numpy, adjacent_counts_python, neighbour_table
+
+CASES = [(12, 22), (12, 100), (30, 180), (30, 700), (60, 720), (100, 2000)]
+
+
+def legacy_generate(size, bomb_count, first_click):
+    board = {(r, c): 0 for r in range(size) for c in range(size)}
+    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+    fr, fc = first_click
+    excluded = {first_click}
+    for dr, dc in directions:
+        if 0 <= fr + dr < size and 0 <= fc + dc < size:
+            excluded.add((fr + dr, fc + dc))
+    placed = 0
+    while placed < bomb_count:
+        r = random.randint(0, size - 1)
+        c = random.randint(0, size - 1)
+        if (r, c) not in excluded and board[(r, c)] != 'b':
+            board[(r, c)] = 'b'
+            placed += 1
+    for (r, c), v in board.items():
+        if v != 'b':
+            board[(r, c)] = sum(
+                1 for dr, dc in directions
+                if 0 <= r + dr < size and 0 <= c + dc < size and board[(r + dr, c + dc)] == 'b'
+            )
+    return board
+
+
+def new_generate(size, bomb_count, first_click, counts):
+    # Mêmes étapes que MinesweeperGame.generate_bombs, sans la limite
+    # d'affichage à 16 colonnes du constructeur.
+    first = first_click[0] * size + first_click[1]
+    excluded = {first, *neighbour_table(size)[first]}
+    allowed = [idx for idx in range(size * size) if idx not in excluded]
+    return counts(size, random.sample(allowed, bomb_count))
+
+
+def bench(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"numpy : {'oui' if games.np is not None else 'non'}")
+    print(f"{'taille':>8} {'bombes':>7} {'ancien ms':>10} {'python pur ms':>14} {'numpy ms':>9}")
+    for size, bombs in CASES:
+        first = (size // 2, size // 2)
+        legacy = bench(lambda: legacy_generate(size, bombs, first), repeat)
+        pure = bench(lambda: new_generate(size, bombs, first, adjacent_counts_python), repeat)
+        line = f"{size:>5}x{size:<3}{bombs:>7} {legacy:>10.2f} {pure:>14.2f}"
+        if games.np is not None:
+            vectorized = bench(lambda: new_generate(size, bombs, first, adjacent_counts_numpy), repeat)
+            line += f" {vectorized:>9.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Test de charge : des milliers de parties simultanées jouées à travers les
+vraies commandes du bot (boom_command, reveal_command, flag_command), avec
+de faux salons Discord (voir fake_discord.py).
+
+Pour chaque taille de grille :
+- latence d'un coup sous charge (p50 / p95 / p99 / max), file d'envoi
+  comprise jusqu'au retour de la commande ;
+- messages Discord (envois + éditions) par coup ;
+- avec --memory (tracemalloc, plus lent) : mémoire retenue par partie en
+  cours, puis pic par partie et octets alloués pendant un coup, mesurés
+  sur des parties jouées une à une.
+
+Usage : python benchmarks/bench_load.py [--games 2000] [--sizes 8,12,16] [--backend memory|sqlite] [--memory]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_discord import FakeChannel, FakeContext, FakeMember, import_bot
+
+BOMBS_BY_SIZE = {5: 4, 8: 10, 12: 22, 16: 40}
+
+def column(c: int) -> str:
+    return chr(ord('A') + c)
+
+def pick_move(game, player, rng):
+    """
+    Coup aléatoire jouable : surtout des révélations, quelques drapeaux,
+    et de temps en temps la révélation d'un drapeau adverse. None quand il
+    ne reste plus rien à jouer.
+    """
+    from games import HIDDEN, FLAGGED
+    hidden = [idx for idx, status in enumerate(game.status) if status == HIDDEN]
+    opponents = [idx for idx, status in enumerate(game.status)
+                 if status == FLAGGED and game.flag_owner_of(idx) != player.id]
+    if game.first_click_done and opponents and (rng.random() < 0.05 or not hidden):
+        return "r", rng.choice(opponents)
+    if not hidden:
+        return None
+    kind = "f" if game.first_click_done and rng.random() < 0.25 else "r"
+    return kind, rng.choice(hidden)
+
+class Results:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.moves = 0
+        self.messages = 0
+        # Parties refusées par !boom (contrôle d'admission)
+        self.rejected = 0
+        self.move_allocations: list[int] = []
+
+async def play_game(bot, size, rng, results: Results, started: asyncio.Event, barrier, track_allocations: bool):
+    channel = FakeChannel()
+    players = [FakeMember() for _ in range(rng.randint(2, 4))]
+    await bot.boom_command.callback(FakeContext(channel, players[0], players), f"{size}x{size}", str(BOMBS_BY_SIZE[size]))
+    data = bot.games_in_progress.get(channel.id)
+    if data is None:
+        results.rejected += 1
+        barrier[0] -= 1
+        if barrier[0] == 0:
+            started.set()
+        return
+
+    barrier[0] -= 1
+    if barrier[0] == 0:
+        started.set()
+    await started.wait()
+
+    commands = {"r": bot.reveal_command.callback, "f": bot.flag_command.callback}
+    for _ in range(4 * size * size):
+        if channel.id not in bot.games_in_progress:
+            break
+        player = data["turn_order"][data["current_player_index"]]
+        move = pick_move(data["game"], player, rng)
+        if move is None:
+            break
+        kind, idx = move
+        case = f"{column(idx % size)}{idx // size + 1}"
+        ctx = FakeContext(channel, player)
+        if track_allocations:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        await commands[kind](ctx, case)
+        results.latencies.append(time.perf_counter() - start)
+        if track_allocations:
+            results.move_allocations.append(tracemalloc.get_traced_memory()[1] - before)
+        results.moves += 1
+        await asyncio.sleep(0)
+
+    while bot.outbound.workers.get(channel.id):
+        await asyncio.sleep(0)
+    results.messages += channel.sends + channel.edits
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+async def run_size(bot, size, games, seed, memory):
+    rng = random.Random(seed)
+    results = Results()
+    started = asyncio.Event()
+    barrier = [games]
+
+    if memory:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+    tasks = [asyncio.create_task(play_game(bot, size, random.Random(rng.getrandbits(64)), results, started, barrier, False))
+             for _ in range(games)]
+    await started.wait()
+    if memory:
+        resident = (tracemalloc.get_traced_memory()[0] - baseline) / games
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    ms = [latency * 1000 for latency in results.latencies]
+    print(f"\n{size}x{size}, {BOMBS_BY_SIZE[size]} bombes : {games} parties, {results.moves} coups en {elapsed:.2f} s "
+          f"({results.moves / elapsed:.0f} coups/s)")
+    if results.rejected:
+        print(f"  parties refusées par l'admission : {results.rejected}")
+    print(f"  latence par coup sous charge (ms) : p50 {percentile(ms, 0.50):.3f}  p95 {percentile(ms, 0.95):.3f}  "
+          f"p99 {percentile(ms, 0.99):.3f}  max {max(ms, default=0):.3f}")
+    print(f"  messages Discord par coup : {results.messages / max(1, results.moves):.2f}")
+    if not memory:
+        return
+
+    # Allocations et pic mesurés partie par partie : en parallèle, les coups
+    # des autres parties se mélangeraient aux mesures.
+    solo = Results()
+    peaks = []
+    for _ in range(min(games, 50)):
+        done = asyncio.Event()
+        done.set()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await play_game(bot, size, random.Random(rng.getrandbits(64)), solo, done, [0], True)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    print(f"  mémoire par partie : {resident / 1024:.1f} Kio en cours de partie, pic {percentile(peaks, 0.50) / 1024:.1f} Kio (p50)")
+    print(f"  alloué pendant un coup (Kio) : p50 {percentile(solo.move_allocations, 0.50) / 1024:.1f}  "
+          f"p95 {percentile(solo.move_allocations, 0.95) / 1024:.1f}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--sizes", default="8,12,16")
+    parser.add_argument("--backend", default="memory", choices=("memory", "sqlite"))
+    parser.add_argument("--memory", action="store_true", help="mesure mémoire et allocations (tracemalloc)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    bot = import_bot(store_backend=args.backend)
+    for size in map(int, args.sizes.split(",")):
+        await run_size(bot, size, args.games, args.seed, args.memory)
+    print(f"\nFile d'envoi : {bot.outbound.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
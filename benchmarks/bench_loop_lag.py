@@ -0,0 +1,107 @@
+"""
+Retard de la boucle d'événements avec un mélange de grandes cartes et de
+petites grilles, joué à travers les vraies commandes du bot (fake_discord.py).
+
+Une tâche sonde se réveille toutes les --tick ms et mesure son retard : c'est
+ce que subiraient le heartbeat de la passerelle et les commandes des autres
+salons. Le scénario est joué deux fois : opérations lourdes dans la boucle
+(heavy_cells infini), puis déportées dans le pool de threads (executor.py).
+On mesure aussi la latence des coups sur les petites grilles, qui ne
+devraient pas attendre les grandes.
+
+Usage : python benchmarks/bench_loop_lag.py [--large 8] [--small 200] [--dimensions 200x200] [--moves 30]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_discord import FakeChannel, FakeContext, FakeMember, import_bot
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+def column(c: int) -> str:
+    label = ""
+    c += 1
+    while c:
+        c, rest = divmod(c - 1, 26)
+        label = chr(ord('A') + rest) + label
+    return label
+
+async def probe(interval: float, lags: list[float], stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+async def play(bot, options, moves, rng, latencies):
+    channel = FakeChannel()
+    players = [FakeMember() for _ in range(2)]
+    await bot.boom_command.callback(FakeContext(channel, players[0], players), *options)
+    data = bot.games_in_progress.get(channel.id)
+    if data is None:
+        # Refusée par le contrôle d'admission
+        return
+    game = data["game"]
+    for _ in range(moves):
+        if channel.id not in bot.games_in_progress:
+            break
+        player = data["turn_order"][data["current_player_index"]]
+        r, c = rng.randrange(game.rows), rng.randrange(game.cols)
+        start = time.perf_counter()
+        await bot.reveal_command.callback(FakeContext(channel, player), f"{column(c)}{r + 1}")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+
+async def scenario(bot, args, offload: bool):
+    bot.game_executor.heavy_cells = 1024 if offload else float("inf")
+    rng = random.Random(args.seed)
+    lags, small, large = [], [], []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(args.tick / 1000, lags, stop))
+    # Grandes cartes peu minées : le premier clic ouvre une vaste zone
+    large_options = (args.dimensions, str(args.large_bombs))
+    tasks = [play(bot, large_options, args.moves, random.Random(rng.getrandbits(64)), large) for _ in range(args.large)]
+    tasks += [play(bot, (), args.moves, random.Random(rng.getrandbits(64)), small) for _ in range(args.small)]
+    rng.shuffle(tasks)
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    while bot.outbound.workers:
+        await asyncio.sleep(0)
+
+    print(f"\n{'déporté (threads)' if offload else 'dans la boucle'} : {elapsed:.2f} s")
+    ms = [lag * 1000 for lag in lags]
+    print(f"  retard de boucle (ms) : p50 {percentile(ms, 0.5):.2f}  p99 {percentile(ms, 0.99):.2f}  max {max(ms, default=0):.2f}")
+    for name, values in (("petites grilles", small), ("grandes cartes", large)):
+        ms = [latency * 1000 for latency in values]
+        print(f"  coup {name} (ms) : p50 {percentile(ms, 0.5):.2f}  p99 {percentile(ms, 0.99):.2f}  max {max(ms, default=0):.2f}")
+    print(f"  exécuteur : {bot.game_executor.counters}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--large", type=int, default=8, help="grandes cartes simultanées")
+    parser.add_argument("--small", type=int, default=200, help="grilles 12x12 simultanées")
+    parser.add_argument("--dimensions", default="200x200")
+    parser.add_argument("--large-bombs", type=int, default=2000)
+    parser.add_argument("--moves", type=int, default=30, help="coups par partie")
+    parser.add_argument("--tick", type=float, default=5.0, help="période de la sonde (ms)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    bot = import_bot()
+    for offload in (False, True):
+        await scenario(bot, args, offload)
+    bot.game_executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+"""
+Débit du moteur de simulation (simulate.py), en parties par seconde et par
+cœur : un seul processus, sans pool, pour suivre le chiffre d'une version à
+l'autre.
+
+Usage : python benchmarks/bench_simulate.py [--games 2000] [--size 12] [--bombs 22]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulate import run_batch
+
+LINEUPS = ("random,random", "random,random,random,random", "solver,random", "solver,solver,solver,solver")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=12)
+    parser.add_argument("--bombs", type=int, default=22)
+    args = parser.parse_args()
+
+    print(f"{'joueurs':<30}{'parties/s/cœur':>16}{'coups/s':>10}")
+    for lineup in LINEUPS:
+        stats = run_batch(args.size, args.bombs, lineup.split(","), range(args.games))
+        print(f"{lineup:<30}{stats.games / stats.seconds:>16.0f}{stats.moves / stats.seconds:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Taille et vitesse du format binaire des parties (snapshot.py) sur une
+partie en cours.
+
+Usage : python benchmarks/bench_snapshot.py [itérations]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games import MinesweeperGame
+from snapshot import encode_game, decode_game
+
+
+def played_game(size, bomb_count, moves, rng):
+    game = MinesweeperGame(size=size, bomb_count=bomb_count, seed=rng.getrandbits(64))
+    game.reveal_case(size // 2, size // 2)
+    players = [rng.getrandbits(63) for _ in range(4)]
+    for _ in range(moves):
+        r, c = rng.randrange(size), rng.randrange(size)
+        if rng.random() < 0.7:
+            game.reveal_case(r, c)
+        else:
+            game.flag_case(r, c, rng.choice(players))
+    return game
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(1)
+    print(f"{'taille':>8} {'octets':>7} {'encode µs':>10} {'decode µs':>10}")
+    for size, bombs in ((5, 4), (12, 22), (16, 40)):
+        game = played_game(size, bombs, 30, rng)
+        blob = encode_game(game)
+        assert decode_game(blob).to_bytes() == blob
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            encode_game(game)
+        encode = (time.perf_counter() - start) / iterations * 1e6
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            decode_game(blob)
+        decode = (time.perf_counter() - start) / iterations * 1e6
+
+        print(f"{size:>5}x{size:<3}{len(blob):>7} {encode:>10.1f} {decode:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
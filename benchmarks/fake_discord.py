@@ -0,0 +1,86 @@
+"""
+Faux objets Discord (membre, salon, message, contexte) pour faire tourner les
+commandes du bot sans réseau. Les envois et éditions sont comptés au lieu
+d'être faits en HTTP, et les contenus ne sont pas gardés : la mémoire
+mesurée est celle du bot, pas celle de Discord.
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+_ids = itertools.count(1)
+
+class FakeMember:
+    __slots__ = ("id", "mention", "display_name", "name", "bot")
+
+    def __init__(self, member_id=None, bot=False):
+        self.id = member_id or next(_ids)
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.display_name = self.name = f"joueur{self.id}"
+
+class FakeMessage:
+    __slots__ = ("id", "channel", "author", "mentions")
+
+    def __init__(self, channel, message_id=None, author=None, mentions=()):
+        self.id = message_id or next(_ids)
+        self.channel = channel
+        self.author = author
+        self.mentions = list(mentions)
+
+    async def edit(self, content=None, **kwargs):
+        self.channel.edits += 1
+        self.channel.chars += len(content or "")
+        return self
+
+class FakeChannel:
+    def __init__(self):
+        self.id = next(_ids)
+        self.guild = None
+        self.sends = 0
+        self.edits = 0
+        self.chars = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sends += 1
+        self.chars += len(content or "")
+        return FakeMessage(self)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id)
+
+class FakeContext:
+    __slots__ = ("channel", "author", "guild", "message")
+
+    def __init__(self, channel, author, mentions=()):
+        self.channel = channel
+        self.author = author
+        self.guild = None
+        self.message = FakeMessage(channel, author=author, mentions=mentions)
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+def import_bot(store_backend="memory", window=0.0):
+    """
+    Importe boomBot avec une configuration de test : faux jeton, pas de
+    fenêtre de regroupement ni de limite de débit sur la file d'envoi, pas de
+    limite d'admission (les benchmarks mesurent la charge, pas les refus) et
+    historique dans le dossier temporaire.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, root)
+    directory = tempfile.mkdtemp(prefix="boombot-bench-")
+    path = os.path.join(directory, "config.yml")
+    with open(path, "w") as file:
+        file.write(
+            'discord:\n  token: "bench"\n'
+            f"outbound:\n  window: {window}\n  rate: 1000000\n  per: 1.0\n"
+            f"store:\n  backend: {store_backend}\n  path: {os.path.join(directory, 'games.sqlite3')}\n"
+            "admission:\n  max_games: 0\n  max_games_per_guild: 0\n  max_loop_lag_ms: 0\n"
+            f"history:\n  path: {os.path.join(directory, 'history.sqlite3')}\n"
+        )
+    os.environ["BOOMBOT_CONFIG"] = path
+    import boomBot
+    return boomBot
@@ -2,10 +2,30 @@ import discord
 from discord.ext import commands
 from discord.ext.commands import Context
 from typing import Optional
-import random
 from config.config import Config
-from games import MinesweeperGame, GameData
+from games import MinesweeperGame, GameData, seeded_turn_order
 from utils import *
+from rules import play_reveal, play_flag
+from dispatcher import outbound
+from executor import game_executor
+from actors import channel_actors
+from timers import timer_wheel
+from admission import admission
+from history import GameHistory
+from snapshot import game_data_to_bytes
+from image_renderer import image_renderer, images_available, tile_atlas, column_label
+from store import create_game_store, ChannelOwnedElsewhere, LeaseLost
+from sharding import shard_settings, process_owner
+from players import PlayerRef
+from solver import suggest
+from large_board import LargeMinesweeperGame, create_game, is_classic, MAX_DIMENSION
+from no_guess import layout_pool
+from metrics import metrics
+import time
+import asyncio
+import base64
+import json
+import re
 
 config = Config()
 DISCORD_TOKEN: Optional[str] = config.get("discord.token")
@@ -13,29 +33,417 @@ DISCORD_TOKEN: Optional[str] = config.get("discord.token")
 if not isinstance(DISCORD_TOKEN, str) or not DISCORD_TOKEN.strip():
     raise ValueError("Error: Discord bot token is invalid or missing from config.yml")
 
+# Mode allégé : ni présences ni membres, aucun cache de membres. Les joueurs
+# ne sont connus que par leurs PlayerRef (id, mention, nom affiché).
+LEAN_GATEWAY: bool = config.get("discord.lean", False)
+
 intents = discord.Intents.default()
 intents.message_content = True
-intents.presences = True
-intents.members = True
+if LEAN_GATEWAY:
+    gateway_options = {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False, "max_messages": None}
+else:
+    intents.presences = True
+    intents.members = True
+    gateway_options = {}
+
+SHARD_COUNT, SHARD_IDS = shard_settings(config)
+if SHARD_COUNT:
+    # Ce processus ne reçoit que les guildes de ses shards (voir sharding.py)
+    bot = commands.AutoShardedBot(command_prefix='!', intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **gateway_options)
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, **gateway_options)
+
+outbound.window = config.get("outbound.window", outbound.window)
+outbound.max_retries = config.get("outbound.max_retries", outbound.max_retries)
+outbound.rate = config.get("outbound.rate", outbound.rate)
+outbound.per = config.get("outbound.per", outbound.per)
+
+game_store = create_game_store(
+    config.get("store.backend", "memory"),
+    config.get("store.path", "games.sqlite3"),
+    owner=process_owner() if SHARD_COUNT else None,
+    lease_seconds=config.get("sharding.lease_seconds", 30),
+)
+# Parties actuellement chargées en mémoire
+games_in_progress: dict[int, GameData] = game_store.resident
+game_history = GameHistory(
+    config.get("history.path"),
+    flush_interval=config.get("history.flush_interval", 2.0),
+    batch_size=config.get("history.batch_size", 200),
+    max_buffer=config.get("history.max_buffer", 10_000),
+)
+STORE_IDLE_SECONDS: float = config.get("store.idle_seconds", 900)
+idle_eviction_task: Optional[asyncio.Task] = None
+lease_renewal_task: Optional[asyncio.Task] = None
+NO_GUESS_DEFAULT: bool = config.get("no_guess.default", False)
+layout_pool.target = config.get("no_guess.pool_size", layout_pool.target)
+layout_pool.workers = config.get("no_guess.workers", layout_pool.workers)
+layout_pool.budget = config.get("no_guess.budget_ms", layout_pool.budget * 1000) / 1000
+layout_pool.warm_layouts = {tuple(layout) for layout in config.get("no_guess.warm_layouts", layout_pool.warm_layouts)}
+layout_pool.max_layouts = config.get("no_guess.max_layouts", layout_pool.max_layouts)
+game_executor.heavy_cells = config.get("executor.heavy_cells", game_executor.heavy_cells)
+game_executor.threads = config.get("executor.threads", game_executor.threads)
+channel_actors.max_pending = config.get("commands.max_pending", channel_actors.max_pending)
+channel_actors.max_age = config.get("commands.max_age", channel_actors.max_age)
+timer_wheel.tick = config.get("timers.tick", timer_wheel.tick)
+# Délai de jeu d'un tour (0 = pas de limite) et durée sans coup avant qu'une partie soit close
+TURN_TIMEOUT: float = config.get("timers.turn_seconds", 0)
+REAP_SECONDS: float = config.get("timers.reap_seconds", 6 * 3600)
+# Fichier JSON lines où garder les parties closes pour inactivité (None = non gardées)
+REAP_ARCHIVE_PATH: Optional[str] = config.get("timers.archive_path")
+HINT_BUDGET: float = config.get("solver.budget_ms", 50) / 1000
+admission.max_games = config.get("admission.max_games", admission.max_games)
+admission.max_games_per_guild = config.get("admission.max_games_per_guild", admission.max_games_per_guild)
+admission.max_moves_per_second = config.get("admission.max_moves_per_second", admission.max_moves_per_second)
+admission.max_loop_lag = config.get("admission.max_loop_lag_ms", admission.max_loop_lag * 1000) / 1000
+admission.queue_seconds = config.get("admission.queue_seconds", admission.queue_seconds)
+# Mode édition de la carte par salon (activé par défaut)
+edit_mode_by_channel: dict[int, bool] = {}
+# Rendu de la carte par salon : "text" (défaut) ou "image"
+render_mode_by_channel: dict[int, str] = {}
+
+metrics.gauge("active_games", lambda: len(games_in_progress))
+metrics.gauge("game_memory_bytes_avg", lambda: sum(d["game"].memory_estimate() for d in games_in_progress.values()) / max(1, len(games_in_progress)))
+metrics.gauge("outbound_queue_depth", outbound.queue_depth)
+metrics.gauge("outbound_active_channels", lambda: len(outbound.workers))
+metrics.gauge("offload_queue_depth", game_executor.queue_depth)
+metrics.gauge("command_queue_depth", channel_actors.queue_depth)
+metrics.gauge("timers_pending", lambda: len(timer_wheel))
+metrics.gauge("no_guess_fallbacks", lambda: layout_pool.counters["fallbacks"])
+metrics.gauge("no_guess_layouts", lambda: len(layout_pool.seeds))
+for name in ("live_games", "waiting", "admitted", "queued", "rejected_capacity", "rejected_guild", "rejected_overload", "moves_shed"):
+    metrics.gauge(f"admission_{name}", lambda name=name: admission.stats()[name])
+metrics.gauge("history_buffered", lambda: len(game_history.buffer))
+metrics.gauge("history_written", lambda: game_history.counters["written"])
+metrics.gauge("history_dropped", lambda: game_history.counters["dropped"])
+metrics.gauge("history_write_errors", lambda: game_history.counters["write_errors"])
+metrics.gauge("store_fenced_writes", lambda: game_store.counters["fenced_writes"])
+
+BOARD_DIMENSIONS = re.compile(r"^(\d+)x(\d+)$", re.IGNORECASE)
+# Cases tentées au plus par message (!r A1 B2 C3)
+MAX_BATCH_MOVES = 10
+LEASE_LOST_MESSAGE = "La partie de ce salon a été reprise par un autre processus : ce coup n'a pas été enregistré, rejouez-le."
+
+def parse_board_options(args) -> tuple[Optional[str], int, int, Optional[int], bool]:
+    """
+    Options de !boom hors mentions : dimensions "LxC", nombre de bombes, "noguess".
+    Retourne (message d'erreur, lignes, colonnes, bombes ou None pour la densité par défaut, sans hasard).
+    """
+    rows = cols = 12
+    bomb_count = None
+    no_guess = NO_GUESS_DEFAULT
+    for arg in args:
+        dimensions = BOARD_DIMENSIONS.match(arg)
+        if dimensions:
+            rows, cols = int(dimensions.group(1)), int(dimensions.group(2))
+        elif arg.isdigit():
+            bomb_count = int(arg)
+        elif arg.lower() == "noguess":
+            no_guess = True
+    if not (5 <= rows <= MAX_DIMENSION and 5 <= cols <= MAX_DIMENSION):
+        return f"Dimensions entre 5x5 et {MAX_DIMENSION}x{MAX_DIMENSION}.", rows, cols, bomb_count, no_guess
+    if bomb_count is not None and not (1 <= bomb_count <= rows * cols - 9):
+        return f"Entre 1 et {rows * cols - 9} bombes pour une carte {rows}x{cols}.", rows, cols, bomb_count, no_guess
+    if no_guess and not is_classic(rows, cols):
+        if "noguess" in (arg.lower() for arg in args):
+            return "Le mode sans hasard n'existe que pour les cartes carrées jusqu'à 16x16.", rows, cols, bomb_count, no_guess
+        no_guess = False
+    return None, rows, cols, bomb_count, no_guess
+
+async def load_game(ctx: Context) -> Optional[GameData]:
+    restored = ctx.channel.id not in game_store
+    data = await game_store.get(ctx.channel.id)
+    if data is not None and ctx.channel.id not in admission:
+        # Partie reprise du stockage (redémarrage, autre processus) : comptée sans contrôle
+        admission.register(ctx.channel.id, ctx.guild.id if ctx.guild else None)
+    if data is not None and restored:
+        # Après un redémarrage ou une reprise de bail, la roue ne connaît pas encore la partie
+        arm_timers(ctx.channel, data, only_missing=True)
+    return data
+
+def admit_move(ctx: Context) -> bool:
+    """
+    Limite globale de coups par seconde : au-delà, le coup est refusé avant
+    d'entrer dans la file du salon.
+    """
+    if admission.allow_move():
+        return True
+    outbound.post(ctx.channel, f"{ctx.author.mention} : le bot est surchargé, coup ignoré. Réessayez dans un instant.")
+    return False
+
+class ChannelContext:
+    """
+    Contexte minimal (salon, guilde, auteur) pour jouer une action hors du
+    pipeline des commandes : expiration d'un tour, coups du chemin rapide.
+    """
+    __slots__ = ("channel", "guild", "author", "message", "command", "started_at")
+    # Lu par commands.Bot.on_command_error
+    cog = None
+
+    def __init__(self, channel, author=None, message=None, command=None):
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+        self.author = author
+        self.message = message
+        self.command = command
+        # Posé par start_command_timer, comme sur un Context de discord.py
+        self.started_at = None
+
+def arm_timers(channel, data: GameData, only_missing: bool = False) -> None:
+    """
+    (Re)programme le délai du tour en cours et la clôture pour inactivité.
+    À appeler après chaque coup joué ; avec only_missing, les minuteries déjà
+    programmées gardent leur échéance (partie rechargée du stockage).
+    """
+    channel_id = channel.id
+    if TURN_TIMEOUT and not (only_missing and ("turn", channel_id) in timer_wheel):
+        player = data["turn_order"][data["current_player_index"]]
+        token = (data["game"].move_count, player.id)
+        timer_wheel.schedule(("turn", channel_id), TURN_TIMEOUT,
+                             lambda: run_in_channel(channel, ("turn", token), lambda ctx: turn_timeout(ctx, token)))
+    if REAP_SECONDS and not (only_missing and ("idle", channel_id) in timer_wheel):
+        timer_wheel.schedule(("idle", channel_id), REAP_SECONDS,
+                             lambda: run_in_channel(channel, ("idle",), reap_game))
+
+def disarm_timers(channel_id: int) -> None:
+    timer_wheel.cancel(("turn", channel_id))
+    timer_wheel.cancel(("idle", channel_id))
+
+def forget_lost_game(channel_id: int) -> None:
+    """
+    La partie vit désormais dans un autre processus : plus rien ne la suit ici.
+    """
+    disarm_timers(channel_id)
+    admission.release(channel_id)
+    image_renderer.forget(channel_id)
+    game_executor.forget(channel_id)
+
+async def run_in_channel(channel, key: tuple, action) -> None:
+    """
+    Joue action(ctx) dans la file de commandes du salon, comme une commande.
+    """
+    if channel_actors.is_duplicate(channel.id, key):
+        return
+    ctx = ChannelContext(channel)
+    try:
+        await channel_actors.submit(channel.id, key, lambda: action(ctx))
+    except LeaseLost:
+        forget_lost_game(channel.id)
+        outbound.post(channel, LEASE_LOST_MESSAGE)
+    except Exception as e:
+        print(f"Action programmée en erreur dans le salon {channel.id} : {e}")
+
+async def turn_timeout(ctx: ChannelContext, token: tuple) -> None:
+    """
+    Le joueur dont c'est le tour n'a pas joué à temps : il est éliminé.
+    """
+    data = await load_game(ctx)
+    if data is None:
+        return
+    player = data["turn_order"][data["current_player_index"]]
+    if (data["game"].move_count, player.id) != token:
+        # Un coup a été joué entre-temps
+        return
+    remove_player_from_game(data, player)
+    action_text = f"⏰ {player.mention} n'a pas joué à temps et est éliminé."
+    ended, scenario = await check_end_game(data)
+    if ended:
+        await handle_end_of_game(ctx, data, None, None, bomb_clicked=False, safe_flag_clicked=False, scenario=scenario, action_text=action_text)
+        return
+    next_player = data["turn_order"][data["current_player_index"]]
+    await show_board(ctx, data, before=action_text, after=f"Tour de {next_player.mention}.")
+    await game_store.save(ctx.channel.id, data)
+    arm_timers(ctx.channel, data)
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+async def reap_game(ctx: ChannelContext) -> None:
+    """
+    Clôt une partie sans coup depuis REAP_SECONDS : résumé dans le salon,
+    archive si configurée, puis la partie quitte la mémoire et le stockage.
+    """
+    channel_id = ctx.channel.id
+    data = await load_game(ctx)
+    if data is None:
+        return
+    game = data["game"]
+    survivors = ", ".join(p.mention for p in data["turn_order"])
+    outbound.post(ctx.channel, f"⌛ Partie close : aucun coup depuis {REAP_SECONDS / 60:.0f} min. "
+                               f"{game.move_count} coup(s) joué(s), encore en lice : {survivors}.")
+    if REAP_ARCHIVE_PATH:
+        record = {
+            "channel_id": channel_id,
+            "closed_at": time.time(),
+            "reason": "idle",
+            "snapshot": base64.b64encode(game_data_to_bytes(data)).decode(),
+        }
+        def archive():
+            with open(REAP_ARCHIVE_PATH, "a") as file:
+                file.write(json.dumps(record) + "\n")
+        await asyncio.to_thread(archive)
+    disarm_timers(channel_id)
+    await game_store.remove(channel_id)
+    admission.release(channel_id)
+    image_renderer.forget(channel_id)
+    game_executor.forget(channel_id)
+
+async def arm_stored_games() -> None:
+    """
+    Après un redémarrage, les parties restées sur disque n'ont pas de
+    minuterie : leur clôture pour inactivité est programmée d'après leur
+    dernière écriture, sans les charger.
+    """
+    if not REAP_SECONDS:
+        return
+    now = time.time()
+    for channel_id, updated_at in await game_store.stored_games():
+        if ("idle", channel_id) not in timer_wheel:
+            timer_wheel.schedule(("idle", channel_id), max(0.0, updated_at + REAP_SECONDS - now),
+                                 lambda channel_id=channel_id: reap_stored_game(channel_id))
+
+async def reap_stored_game(channel_id: int) -> None:
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        try:
+            channel = await bot.fetch_channel(channel_id)
+        except discord.NotFound:
+            # Salon supprimé : il n'y a plus personne à prévenir
+            await game_store.remove(channel_id)
+            admission.release(channel_id)
+            return
+        except discord.HTTPException as e:
+            print(f"Salon {channel_id} introuvable pour clore sa partie : {e}")
+            return
+    await run_in_channel(channel, ("idle",), reap_game)
 
-games_in_progress: dict[int, GameData] = {}
+async def evict_idle_games():
+    """
+    Les parties inactives sont déchargées par la file de leur salon, comme une
+    commande : jamais au milieu d'un coup en cours.
+    """
+    key = (None, "evict")
+    while True:
+        await asyncio.sleep(STORE_IDLE_SECONDS / 2)
+        evicted = 0
+
+        async def evict(channel_id: int) -> None:
+            nonlocal evicted
+            try:
+                evicted += await game_store.evict(channel_id, STORE_IDLE_SECONDS)
+            except LeaseLost:
+                forget_lost_game(channel_id)
+
+        pending = [
+            channel_actors.submit(channel_id, key, lambda channel_id=channel_id: evict(channel_id))
+            for channel_id in game_store.idle_channels(STORE_IDLE_SECONDS)
+            if not channel_actors.is_duplicate(channel_id, key)
+        ]
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"Éviction d'une partie en erreur : {result}")
+        if evicted:
+            print(f"{evicted} partie(s) inactive(s) déchargée(s) sur disque.")
+
+async def renew_leases():
+    while True:
+        await asyncio.sleep(game_store.lease_seconds / 3)
+        lost = await game_store.renew_leases()
+        for channel_id in lost:
+            forget_lost_game(channel_id)
+        if lost:
+            print(f"{len(lost)} partie(s) reprise(s) par un autre processus.")
 
 @bot.event
 async def on_ready():
-    print(f"{bot.user} est en ligne !")
+    global idle_eviction_task, lease_renewal_task
+    print(f"{bot.user} est en ligne !" + (f" (shards {bot.shard_ids} sur {SHARD_COUNT})" if SHARD_COUNT else ""))
+    if game_store.persistent and idle_eviction_task is None:
+        idle_eviction_task = asyncio.create_task(evict_idle_games())
+        await arm_stored_games()
+    if SHARD_COUNT and lease_renewal_task is None:
+        lease_renewal_task = asyncio.create_task(renew_leases())
+    if config.get("metrics.enabled", False) and not metrics.enabled:
+        await metrics.start(
+            host=config.get("metrics.host", "127.0.0.1"),
+            port=config.get("metrics.port", 0),
+            log_interval=config.get("metrics.log_interval", 0),
+            lag_interval=config.get("metrics.loop_lag_interval", 0.5),
+        )
+    if admission.max_loop_lag:
+        metrics.watch_loop_lag(config.get("metrics.loop_lag_interval", 0.5))
+    if NO_GUESS_DEFAULT:
+        layout_pool.warm(12, 22)
+    if images_available():
+        # Chargement des tuiles une seule fois, hors de la boucle d'événements
+        await asyncio.to_thread(tile_atlas)
     await bot.change_presence(
         status=discord.Status.online,
         activity=discord.Game("Démineur !")
     )
 
+@bot.event
+async def on_command_error(ctx: Context, error: commands.CommandError):
+    if isinstance(getattr(error, "original", None), LeaseLost):
+        forget_lost_game(ctx.channel.id)
+        outbound.post(ctx.channel, LEASE_LOST_MESSAGE)
+        return
+    if isinstance(getattr(error, "original", None), ChannelOwnedElsewhere):
+        outbound.post(ctx.channel, "La partie de ce salon est en cours de transfert, réessayez dans quelques secondes.")
+        return
+    await commands.Bot.on_command_error(bot, ctx, error)
+
+@bot.event
+async def on_message(message: discord.Message):
+    """
+    Chemin rapide des coups (!r, !f) : sans passer par l'analyse des
+    commandes de discord.py quand l'auteur joue dans une partie en mémoire.
+    Tout le reste suit le chemin normal ; les messages des bots et ceux qui
+    ne commencent pas par le préfixe sont ignorés sans autre examen.
+    """
+    content = message.content
+    if message.author.bot or not content.startswith("!"):
+        return
+    kind = content[1:2]
+    if (kind == "r" or kind == "f") and content[2:3].isspace():
+        data = games_in_progress.get(message.channel.id)
+        if data is not None and any(player.id == message.author.id for player in data["turn_order"]):
+            ctx = ChannelContext(message.channel, message.author, message, bot.get_command(kind))
+            if not admit_move(ctx):
+                return
+            # Mêmes crochets qu'une commande passée par discord.py (chronométrage)
+            await start_command_timer(ctx)
+            try:
+                await play_moves(ctx, kind, tuple(content[3:].split()))
+            except Exception as e:
+                # Même traitement que les erreurs des commandes passées par discord.py
+                await on_command_error(ctx, commands.CommandInvokeError(e))
+            finally:
+                await stop_command_timer(ctx)
+            return
+    await bot.process_commands(message)
+
+@bot.before_invoke
+async def start_command_timer(ctx: Context):
+    if metrics.enabled:
+        ctx.started_at = time.perf_counter()
+
+@bot.after_invoke
+async def stop_command_timer(ctx: Context):
+    started_at = getattr(ctx, "started_at", None)
+    if started_at is not None:
+        metrics.observe(f"command_{ctx.command.name}", time.perf_counter() - started_at)
+
 @bot.command(name="boom")
+@channel_actors.serialized
 async def boom_command(ctx: Context, *args):
     """
     Commande pour démarrer une nouvelle partie de démineur ou afficher les règles.
     !boom @joueur1 @joueur2 ... (2 à 4 joueurs) - Démarre une nouvelle partie avec les joueurs mentionnés.
+    !boom 60x40 [bombes] @joueur1 @joueur2 ... - Grande carte (jusqu'à 200x200), affichée par fenêtre.
+    !boom noguess @joueur1 @joueur2 ... - Grille résoluble sans deviner depuis le premier clic.
     !boom rules - Affiche les règles du jeu.
+    !boom edit on|off - Édite la carte en place au lieu de la reposter à chaque tour.
+    !boom mode text|image - Affiche la carte en emojis ou en une seule image.
+    !boom stats [@joueur] - Statistiques d'un joueur sur ce serveur.
+    !boom top - Classement du serveur.
     """
     if len(args) == 1 and args[0].lower() == "rules":
         rules_text = (
@@ -47,170 +455,349 @@ async def boom_command(ctx: Context, *args):
             "   - sinon, l'autre joueur perd.\n"
             "- Dernier survivant gagne ou si le puzzle est terminé on compte les drapeaux.\n"
         )
-        await ctx.send(rules_text)
+        outbound.post(ctx.channel, rules_text)
+        return
+
+    if args and args[0].lower() == "stats":
+        mentions = ctx.message.mentions
+        player = mentions[0] if mentions else ctx.author
+        if not game_history.enabled:
+            outbound.post(ctx.channel, "L'historique des parties est désactivé.")
+            return
+        if ctx.guild is None:
+            outbound.post(ctx.channel, "Les classements n'existent que sur un serveur.")
+            return
+        stats = await game_history.player_stats(ctx.guild.id, player.id)
+        if stats is None:
+            outbound.post(ctx.channel, f"Aucune partie terminée pour {player.display_name} sur ce serveur.")
+        else:
+            outbound.post(ctx.channel, (
+                f"**{stats['name']}** : {stats['games']} partie(s), {stats['wins']} victoire(s) "
+                f"({stats['wins'] / stats['games']:.0%}), {stats['flags']} drapeau(x) trouvé(s), "
+                f"{stats['eliminations']} élimination(s), place moyenne {stats['average_place']:.1f}."
+            ))
+        return
+
+    if len(args) == 1 and args[0].lower() == "top":
+        if ctx.guild is None:
+            outbound.post(ctx.channel, "Les classements n'existent que sur un serveur.")
+            return
+        top = await game_history.top(ctx.guild.id)
+        if not top:
+            outbound.post(ctx.channel, "Aucune partie terminée sur ce serveur.")
+            return
+        lines = ["**Classement du serveur :**"]
+        for pos, (name, wins, games, flags) in enumerate(top, 1):
+            lines.append(f"{pos}. {name} - {wins} victoire(s) en {games} partie(s), {flags} drapeau(x)")
+        outbound.post(ctx.channel, "\n".join(lines))
+        return
+
+    if len(args) == 2 and args[0].lower() == "edit" and args[1].lower() in ("on", "off"):
+        enabled = args[1].lower() == "on"
+        edit_mode_by_channel[ctx.channel.id] = enabled
+        data = await load_game(ctx)
+        if data is not None:
+            data["edit_in_place"] = enabled
+            await game_store.save(ctx.channel.id, data)
+        outbound.post(ctx.channel, f"Mode édition de la carte {'activé' if enabled else 'désactivé'} dans ce salon.")
+        return
+
+    if len(args) == 2 and args[0].lower() == "mode" and args[1].lower() in ("text", "image"):
+        mode = args[1].lower()
+        if mode == "image" and not images_available():
+            outbound.post(ctx.channel, "Rendu image indisponible (Pillow n'est pas installé).")
+            return
+        render_mode_by_channel[ctx.channel.id] = mode
+        data = await load_game(ctx)
+        if data is not None:
+            data["render_mode"] = mode
+            # La carte sera repostée dans le nouveau format au prochain coup
+            data["board_message_ids"].clear()
+            await game_store.save(ctx.channel.id, data)
+        outbound.post(ctx.channel, f"Rendu de la carte : {'image' if mode == 'image' else 'emojis'}.")
         return
 
     mentioned_players = ctx.message.mentions
     nb_players = len(mentioned_players)
     if nb_players < 2:
-        await ctx.send("Il faut au moins 2 joueurs pour démarrer.")
+        outbound.post(ctx.channel, "Il faut au moins 2 joueurs pour démarrer.")
         return
     if nb_players > 4:
-        await ctx.send("Maximum 4 joueurs.")
+        outbound.post(ctx.channel, "Maximum 4 joueurs.")
+        return
+
+    error_msg, rows, cols, bomb_count, no_guess = parse_board_options(args)
+    if error_msg:
+        outbound.post(ctx.channel, error_msg)
         return
 
-    new_game = MinesweeperGame(size=12, bomb_count=22)
     channel_id = ctx.channel.id
-    turn_order = list(mentioned_players)
-    random.shuffle(turn_order)
+    # load_game compte une partie restée sur disque : admit la voit alors comme en cours
+    await load_game(ctx)
+    refusal = await admission.admit(channel_id, ctx.guild.id if ctx.guild else None)
+    if refusal:
+        outbound.post(ctx.channel, refusal)
+        return
 
-    games_in_progress[channel_id] = {
-        "game": new_game,
-        "turn_order": turn_order,
-        "current_player_index": 0,
-        "elimination_order": []
-    }
+    # La place réservée n'est rendue qu'en fin de partie : à rendre si la partie n'est pas créée
+    try:
+        new_game = create_game(rows, cols, bomb_count, no_guess=no_guess)
+        if new_game.no_guess:
+            layout_pool.warm(new_game.size, new_game.bomb_count)
+        large = isinstance(new_game, LargeMinesweeperGame)
+        turn_order = seeded_turn_order([PlayerRef.from_member(m) for m in mentioned_players], new_game.seed)
+
+        data: GameData = {
+            "game": new_game,
+            "turn_order": turn_order,
+            "current_player_index": 0,
+            "elimination_order": [],
+            "edit_in_place": edit_mode_by_channel.get(channel_id, True),
+            "render_mode": render_mode_by_channel.get(channel_id, "text"),
+            "board_message_ids": [],
+            "board_chunk_hashes": [],
+            "started_at": time.time(),
+        }
+        await game_store.put(channel_id, data)
+    except BaseException:
+        admission.release(channel_id)
+        raise
 
     first_player = turn_order[0]
-    await ctx.send(
+    intro = (
         f"Nouvelle partie avec {', '.join(p.mention for p in turn_order)}!\n"
         f"Tour de {first_player.mention}.\n"
-        "Utilisez `!r A1` pour révéler, `!f A1` pour poser un drapeau.\n"
+        "Utilisez `!r A1` pour révéler, `!f A1` pour poser un drapeau."
     )
-
-    board_text = new_game.print_board_text()
-    bombs_left = new_game.bomb_count - new_game.count_all_flags()
-    await send_map_in_chunks(ctx, board_text, bombs_left)
+    if large:
+        intro += f"\nCarte {rows}x{cols} ({new_game.bomb_count} bombes) : `!view B12` pour déplacer la vue."
+    await show_board(ctx, data, before=intro)
+    await game_store.save(channel_id, data)
+    arm_timers(ctx.channel, data)
 
 
 @bot.command(name="r")
-async def reveal_command(ctx: Context, case: str):
-    channel_id = ctx.channel.id
-    if channel_id not in games_in_progress:
-        await ctx.send("Aucune partie en cours ici.")
+async def reveal_command(ctx: Context, *cases: str):
+    """
+    !r A1 - Révèle une case. !r A1 B2 C3 : essaie les cases dans l'ordre
+    jusqu'au premier coup joué.
+    """
+    if admit_move(ctx):
+        await play_moves(ctx, "r", cases)
+
+@bot.command(name="f")
+async def flag_command(ctx: Context, *cases: str):
+    """
+    !f A1 - Pose un drapeau. !f A1 B2 : comme !r, plusieurs cases possibles.
+    """
+    if admit_move(ctx):
+        await play_moves(ctx, "f", cases)
+
+@channel_actors.serialized
+async def play_moves(ctx: Context, kind: str, cases: tuple[str, ...]):
+    """
+    Joue les coups d'un même message dans l'ordre, tant que c'est le tour de
+    son auteur : un coup refusé (case déjà révélée...) laisse la main au
+    suivant, un coup joué passe le tour et les cases restantes sont ignorées.
+    """
+    if not cases:
+        outbound.post(ctx.channel, f"Précisez une case, par exemple `!{kind} A1`.")
         return
+    move = reveal_move if kind == "r" else flag_move
+    # Coups refusés du message, envoyés en une seule réponse : (case, raison)
+    refusals: list[tuple[str, str]] = []
+    skipped = ()
+    for i, case in enumerate(cases[:MAX_BATCH_MOVES]):
+        if await move(ctx, case, refusals):
+            skipped = cases[i + 1:]
+            break
+    lines = []
+    if len(refusals) == 1 and len(cases) == 1:
+        lines.append(refusals[0][1])
+    else:
+        by_reason: dict[str, list[str]] = {}
+        for case, reason in refusals:
+            by_reason.setdefault(reason, []).append(case)
+        lines.extend(f"{' '.join(refused)} : {reason}" for reason, refused in by_reason.items())
+    if skipped:
+        lines.append(f"Cases ignorées (le tour est passé) : {' '.join(skipped)}.")
+    if lines:
+        outbound.post(ctx.channel, "\n".join(lines))
+
+async def reveal_move(ctx: Context, case: str, refusals: list[tuple[str, str]]) -> bool:
+    """
+    Retourne True si le coup a été joué (tour passé ou partie finie) ; sinon
+    la raison du refus est ajoutée à refusals.
+    """
+    channel_id = ctx.channel.id
+    data = await load_game(ctx)
+    if data is None:
+        outbound.post(ctx.channel, "Aucune partie en cours ici.")
+        return True
 
-    data = games_in_progress[channel_id]
     game = data["game"]
     
     error_msg, row, col = validate_move(ctx, data, case)
     if error_msg or row is None or col is None:
         if error_msg:
-            await ctx.send(error_msg)
-        return
+            refusals.append((case, error_msg))
+        return False
     
-    cell = game.board[(row, col)]
-    action_msg = f"{ctx.author.mention} a révélé la case {case}."
-
-    # 1) Case drapeau adverse ?
-    if cell["status"] == "flagged":
-        if cell["flag_owner"] == ctx.author.id:
-            await ctx.send("Coup interdit (c'est TON propre drapeau). Réessayez.")
-            return
+    if game.no_guess and not game.first_click_done:
+        seed = layout_pool.seed_for(game.size, game.bomb_count, row, col)
+        if seed is not None:
+            # Graine d'une grille vérifiée pour ce premier clic (l'ordre des tours est déjà tiré)
+            game.seed = seed
         else:
-            # On révèle un drapeau adverse
-            cell["status"] = "revealed"
-            bomb_clicked = (cell["value"] == 'b')
-            if bomb_clicked:
-                await ctx.send(f"{action_msg}\n💥 Bombe sous le drapeau ! {ctx.author.mention} est éliminé.")
-                remove_player_from_game(data, ctx.author)
-            else:
-                owner_id = cell["flag_owner"]
-                loser_member = find_member_by_id(data["turn_order"], owner_id)
-                if loser_member:
-                    await ctx.send(f"{action_msg}\nDrapeau sans bombe ! {loser_member.mention} est éliminé.")
-                    remove_player_from_game(data, loser_member)
-                else:
-                    await ctx.send(f"{action_msg}\nDrapeau orphelin ? Personne n'est éliminé.")
-
-            ended, scenario = await check_end_game(data)
-            if ended:
-                await handle_end_of_game(ctx, data, row, col, bomb_clicked=bomb_clicked, safe_flag_clicked=(not bomb_clicked), scenario=scenario)
-                return
-
-            await display_map_in_chunks(ctx, game)
-            data["current_player_index"] %= len(data["turn_order"])
-            next_player = data["turn_order"][data["current_player_index"]]
-            await ctx.send(f"Tour de {next_player.mention}.")
-            return
-
-    # 2) Révélation classique
-    result_msg = game.reveal_case(row, col)
-    if ("Impossible" in result_msg) or ("déjà révélée" in result_msg):
-        await ctx.send(result_msg + " Réessayez.")
-        await display_map_in_chunks(ctx, game)
-        return
-
-    bomb_clicked = ("BOOM" in result_msg)
-    await ctx.send(f"{action_msg}\n{result_msg}")
-
-    if bomb_clicked:
-        await ctx.send(f"{ctx.author.mention} est éliminé !")
-        remove_player_from_game(data, ctx.author)
-
-    ended, scenario = await check_end_game(data)
-    if ended:
+            outbound.post(ctx.channel, "Aucune grille sans hasard prête pour ce premier clic : cette partie se joue sur une grille ordinaire.")
+
+    outcome = await play_reveal(channel_id, data, ctx.author, row, col)
+    if outcome.refused:
+        refusals.append((case, outcome.refused + " Réessayez."))
+        return False
+
+    action_text = f"{ctx.author.mention} a révélé la case {case}."
+    if not outcome.flag_revealed:
+        action_text += f"\n{outcome.message}"
+        if outcome.bomb_clicked:
+            action_text += f"\n{ctx.author.mention} est éliminé !"
+    elif outcome.bomb_clicked:
+        action_text += f"\n💥 Bombe sous le drapeau ! {ctx.author.mention} est éliminé."
+    elif outcome.eliminated:
+        action_text += f"\nDrapeau sans bombe ! {outcome.eliminated[0][0].mention} est éliminé."
+    else:
+        action_text += "\nDrapeau orphelin ? Personne n'est éliminé."
+
+    if outcome.ended:
         await handle_end_of_game(ctx, data, row, col,
-                                 bomb_clicked=bomb_clicked,
-                                 safe_flag_clicked=(not bomb_clicked),
-                                 scenario=scenario)
-        return
-        
-    await display_map_in_chunks(ctx, game)
-    await pass_to_next_player(ctx, data)
+                                 bomb_clicked=outcome.bomb_clicked,
+                                 safe_flag_clicked=(not outcome.bomb_clicked),
+                                 scenario=outcome.scenario,
+                                 action_text=action_text)
+        return True
 
+    next_player = data["turn_order"][data["current_player_index"]]
+    await show_board(ctx, data, before=action_text, after=f"Tour de {next_player.mention}.")
+    await game_store.save(channel_id, data)
+    arm_timers(ctx.channel, data)
+    return True
 
-@bot.command(name="f")
-async def flag_command(ctx: Context, case: str):
+
+async def flag_move(ctx: Context, case: str, refusals: list[tuple[str, str]]) -> bool:
+    """
+    Retourne True si le drapeau a été posé (tour passé ou partie finie) ;
+    sinon la raison du refus est ajoutée à refusals.
+    """
     channel_id = ctx.channel.id
-    if channel_id not in games_in_progress:
-        await ctx.send("Pas de partie en cours.")
-        return
+    data = await load_game(ctx)
+    if data is None:
+        outbound.post(ctx.channel, "Pas de partie en cours.")
+        return True
 
-    data = games_in_progress[channel_id]
-    game = data["game"]
-    
     error_msg, row, col = validate_move(ctx, data, case, is_flag=True)
     if error_msg:
-        await ctx.send(error_msg)
-        return
+        refusals.append((case, error_msg))
+        return False
 
-    msg = game.flag_case(row, col, ctx.author.id)
-    if "Impossible" in msg or "déjà révélée" in msg or "hors de la grille" in msg:
-        await ctx.send(msg + " (coup interdit, rejouez).")
-        await display_map_in_chunks(ctx, game)
-        return
-    
-    ended, scenario = await check_end_game(data)
-    if ended:
+    outcome = await play_flag(channel_id, data, ctx.author, row, col)
+    if outcome.refused:
+        refusals.append((case, outcome.refused + " (coup interdit, rejouez)."))
+        return False
+
+    if outcome.ended:
         await handle_end_of_game(ctx, data, row, col,
                                  bomb_clicked=False,
                                  safe_flag_clicked=False,
-                                 scenario=scenario)
+                                 scenario=outcome.scenario)
+        return True
+
+    next_player = data["turn_order"][data["current_player_index"]]
+    await show_board(ctx, data, before=f"{ctx.author.mention} : {outcome.message}", after=f"Tour de {next_player.mention}.")
+    await game_store.save(channel_id, data)
+    arm_timers(ctx.channel, data)
+    return True
+
+@bot.command(name="hint")
+@channel_actors.serialized
+async def hint_command(ctx: Context):
+    """
+    !hint - Propose la case la plus sûre à révéler (visible par tout le salon).
+    """
+    data = await load_game(ctx)
+    if data is None:
+        outbound.post(ctx.channel, "Aucune partie en cours ici.")
+        return
+    game = data["game"]
+    if not game.first_click_done:
+        outbound.post(ctx.channel, "Révélez d'abord une case : aucune ne peut être une bombe au premier coup.")
         return
 
-    await ctx.send(f"{ctx.author.mention} : {msg}")
-    await display_map_in_chunks(ctx, game)
-    await pass_to_next_player(ctx, data)
+    idx, probability, result = await game_executor.run(ctx.channel.id, game, suggest, game, HINT_BUDGET)
+    if idx is None:
+        outbound.post(ctx.channel, "Aucune case à proposer.")
+        return
+    r, c = divmod(idx, game.cols)
+    case = f"{column_label(c)}{r + 1}"
+    if probability == 0:
+        hint = f"💡 {case} est sûre."
+    else:
+        hint = f"💡 Aucune case sûre : {case} est la moins risquée (~{probability:.0%} de bombe)."
+    if result.mines:
+        hint += f" {len(result.mines)} bombe(s) déjà déduite(s)."
+    if not result.complete:
+        hint += " (analyse partielle)"
+    outbound.post(ctx.channel, hint)
+
+@bot.command(name="view")
+@channel_actors.serialized
+async def view_command(ctx: Context, case: str):
+    """
+    !view B12 - Centre la fenêtre d'une grande carte sur la case donnée.
+    """
+    data = await load_game(ctx)
+    if data is None:
+        outbound.post(ctx.channel, "Aucune partie en cours ici.")
+        return
+    game = data["game"]
+    if not isinstance(game, LargeMinesweeperGame):
+        outbound.post(ctx.channel, "La carte est déjà affichée en entier.")
+        return
+    row, col = convert_case_to_coords(case)
+    if not game.is_valid_coords(row, col):
+        outbound.post(ctx.channel, "Case hors de la grille.")
+        return
+    game.view = (row, col)
+    next_player = data["turn_order"][data["current_player_index"]]
+    await show_board(ctx, data, before=f"Vue centrée sur {case.upper()}.", after=f"Tour de {next_player.mention}.")
 
-async def handle_end_of_game(ctx: Context, data: GameData, row, col, bomb_clicked, safe_flag_clicked, scenario):
+async def handle_end_of_game(ctx: Context, data: GameData, row, col, bomb_clicked, safe_flag_clicked, scenario, action_text: Optional[str] = None):
     """
     Gère la fin de partie en affichant la map et le classement.
+    action_text (le résultat du dernier coup) est envoyé dans le même message que le titre.
     """
     game = data["game"]
     bomb_count = game.bomb_count
 
-    final_msg = await finalize_and_rank(data, scenario=scenario,
-                                        last_click=(row, col),
+    disarm_timers(ctx.channel.id)
+    final_msg = await finalize_and_rank(ctx.channel.id, data, scenario=scenario,
+                                        last_click=(row, col) if row is not None else None,
                                         bomb_clicked=bomb_clicked,
                                         safe_flag_clicked=safe_flag_clicked)
     
-    await ctx.send(final_msg[0])
-    await send_map_in_chunks(ctx, final_msg[1], bomb_count)
-    await ctx.send(final_msg[2])
+    title = final_msg[0] if action_text is None else f"{action_text}\n{final_msg[0]}"
+    await show_board(ctx, data, before=title, after="\n".join(final_msg[2:]), bombs_left=bomb_count)
 
-    games_in_progress.pop(ctx.channel.id, None)
+    # En mémoire seulement : l'écriture se fait par lots, hors de ce chemin
+    game_history.record(ctx.guild.id if ctx.guild else None, ctx.channel.id, data, scenario)
+    await game_store.remove(ctx.channel.id)
+    admission.release(ctx.channel.id)
+    image_renderer.forget(ctx.channel.id)
+    game_executor.forget(ctx.channel.id)
 
 
 if __name__ == "__main__":
-    bot.run(DISCORD_TOKEN)
\ No newline at end of file
+    try:
+        bot.run(DISCORD_TOKEN)
+    finally:
+        game_store.close()
+        game_history.close()
\ No newline at end of file
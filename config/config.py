@@ -1,7 +1,13 @@
+import os
 import yaml
 
+# Chemin du fichier de configuration, modifiable par variable d'environnement
+# (utile pour les benchmarks ou plusieurs instances sur une même machine)
+CONFIG_PATH_ENV = "BOOMBOT_CONFIG"
+
 class Config:
-    def __init__(self, config_path="config/config.yml"):
+    def __init__(self, config_path=None):
+        config_path = config_path or os.environ.get(CONFIG_PATH_ENV, "config/config.yml")
         with open(config_path, "r") as file:
             self.config = yaml.safe_load(file)
 
@@ -13,4 +19,4 @@ class Config:
                 value = value[k]
         except KeyError:
             return default
-        return value
\ No newline at end of file
+        return value
@@ -0,0 +1,250 @@
+import asyncio
+import time
+from collections import deque
+from io import BytesIO
+from typing import Optional
+from discord import File
+from discord.errors import HTTPException
+from metrics import metrics
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+class RouteBucket:
+    """
+    Seau à jetons d'une route Discord (envoi ou édition dans un salon).
+    Discord autorise environ 5 messages par 5 secondes et par salon : on
+    espace les appels nous-mêmes plutôt que d'attendre les 429.
+    """
+    __slots__ = ("capacity", "per", "tokens", "updated", "blocked_until")
+
+    def __init__(self, capacity: int = 5, per: float = 5.0):
+        self.capacity = capacity
+        self.per = per
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self) -> float:
+        """
+        Temps à attendre avant le prochain appel sur cette route.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / self.per)
+        self.updated = now
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) * self.per / self.capacity)
+        return wait
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def idle(self, now: float) -> bool:
+        """
+        Seau revenu plein et sans blocage : l'oublier ne change rien au débit.
+        """
+        return now >= self.blocked_until and self.tokens + (now - self.updated) * self.capacity / self.per >= self.capacity
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class Outgoing:
+    __slots__ = ("kind", "channel", "content", "message_id", "mergeable", "attachment", "future", "enqueued_at")
+
+    def __init__(self, kind, channel, content, message_id=None, mergeable=True, attachment=None):
+        self.kind = kind
+        self.channel = channel
+        self.content = content
+        self.message_id = message_id
+        self.mergeable = mergeable and attachment is None
+        self.attachment = attachment
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+class OutboundDispatcher:
+    """
+    File d'envoi par salon entre les commandes du jeu et Discord.
+    - les messages postés dans une courte fenêtre sont regroupés, et les textes
+      adjacents fusionnés jusqu'à la limite de 2000 caractères ;
+    - les éditions successives d'un même message ne gardent que la dernière ;
+    - chaque route (envoi / édition par salon) a son seau de débit, et les 429
+      sont réessayés avec un recul exponentiel.
+    """
+
+    def __init__(self, window: float = 0.05, limit: int = DISCORD_MESSAGE_LIMIT, max_retries: int = 5, backoff: float = 1.0,
+                 rate: int = 5, per: float = 5.0):
+        self.window = window
+        self.rate = rate
+        self.per = per
+        self.limit = limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.queues: dict[int, deque[Outgoing]] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+        self.buckets: dict[tuple[str, int], RouteBucket] = {}
+        # Taille à partir de laquelle les seaux des salons inactifs sont purgés
+        self.bucket_sweep_at = 1024
+        self.latencies: deque[float] = deque(maxlen=1000)
+        self.counters = {"sent": 0, "edited": 0, "merged": 0, "rate_limited": 0, "failed": 0}
+
+    def send(self, channel, content: Optional[str], mergeable: bool = True, attachment: Optional[tuple[str, bytes]] = None) -> asyncio.Future:
+        """
+        Met un message en file ; le futur renvoie le discord.Message créé
+        (partagé par les messages fusionnés ensemble).
+        attachment est un couple (nom de fichier, contenu) joint au message.
+        """
+        return self._enqueue(Outgoing("send", channel, content, mergeable=mergeable, attachment=attachment))
+
+    def edit(self, channel, message_id: int, content: Optional[str], attachment: Optional[tuple[str, bytes]] = None) -> asyncio.Future:
+        """
+        Édite un message ; avec attachment, la pièce jointe est remplacée.
+        """
+        return self._enqueue(Outgoing("edit", channel, content, message_id=message_id, mergeable=False, attachment=attachment))
+
+    def post(self, channel, content: str) -> asyncio.Future:
+        """
+        Comme send, pour les messages dont on n'attend pas le résultat :
+        les erreurs sont journalisées au lieu d'être perdues.
+        """
+        future = self.send(channel, content)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def _enqueue(self, item: Outgoing) -> asyncio.Future:
+        channel_id = item.channel.id
+        self.queues.setdefault(channel_id, deque()).append(item)
+        worker = self.workers.get(channel_id)
+        if worker is None or worker.done():
+            self.workers[channel_id] = asyncio.create_task(self._drain(channel_id))
+        return item.future
+
+    async def _drain(self, channel_id: int) -> None:
+        queue = self.queues[channel_id]
+        try:
+            while queue:
+                if self.window:
+                    await asyncio.sleep(self.window)
+                while queue:
+                    batch = self._next_batch(queue)
+                    await self._execute(batch)
+        finally:
+            if not queue:
+                self.queues.pop(channel_id, None)
+                self.workers.pop(channel_id, None)
+                if len(self.buckets) >= self.bucket_sweep_at:
+                    self._sweep_buckets()
+
+    def _sweep_buckets(self) -> None:
+        # Purge paresseuse : seuil doublé après chaque passage, coût amorti constant
+        now = time.monotonic()
+        for key in [key for key, bucket in self.buckets.items() if key[1] not in self.workers and bucket.idle(now)]:
+            del self.buckets[key]
+        self.bucket_sweep_at = max(1024, 2 * len(self.buckets))
+
+    def _next_batch(self, queue: deque[Outgoing]) -> list[Outgoing]:
+        first = queue.popleft()
+        batch = [first]
+        if first.kind == "edit":
+            # Seule la dernière édition d'un même message compte
+            while queue and queue[0].kind == "edit" and queue[0].message_id == first.message_id:
+                batch.append(queue.popleft())
+            return batch
+        if not first.mergeable:
+            return batch
+        length = len(first.content)
+        while queue and queue[0].kind == "send" and queue[0].mergeable:
+            extra = len(queue[0].content) + 1
+            if length + extra > self.limit:
+                break
+            length += extra
+            batch.append(queue.popleft())
+        return batch
+
+    async def _execute(self, batch: list[Outgoing]) -> None:
+        head = batch[-1] if batch[0].kind == "edit" else batch[0]
+        bucket = self.buckets.setdefault((head.kind, head.channel.id), RouteBucket(self.rate, self.per))
+        content = head.content if len(batch) == 1 or head.kind == "edit" else "\n".join(item.content for item in batch)
+
+        for attempt in range(self.max_retries + 1):
+            wait = bucket.delay()
+            if wait:
+                await asyncio.sleep(wait)
+            bucket.consume()
+            started = time.perf_counter()
+            try:
+                if head.kind == "edit":
+                    message = head.channel.get_partial_message(head.message_id)
+                    if head.attachment is None:
+                        result = await message.edit(content=content)
+                    else:
+                        result = await message.edit(content=content, attachments=[_as_file(head.attachment)])
+                    self.counters["edited"] += 1
+                elif head.attachment is not None:
+                    result = await head.channel.send(content, file=_as_file(head.attachment))
+                    self.counters["sent"] += 1
+                else:
+                    result = await head.channel.send(content)
+                    self.counters["sent"] += 1
+                    self.counters["merged"] += len(batch) - 1
+                if metrics.enabled:
+                    metrics.observe(f"discord_{head.kind}", time.perf_counter() - started)
+                break
+            except HTTPException as e:
+                if e.status != 429 or attempt == self.max_retries:
+                    self._fail(batch, e)
+                    return
+                self.counters["rate_limited"] += 1
+                bucket.block(_retry_after(e) or self.backoff * 2 ** attempt)
+            except Exception as e:
+                self._fail(batch, e)
+                return
+
+        now = time.monotonic()
+        for item in batch:
+            self.latencies.append(now - item.enqueued_at)
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def _fail(self, batch: list[Outgoing], error: Exception) -> None:
+        self.counters["failed"] += 1
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(error)
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+        return {
+            "queue_depth": self.queue_depth(),
+            "active_channels": len(self.workers),
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+            **self.counters,
+        }
+
+def _as_file(attachment: tuple[str, bytes]) -> File:
+    # Un discord.File ne se relit pas : on en recrée un à chaque tentative
+    filename, data = attachment
+    return File(BytesIO(data), filename=filename)
+
+def _retry_after(e: HTTPException) -> Optional[float]:
+    retry_after = getattr(e, "retry_after", None)
+    if retry_after is None and getattr(e, "response", None) is not None:
+        retry_after = e.response.headers.get("Retry-After")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except ValueError:
+        return None
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Échec d'envoi d'un message : {future.exception()}")
+
+outbound = OutboundDispatcher()
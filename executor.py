@@ -0,0 +1,118 @@
+"""
+Exécution des opérations de jeu hors de la boucle d'événements.
+
+Une propagation sur une grande carte, son rendu ou sa fin de partie peuvent
+prendre des dizaines de millisecondes : exécutées dans la boucle, elles
+retardent le heartbeat de la passerelle et les commandes de tous les autres
+salons. GameExecutor envoie les opérations des parties coûteuses (au moins
+heavy_cells cases) dans un pool de threads ; celles des petites grilles
+restent dans la boucle, où elles coûtent moins qu'un aller-retour de thread.
+Le code du jeu est en Python pur : le thread rend la main à la boucle à
+chaque intervalle de bascule du GIL (5 ms), et un seul thread suffit ;
+davantage ne ferait que disputer le GIL à la boucle.
+
+Chaque salon a son travailleur : une file d'opérations exécutées une à une
+et dans l'ordre d'arrivée, jamais deux à la fois sur la même partie. Les
+salons différents avancent en parallèle. Le travailleur s'arrête quand sa
+file est vide, comme ceux de la file d'envoi (dispatcher.py), et forget le
+retire dès que la partie du salon est supprimée.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from metrics import metrics
+
+class GameJob:
+    __slots__ = ("func", "args", "kwargs", "future")
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = asyncio.get_running_loop().create_future()
+
+class GameExecutor:
+    def __init__(self, heavy_cells: int = 1024, threads: int = 1):
+        self.heavy_cells = heavy_cells
+        self.threads = threads
+        self.pool: Optional[ThreadPoolExecutor] = None
+        # Files et travailleurs par salon
+        self.queues: dict[int, deque[GameJob]] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+        self.counters = {"inline": 0, "offloaded": 0}
+
+    def is_heavy(self, game) -> bool:
+        return game.rows * game.cols >= self.heavy_cells
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="game")
+        return self.pool
+
+    async def run(self, channel_id: int, game, func: Callable, *args, **kwargs):
+        """
+        Exécute func(*args, **kwargs) pour la partie du salon et retourne son
+        résultat. Petite partie sans opération en attente : appel direct, sans
+        détour.
+        """
+        if not self.is_heavy(game) and channel_id not in self.workers:
+            self.counters["inline"] += 1
+            return func(*args, **kwargs)
+        job = GameJob(func, args, kwargs)
+        self.queues.setdefault(channel_id, deque()).append(job)
+        if channel_id not in self.workers:
+            self.workers[channel_id] = asyncio.create_task(self._drain(channel_id, self.is_heavy(game)))
+        return await job.future
+
+    def forget(self, channel_id: int) -> None:
+        """
+        Partie supprimée : les opérations encore en file sont annulées et le
+        travailleur du salon est retiré. Celle en cours d'exécution se termine.
+        """
+        queue = self.queues.pop(channel_id, None)
+        self.workers.pop(channel_id, None)
+        while queue:
+            job = queue.popleft()
+            if not job.future.done():
+                job.future.cancel()
+
+    async def _drain(self, key: int, heavy: bool) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self.queues[key]
+        task = asyncio.current_task()
+        try:
+            while queue:
+                job = queue.popleft()
+                start = loop.time()
+                try:
+                    if heavy:
+                        self.counters["offloaded"] += 1
+                        result = await loop.run_in_executor(self._pool(), lambda: job.func(*job.args, **job.kwargs))
+                    else:
+                        self.counters["inline"] += 1
+                        result = job.func(*job.args, **job.kwargs)
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+                if metrics.enabled and heavy:
+                    metrics.observe("offload", loop.time() - start)
+        finally:
+            # Après forget, le salon peut déjà avoir un nouveau travailleur
+            if self.queues.get(key) is queue:
+                del self.queues[key]
+            if self.workers.get(key) is task:
+                del self.workers[key]
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def shutdown(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+game_executor = GameExecutor()
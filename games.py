@@ -1,119 +1,414 @@
 import random
+import struct
+import sys
 from collections import deque
+from collections.abc import Mapping
+from functools import lru_cache
 from typing import TypedDict
 from emojis import EMOJI_CASES, EMOJI_LINES, EMOJI_HEADER, EMOJIS_ENDGAME
+from metrics import timed
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel, on retombe sur le calcul Python pur
+    np = None
+
+# Plan "status" : un octet par case
+HIDDEN, REVEALED, FLAGGED = 0, 1, 2
+STATUS_NAMES = ("hidden", "revealed", "flagged")
+
+# Plan "value" : 0-8 = nombre de bombes voisines, puis les valeurs spéciales
+BOMB, BOMB_E, FLAG_E = 9, 10, 11
+SPECIAL_VALUES = {BOMB: 'b', BOMB_E: 'bomb_e', FLAG_E: 'flag_e'}
+
+DIRECTIONS = (
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1),           (0, 1),
+    (1, -1),  (1, 0),  (1, 1)
+)
+
+# Journal des coups : un enregistrement de taille fixe par coup
+# (type, ligne, colonne, id du joueur ; 0 si sans objet)
+MOVE_REVEAL, MOVE_FLAG, MOVE_REVEAL_FLAGGED, MOVE_ELIMINATE = 1, 2, 3, 4
+MOVE_RECORD = struct.Struct("<BHHQ")
+
+# Les 8 symétries du carré, (r, c) -> (r', c') pour une grille de côté n
+SYMMETRIES = (
+    lambda r, c, n: (r, c),
+    lambda r, c, n: (c, n - 1 - r),
+    lambda r, c, n: (n - 1 - r, n - 1 - c),
+    lambda r, c, n: (n - 1 - c, r),
+    lambda r, c, n: (r, n - 1 - c),
+    lambda r, c, n: (n - 1 - r, c),
+    lambda r, c, n: (c, r),
+    lambda r, c, n: (n - 1 - c, n - 1 - r),
+)
+# Symétrie inverse de chacune
+INVERSE_SYMMETRIES = (0, 3, 2, 1, 4, 5, 6, 7)
+
+def canonical_click(size: int, r: int, c: int) -> tuple[tuple[int, int], int]:
+    """
+    Représentant du premier clic parmi ses images par symétrie, et l'index de
+    la symétrie qui y mène. Deux clics symétriques partagent les mêmes grilles.
+    """
+    return min((SYMMETRIES[k](r, c, size), k) for k in range(len(SYMMETRIES)))
+
+# En dessous de ce nombre de cases, numpy coûte plus cher qu'il ne rapporte
+NUMPY_MIN_CELLS = 400
+
+@lru_cache(maxsize=32)
+def neighbour_table(size: int) -> tuple[tuple[int, ...], ...]:
+    """
+    Pour chaque index r*size+c, le tuple des index de ses voisins dans la grille.
+    Calculé une seule fois par taille et partagé entre toutes les parties.
+    """
+    table = []
+    for r in range(size):
+        for c in range(size):
+            table.append(tuple(
+                (r + dr) * size + (c + dc)
+                for dr, dc in DIRECTIONS
+                if 0 <= r + dr < size and 0 <= c + dc < size
+            ))
+    return tuple(table)
+
+def adjacent_counts_numpy(size: int, bomb_indices) -> bytearray:
+    """
+    Calcule tout le plan "value" d'un coup : somme des 8 décalages de la
+    grille des bombes (convolution 3x3 sans le centre).
+    """
+    mines = np.zeros(size * size, dtype=np.uint8)
+    mines[np.fromiter(bomb_indices, dtype=np.intp)] = 1
+    grid = mines.reshape(size, size)
+    padded = np.pad(grid, 1)
+    counts = np.zeros((size, size), dtype=np.uint8)
+    for dr, dc in DIRECTIONS:
+        counts += padded[1 + dr:1 + dr + size, 1 + dc:1 + dc + size]
+    counts[grid == 1] = BOMB
+    return bytearray(counts.tobytes())
+
+def adjacent_counts_python(size: int, bomb_indices) -> bytearray:
+    """
+    Même calcul en Python pur : chaque bombe incrémente ses voisins.
+    """
+    neighbours = neighbour_table(size)
+    values = bytearray(size * size)
+    for idx in bomb_indices:
+        for n in neighbours[idx]:
+            values[n] += 1
+    for idx in bomb_indices:
+        values[idx] = BOMB
+    return values
+
+class CellView(Mapping):
+    """
+    Vue en lecture seule d'une case, compatible avec l'ancien format
+    {"value": ..., "status": ..., "flag_owner": ...}.
+    """
+    __slots__ = ("_game", "_idx")
+    _KEYS = ("value", "status", "flag_owner")
+
+    def __init__(self, game: "MinesweeperGame", idx: int):
+        self._game = game
+        self._idx = idx
+
+    def __getitem__(self, key):
+        if key == "value":
+            return self._game.cell_value(self._idx)
+        if key == "status":
+            return STATUS_NAMES[self._game.status[self._idx]]
+        if key == "flag_owner":
+            return self._game.flag_owner_of(self._idx)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+class BoardView(Mapping):
+    """
+    Vue en lecture seule de la grille indexée par (r, c), pour garder
+    l'accès historique game.board[(row, col)].
+    """
+    __slots__ = ("_game",)
+
+    def __init__(self, game: "MinesweeperGame"):
+        self._game = game
+
+    def __getitem__(self, coords):
+        r, c = coords
+        if not self._game.is_valid_coords(r, c):
+            raise KeyError(coords)
+        return CellView(self._game, r * self._game.cols + c)
+
+    def __iter__(self):
+        rows, cols = self._game.rows, self._game.cols
+        return ((r, c) for r in range(rows) for c in range(cols))
+
+    def __len__(self):
+        return self._game.rows * self._game.cols
+
+def _cell_emoji_table() -> tuple[tuple[str, ...], ...]:
+    """
+    Table [status][value] -> emoji, pour éviter les tests en cascade par case.
+    """
+    revealed = [EMOJI_CASES.get(str(v), "?") for v in range(BOMB)]
+    revealed += [EMOJI_CASES["bomb"], EMOJIS_ENDGAME[3], EMOJIS_ENDGAME[2]]
+    flagged = [EMOJI_CASES["flag"]] * (FLAG_E + 1)
+    flagged[FLAG_E] = EMOJIS_ENDGAME[2]
+    hidden = [EMOJI_CASES["hidden"]] * (FLAG_E + 1)
+    return tuple(hidden), tuple(revealed), tuple(flagged)
+
+CELL_EMOJIS = _cell_emoji_table()
+# Coin de la carte selon la fin de partie
+ENDGAME_CORNERS = {"one_left": EMOJIS_ENDGAME[0], "all_solved": EMOJIS_ENDGAME[1]}
+
+class BoardRenderer:
+    """
+    Rendu emoji de la grille avec une chaîne en cache par ligne.
+    Le jeu marque les lignes modifiées ; seules celles-ci sont recalculées.
+    """
+    __slots__ = ("game", "row_prefixes", "rows", "dirty", "header_text")
+
+    def __init__(self, game: "MinesweeperGame"):
+        self.game = game
+        self.row_prefixes = [EMOJI_LINES[r+1] for r in range(game.size)]
+        self.rows: list = [None] * game.size
+        self.dirty = set(range(game.size))
+        self.header_text = None
+
+    @property
+    def width(self) -> int:
+        return self.game.size
+
+    def mark_dirty(self, r) -> None:
+        self.dirty.add(r)
+
+    def mark_all_dirty(self) -> None:
+        self.dirty.update(range(self.game.size))
+        self.header_text = None
+
+    def render_row(self, r) -> str:
+        game = self.game
+        size = game.size
+        status, values = game.status, game.values
+        return self.row_prefixes[r] + "".join(
+            CELL_EMOJIS[status[idx]][values[idx]]
+            for idx in range(r * size, (r + 1) * size)
+        )
+
+    @timed("render")
+    def render_lines(self) -> list[str]:
+        if self.header_text is None:
+            self.header_text = "".join(self.game.header)
+        for r in self.dirty:
+            self.rows[r] = self.render_row(r)
+        self.dirty.clear()
+        return [self.header_text, *self.rows]
+
+    def render(self) -> str:
+        return "\n".join(self.render_lines())
+
+    def window(self) -> tuple[int, int, int, int]:
+        size = self.game.size
+        return 0, 0, size, size
+
+    def window_planes(self) -> tuple[bytes, bytes]:
+        """
+        (status, values) des cases affichées, ligne par ligne.
+        """
+        return bytes(self.game.status), bytes(self.game.values)
 
 class MinesweeperGame:
-    def __init__(self, size=12, bomb_count=22):
+    def __init__(self, size=12, bomb_count=22, seed=None, no_guess=False):
         self.size = size
+        self.rows = self.cols = size
         self.bomb_count = bomb_count
-        self.board = {}
+        # La graine et la première case suffisent à retrouver la disposition des bombes
+        self.seed = random.getrandbits(64) if seed is None else seed
+        # Sans hasard : les bombes sont tirées autour du clic canonique (voir no_guess.py)
+        self.no_guess = no_guess
+        self.values = bytearray()
+        self.status = bytearray()
+        self.flag_owners = bytearray()
+        self.owner_ids: list = []
+        self.safe_cells_done = 0
+        self.flag_total = 0
+        self.correct_flags: dict = {}
+        self.board = BoardView(self)
         self.first_click_done = False
+        self.header = self.new_header()
+        self.renderer = self.new_renderer()
+        # Journal des coups, en ajout seul : graine + journal suffisent à rejouer la partie
+        self.move_log = bytearray()
         self.initialize_board()
-        self.header = [EMOJI_HEADER[i] for i in range(self.size + 1)]
+
+    def new_header(self) -> list[str]:
+        return [EMOJI_HEADER[i] for i in range(self.size + 1)]
+
+    def new_renderer(self):
+        return BoardRenderer(self)
 
     def initialize_board(self) -> None:
-        self.board = {
-            (r, c): {
-                "value": 0,
-                "status": "hidden",
-                "flag_owner": None
-            }
-            for r in range(self.size)
-            for c in range(self.size)
-        }
+        """
+        La grille est stockée en trois plans plats indexés par r*size+c :
+        valeur, statut, et propriétaire du drapeau (index dans owner_ids, 0 = aucun).
+        Les compteurs (cases sûres traitées, drapeaux, drapeaux corrects par joueur)
+        sont tenus à jour à chaque coup pour éviter de rescanner la grille.
+        """
+        cells = self.size * self.size
+        self.values = bytearray(cells)
+        self.status = bytearray(cells)
+        self.flag_owners = bytearray(cells)
+        self.owner_ids = []
+        self.safe_cells_done = 0
+        self.flag_total = 0
+        self.correct_flags = {}
+        self.renderer.mark_all_dirty()
+
+    def blank_copy(self) -> "MinesweeperGame":
+        """
+        Partie neuve avec les mêmes paramètres et la même graine (pour rejouer le journal).
+        """
+        return type(self)(size=self.size, bomb_count=self.bomb_count, seed=self.seed, no_guess=self.no_guess)
+
+    def cell_value(self, idx: int):
+        v = self.values[idx]
+        return v if v < BOMB else SPECIAL_VALUES[v]
+
+    def flag_owner_of(self, idx: int):
+        owner = self.flag_owners[idx]
+        return self.owner_ids[owner - 1] if owner else None
+
+    def _owner_slot(self, user_id) -> int:
+        if user_id not in self.owner_ids:
+            self.owner_ids.append(user_id)
+        return self.owner_ids.index(user_id) + 1
+
+    def log_move(self, kind: int, r: int = 0, c: int = 0, player_id=None) -> None:
+        self.move_log += MOVE_RECORD.pack(kind, r, c, player_id or 0)
+
+    def moves(self):
+        """
+        Itère sur les coups joués : (type, ligne, colonne, id du joueur).
+        """
+        return MOVE_RECORD.iter_unpack(self.move_log)
+
+    @property
+    def move_count(self) -> int:
+        return len(self.move_log) // MOVE_RECORD.size
 
     def generate_bombs(self, first_click_coords) -> None:
-        excluded_coords = set()
-        directions = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1),           (0, 1),
-            (1, -1),  (1, 0),  (1, 1)
-        ]
-        excluded_coords.add(first_click_coords)
+        """
+        Tire bomb_count cases sans remise parmi celles autorisées (hors première
+        case et ses voisines), puis calcule tous les nombres en une passe.
+        """
         fr, fc = first_click_coords
-        for dr, dc in directions:
-            nr, nc = fr + dr, fc + dc
-            if 0 <= nr < self.size and 0 <= nc < self.size:
-                excluded_coords.add((nr, nc))
-
-        placed = 0
-        while placed < self.bomb_count:
-            r = random.randint(0, self.size - 1)
-            c = random.randint(0, self.size - 1)
-            if (r, c) not in excluded_coords and self.board[(r, c)]["value"] != 'b':
-                self.board[(r, c)]["value"] = 'b'
-                placed += 1
-
-        for (r, c), cell in self.board.items():
-            if cell["value"] != 'b':
-                cell["value"] = self.count_adjacent_bombs(r, c)
+        size = self.size
+        symmetry = 0
+        if self.no_guess:
+            (fr, fc), symmetry = canonical_click(size, fr, fc)
+        first = fr * size + fc
+        excluded = {first, *neighbour_table(size)[first]}
+        allowed = [idx for idx in range(size * size) if idx not in excluded]
+        bombs = random.Random(self.seed).sample(allowed, self.bomb_count)
+        if symmetry:
+            inverse = SYMMETRIES[INVERSE_SYMMETRIES[symmetry]]
+            bombs = [r * size + c for r, c in (inverse(*divmod(idx, size), size) for idx in bombs)]
+        self.place_bombs(bombs)
+
+    def place_bombs(self, bomb_indices) -> None:
+        if np is not None and self.size * self.size >= NUMPY_MIN_CELLS:
+            self.values = adjacent_counts_numpy(self.size, bomb_indices)
+        else:
+            self.values = adjacent_counts_python(self.size, bomb_indices)
+        self.renderer.mark_all_dirty()
 
     def count_adjacent_bombs(self, r, c) -> int:
-        directions = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1),           (0, 1),
-            (1, -1),  (1, 0),  (1, 1)
-        ]
-        cnt = 0
-        for dr, dc in directions:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < self.size and 0 <= nc < self.size:
-                if self.board[(nr, nc)]["value"] == 'b':
-                    cnt += 1
-        return cnt
+        values = self.values
+        return sum(1 for n in neighbour_table(self.size)[r * self.size + c] if values[n] == BOMB)
 
     def is_valid_coords(self, r, c) -> bool:
         return 0 <= r < self.size and 0 <= c < self.size
 
-    def reveal_case(self, r, c) -> str:
-        cell = self.board[(r, c)]
-        if cell["status"] == "revealed":
+    @timed("logic")
+    def reveal_case(self, r, c, player_id=None) -> str:
+        idx = r * self.size + c
+        if self.status[idx] == REVEALED:
             return "Cette case est déjà révélée."
-        if cell["status"] == "flagged":
+        if self.status[idx] == FLAGGED:
             return "Impossible de révéler une case déjà flaggée."
+        self.log_move(MOVE_REVEAL, r, c, player_id)
 
         if not self.first_click_done:
             self.first_click_done = True
             self.generate_bombs((r, c))
 
-        cell["status"] = "revealed"
-        if cell["value"] == 'b':
+        self.status[idx] = REVEALED
+        self.renderer.mark_dirty(r)
+        value = self.values[idx]
+        if value == BOMB:
             return "💥 BOOM! Bombe touchée."
-        if cell["value"] == 0:
+        self.safe_cells_done += 1
+        if value == 0:
             self.flood_reveal(r, c)
             return "Case vide. Révélation autour."
-        return f"La case contient {cell['value']}."
+        return f"La case contient {value}."
+
+    @timed("logic")
+    def reveal_flagged_case(self, r, c, player_id=None) -> None:
+        """
+        Révèle une case flaggée par un adversaire (le drapeau est retiré).
+        """
+        idx = r * self.size + c
+        if self.status[idx] == FLAGGED:
+            self.log_move(MOVE_REVEAL_FLAGGED, r, c, player_id)
+            self.status[idx] = REVEALED
+            self.renderer.mark_dirty(r)
+            self.flag_total -= 1
+            if self.values[idx] == BOMB:
+                owner_id = self.flag_owner_of(idx)
+                self.correct_flags[owner_id] -= 1
 
     def flood_reveal(self, sr, sc) -> None:
+        size = self.size
+        neighbours = neighbour_table(size)
+        values, status = self.values, self.status
+        dirty = self.renderer.dirty
+        revealed = 0
         queue = deque()
-        queue.append((sr, sc))
+        queue.append(sr * size + sc)
         while queue:
-            rr, cc = queue.popleft()
-            for dr, dc in [
-                (-1, -1), (-1, 0), (-1, 1),
-                (0, -1),           (0, 1),
-                (1, -1),  (1, 0),  (1, 1)
-            ]:
-                nr, nc = rr + dr, cc + dc
-                if self.is_valid_coords(nr, nc):
-                    neigh = self.board[(nr, nc)]
-                    if neigh["status"] == "hidden" and neigh["value"] != 'b':
-                        neigh["status"] = "revealed"
-                        if neigh["value"] == 0:
-                            queue.append((nr, nc))
+            for idx in neighbours[queue.popleft()]:
+                if status[idx] == HIDDEN and values[idx] != BOMB:
+                    status[idx] = REVEALED
+                    dirty.add(idx // size)
+                    revealed += 1
+                    if values[idx] == 0:
+                        queue.append(idx)
+        self.safe_cells_done += revealed
 
+    @timed("logic")
     def flag_case(self, r, c, user_id) -> str:
         if not self.is_valid_coords(r, c):
             return "La case est hors de la grille."
-        cell = self.board[(r, c)]
-        if cell["status"] == "revealed":
+        idx = r * self.size + c
+        if self.status[idx] == REVEALED:
             return "Cette case est déjà révélée, impossible de flag."
-        if cell["status"] == "flagged":
+        if self.status[idx] == FLAGGED:
             return "Impossible de retirer un drapeau (déjà flaggé)."
 
-        cell["status"] = "flagged"
-        cell["flag_owner"] = user_id
+        self.log_move(MOVE_FLAG, r, c, user_id)
+        self.status[idx] = FLAGGED
+        self.renderer.mark_dirty(r)
+        self.flag_owners[idx] = self._owner_slot(user_id)
+        self.flag_total += 1
+        if self.values[idx] == BOMB:
+            self.correct_flags[user_id] = self.correct_flags.get(user_id, 0) + 1
+        else:
+            self.safe_cells_done += 1
         return "Drapeau placé."
 
     def is_all_safe_revealed(self) -> bool:
@@ -121,31 +416,22 @@ class MinesweeperGame:
         True si toutes les cases non-bombes sont révélées ou flaggées
         ET le total de drapeaux n'excède pas le bomb_count.
         """
-        safe_ok = True
-        for cell in self.board.values():
-            if cell["value"] != 'b':
-                if cell["status"] not in ("revealed", "flagged"):
-                    safe_ok = False
-                    break
-
-        if self.count_all_flags() > self.bomb_count:
-            safe_ok = False
-        return safe_ok
+        safe_cells = self.size * self.size - self.bomb_count
+        return self.safe_cells_done >= safe_cells and self.flag_total <= self.bomb_count
 
     def reveal_all_bombs(self) -> None:
-        for v in self.board.values():
-            if v["value"] == 'b' and v["status"] != "flagged":
-                v["status"] = "revealed"
+        # Seules des bombes non flaggées passent de cachées à révélées :
+        # aucun compteur n'est affecté.
+        for idx, value in enumerate(self.values):
+            if value == BOMB and self.status[idx] != FLAGGED:
+                self.status[idx] = REVEALED
+                self.renderer.mark_dirty(idx // self.size)
 
     def count_all_flags(self) -> int:
-        return sum(1 for v in self.board.values() if v["status"] == "flagged")
+        return self.flag_total
 
     def count_flags_by_user(self, user_id) -> int:
-        cnt = 0
-        for v in self.board.values():
-            if v["status"] == "flagged" and v["flag_owner"] == user_id and v["value"] == 'b':
-                cnt += 1
-        return cnt
+        return self.correct_flags.get(user_id, 0)
 
     def finalize_endgame(self, scenario, last_click=None, bomb_clicked=False, safe_flag_clicked=False) -> str:
         """
@@ -153,63 +439,91 @@ class MinesweeperGame:
         - On remplace le header[0] selon scenario :
             * 'all_solved' => <:swag_boom:...>
             * 'one_left' => <:sad_boom:...>
+          (ValueError pour tout autre scenario, avant toute modification)
         - On révèle toutes les bombes
         - Si la partie s'achève sur un clic bombe => on remplace cette bombe par 'bomb_e'
         - Si la partie s'achève sur un clic drapeau sûr => 'flag_e'
         """
-        if scenario == "one_left":
-            self.header[0] = EMOJIS_ENDGAME[0]
-        elif scenario == "all_solved":
-            self.header[0] = EMOJIS_ENDGAME[1]
-        else:
-            print("Bug scenario ending")
+        corner = ENDGAME_CORNERS.get(scenario)
+        if corner is None:
+            raise ValueError(f"Fin de partie inconnue : {scenario!r}")
+        self.header[0] = corner
+        self.renderer.header_text = None
 
         self.reveal_all_bombs()
 
         if last_click is not None:
             (r, c) = last_click
-            cell = self.board.get((r,c))
-            if cell:
-                if bomb_clicked and cell["value"] == 'b':
-                    cell["value"] = 'bomb_e'
-                if safe_flag_clicked and cell["status"] == "revealed" and cell["value"] != 'b':
-                    cell["value"] = 'flag_e'
+            if self.is_valid_coords(r, c):
+                idx = r * self.size + c
+                if bomb_clicked and self.values[idx] == BOMB:
+                    self.values[idx] = BOMB_E
+                if safe_flag_clicked and self.status[idx] == REVEALED and self.values[idx] < BOMB:
+                    self.values[idx] = FLAG_E
+                self.renderer.mark_dirty(r)
 
         return self.print_board_text()
 
     def print_board_text(self) -> str:
-        lines = []
-
-        lines.append("".join(self.header))
-
-        for r in range(self.size):
-            row_parts = [EMOJI_LINES[r+1]]
-            for c in range(self.size):
-                cell = self.board[(r,c)]
-                if cell["status"] == "hidden":
-                    row_parts.append(EMOJI_CASES["hidden"])
-                elif cell["status"] == "flagged":
-                    if cell["value"] == 'flag_e':
-                        row_parts.append(EMOJIS_ENDGAME[2])
-                    else:
-                        row_parts.append(EMOJI_CASES["flag"])
-                else:
-                    val = cell["value"]
-                    if val == 'bomb_e':
-                        row_parts.append(EMOJIS_ENDGAME[3])
-                    elif val == 'b':
-                        row_parts.append(EMOJI_CASES["bomb"])
-                    elif val == 'flag_e':
-                        row_parts.append(EMOJIS_ENDGAME[2])
-                    else:
-                        row_parts.append(EMOJI_CASES.get(str(val), "?"))
-
-            lines.append("".join(row_parts))
-
-        return "\n".join(lines)
-    
+        return self.renderer.render()
+
+    def to_bytes(self) -> bytes:
+        """
+        Instantané binaire compact (voir snapshot.py pour le format).
+        """
+        from snapshot import encode_game
+        return encode_game(self)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "MinesweeperGame":
+        from snapshot import decode_game
+        return decode_game(blob, cls)
+
+    def memory_estimate(self) -> int:
+        """
+        Octets occupés par les plans, le journal et le rendu en cache (approximatif).
+        """
+        planes = (self.values, self.status, self.flag_owners, self.move_log, self.owner_ids)
+        rows = [text for text in self.renderer.rows if text is not None]
+        return sum(map(sys.getsizeof, planes)) + sum(map(sys.getsizeof, rows)) + sys.getsizeof(self.renderer.header_text)
+
+    def recount(self) -> None:
+        """
+        Recalcule les compteurs à partir des plans (après un chargement).
+        """
+        self.safe_cells_done = 0
+        self.flag_total = 0
+        self.correct_flags = {}
+        for idx, (value, status) in enumerate(zip(self.values, self.status)):
+            if status == FLAGGED:
+                self.flag_total += 1
+                if value == BOMB or value == BOMB_E:
+                    owner_id = self.flag_owner_of(idx)
+                    self.correct_flags[owner_id] = self.correct_flags.get(owner_id, 0) + 1
+            if status != HIDDEN and value != BOMB and value != BOMB_E:
+                self.safe_cells_done += 1
+        self.renderer.mark_all_dirty()
+
+def seeded_turn_order(players, seed: int) -> list:
+    """
+    Ordre des tours tiré de la graine de la partie. Les joueurs (membres ou ids)
+    sont d'abord triés par id pour ne pas dépendre de l'ordre des mentions.
+    """
+    order = sorted(players, key=lambda p: getattr(p, "id", p))
+    random.Random(seed).shuffle(order)
+    return order
+
 class GameData(TypedDict):
     game: MinesweeperGame
     turn_order: list
     current_player_index: int
-    elimination_order: list
\ No newline at end of file
+    elimination_order: list
+    # Mode édition : la carte est postée une fois puis éditée morceau par morceau
+    # (board_chunk_hashes contient la clé d'état de l'image en mode image)
+    edit_in_place: bool
+    # "text" (emojis) ou "image" (une image composée à partir de assets/)
+    render_mode: str
+    board_message_ids: list[int]
+    board_chunk_hashes: list[int]
+    # Heure de début (time.time()), 0 si inconnue
+    started_at: float
@@ -0,0 +1,299 @@
+"""
+Historique des parties terminées et classements par serveur.
+
+Une fin de partie ne fait qu'ajouter un enregistrement en mémoire (record) :
+aucune écriture, aucun await sur le chemin de la fin de partie. Une tâche
+vide le tampon par lots dans SQLite, dans un thread, toutes les
+flush_interval secondes ou dès que batch_size enregistrements attendent ; elle
+s'arrête quand le tampon est vide, comme la roue des minuteries (timers.py).
+
+Chaque lot est écrit dans une seule transaction : les parties (games), les
+joueurs de chaque partie (game_players : place, drapeaux corrects, rang
+d'élimination) et le classement du serveur (leaderboard), mis à jour par
+incréments. !boom stats et !boom top lisent ce classement sans parcourir
+l'historique, et y ajoutent en mémoire les parties encore dans le tampon :
+une lecture n'écrit rien, elle attend au plus la fin du lot en cours
+d'écriture. Les parties hors serveur (messages privés) sont gardées dans
+games, sans guilde, mais ne comptent dans aucun classement.
+
+Sans chemin (path None, la valeur par défaut), l'historique est désactivé.
+
+Le tampon est borné (max_buffer) : si le disque ne suit plus, les
+enregistrements les plus anciens sont perdus et comptés ; un lot dont
+l'écriture échoue est perdu et compté de même (jauges history_dropped et
+history_write_errors).
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Optional
+from games import GameData
+from rules import rank_players
+
+class GameRecord:
+    __slots__ = ("guild_id", "channel_id", "ended_at", "duration", "scenario", "rows", "cols", "bomb_count",
+                 "moves", "players")
+
+    def __init__(self, guild_id, channel_id, ended_at, duration, scenario, rows, cols, bomb_count, moves, players):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.ended_at = ended_at
+        self.duration = duration
+        self.scenario = scenario
+        self.rows = rows
+        self.cols = cols
+        self.bomb_count = bomb_count
+        self.moves = moves
+        # (id, nom, place, drapeaux corrects, rang d'élimination ou None)
+        self.players = players
+
+class GameHistory:
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 2.0, batch_size: int = 200,
+                 max_buffer: int = 10_000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.buffer: deque[GameRecord] = deque()
+        self.task: Optional[asyncio.Task] = None
+        self.batch_ready: Optional[asyncio.Event] = None
+        # Tenu pendant l'écriture d'un lot : hors de ce verrou, le tampon
+        # contient exactement les parties absentes de la base
+        self.writing = asyncio.Lock()
+        self.counters = {"recorded": 0, "written": 0, "dropped": 0, "batches": 0, "write_errors": 0}
+        self.conn = None
+        if path is None:
+            return
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Plusieurs processus (sharding) peuvent partager le fichier
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS games (
+                id INTEGER PRIMARY KEY,
+                guild_id INTEGER,
+                channel_id INTEGER NOT NULL,
+                ended_at REAL NOT NULL,
+                duration REAL,
+                scenario TEXT,
+                rows INTEGER NOT NULL,
+                cols INTEGER NOT NULL,
+                bomb_count INTEGER NOT NULL,
+                moves INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS game_players (
+                game_id INTEGER NOT NULL REFERENCES games(id),
+                player_id INTEGER NOT NULL,
+                place INTEGER NOT NULL,
+                flags INTEGER NOT NULL,
+                eliminated INTEGER,
+                PRIMARY KEY (game_id, player_id)
+            );
+            CREATE TABLE IF NOT EXISTS leaderboard (
+                guild_id INTEGER NOT NULL,
+                player_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                games INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                flags INTEGER NOT NULL,
+                eliminations INTEGER NOT NULL,
+                place_total INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, player_id)
+            );
+            CREATE INDEX IF NOT EXISTS leaderboard_rank ON leaderboard (guild_id, wins DESC, flags DESC);
+        """)
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.conn is not None
+
+    def record(self, guild_id: Optional[int], channel_id: int, data: GameData, scenario: Optional[str]) -> None:
+        """
+        Ajoute une partie terminée au tampon. Synchrone et sans I/O : à appeler
+        depuis la fin de partie, la partie encore intacte.
+        """
+        if self.conn is None:
+            return
+        game = data["game"]
+        eliminated = {p.id: rank for rank, p in enumerate(data["elimination_order"], 1)}
+        players = [
+            (p.id, p.display_name, place, flags, eliminated.get(p.id))
+            for place, (p, flags, _) in enumerate(rank_players(data), 1)
+        ]
+        now = time.time()
+        started_at = data.get("started_at")
+        if len(self.buffer) >= self.max_buffer:
+            self.buffer.popleft()
+            self.counters["dropped"] += 1
+        self.buffer.append(GameRecord(guild_id, channel_id, now, now - started_at if started_at else None,
+                                      scenario, game.rows, game.cols, game.bomb_count, game.move_count, players))
+        self.counters["recorded"] += 1
+        if self.task is None:
+            self.batch_ready = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+        elif len(self.buffer) >= self.batch_size:
+            self.batch_ready.set()
+
+    async def _run(self) -> None:
+        try:
+            while self.buffer:
+                try:
+                    await asyncio.wait_for(self.batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.batch_ready.clear()
+                await self.flush()
+        finally:
+            self.task = None
+
+    async def flush(self) -> int:
+        """
+        Écrit tout le tampon, par lots de batch_size, hors de la boucle.
+        Retourne le nombre de parties écrites.
+        """
+        written = 0
+        while self.buffer and self.conn is not None:
+            async with self.writing:
+                if not self.buffer:
+                    break
+                batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except sqlite3.Error:
+                    self.counters["write_errors"] += 1
+                    self.counters["dropped"] += len(batch)
+                    continue
+            written += len(batch)
+        return written
+
+    def _write(self, batch: list[GameRecord]) -> None:
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for record in batch:
+                    game_id = self.conn.execute(
+                        "INSERT INTO games (guild_id, channel_id, ended_at, duration, scenario, rows, cols, bomb_count, moves)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (record.guild_id, record.channel_id, record.ended_at, record.duration, record.scenario,
+                         record.rows, record.cols, record.bomb_count, record.moves),
+                    ).lastrowid
+                    self.conn.executemany(
+                        "INSERT INTO game_players (game_id, player_id, place, flags, eliminated) VALUES (?, ?, ?, ?, ?)",
+                        [(game_id, player_id, place, flags, rank) for player_id, _, place, flags, rank in record.players],
+                    )
+                    # Hors serveur : pas de classement
+                    if record.guild_id is None:
+                        continue
+                    self.conn.executemany(
+                        "INSERT INTO leaderboard (guild_id, player_id, name, games, wins, flags, eliminations, place_total)"
+                        " VALUES (?, ?, ?, 1, ?, ?, ?, ?)"
+                        " ON CONFLICT (guild_id, player_id) DO UPDATE SET"
+                        " name = excluded.name, games = games + 1, wins = wins + excluded.wins,"
+                        " flags = flags + excluded.flags, eliminations = eliminations + excluded.eliminations,"
+                        " place_total = place_total + excluded.place_total",
+                        [(record.guild_id, player_id, name, int(place == 1), flags, int(rank is not None), place)
+                         for player_id, name, place, flags, rank in record.players],
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        self.counters["written"] += len(batch)
+        self.counters["batches"] += 1
+
+    def _pending(self, guild_id: int) -> dict[int, list]:
+        """
+        Totaux des parties du tampon pour ce serveur, par joueur :
+        [nom, parties, victoires, drapeaux, éliminations, somme des places].
+        """
+        totals: dict[int, list] = {}
+        for record in self.buffer:
+            if record.guild_id != guild_id:
+                continue
+            for player_id, name, place, flags, rank in record.players:
+                total = totals.setdefault(player_id, [name, 0, 0, 0, 0, 0])
+                total[0] = name
+                total[1] += 1
+                total[2] += place == 1
+                total[3] += flags
+                total[4] += rank is not None
+                total[5] += place
+        return totals
+
+    async def player_stats(self, guild_id: Optional[int], player_id: int) -> Optional[dict]:
+        """
+        Totaux d'un joueur sur un serveur (parties en attente d'écriture comprises).
+        """
+        if self.conn is None or guild_id is None:
+            return None
+
+        def read():
+            with self.lock:
+                return self.conn.execute(
+                    "SELECT name, games, wins, flags, eliminations, place_total FROM leaderboard"
+                    " WHERE guild_id = ? AND player_id = ?", (guild_id, player_id),
+                ).fetchone()
+        async with self.writing:
+            pending = self._pending(guild_id).get(player_id)
+            row = await asyncio.to_thread(read)
+        if row is None and pending is None:
+            return None
+        name, games, wins, flags, eliminations, place_total = row or (None, 0, 0, 0, 0, 0)
+        if pending is not None:
+            name = pending[0]
+            games, wins, flags, eliminations, place_total = (
+                total + extra for total, extra in zip((games, wins, flags, eliminations, place_total), pending[1:])
+            )
+        return {"name": name, "games": games, "wins": wins, "flags": flags, "eliminations": eliminations,
+                "average_place": place_total / games}
+
+    async def top(self, guild_id: Optional[int], limit: int = 10) -> list[tuple[str, int, int, int]]:
+        """
+        Meilleurs joueurs d'un serveur : (nom, victoires, parties, drapeaux corrects).
+        """
+        if self.conn is None or guild_id is None:
+            return []
+
+        def read(player_ids: list[int]):
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT player_id, name, wins, games, flags FROM leaderboard WHERE guild_id = ?"
+                    " ORDER BY wins DESC, flags DESC LIMIT ?", (guild_id, limit),
+                ).fetchall()
+                # Les joueurs du tampon peuvent entrer dans le classement
+                if player_ids:
+                    rows += self.conn.execute(
+                        "SELECT player_id, name, wins, games, flags FROM leaderboard WHERE guild_id = ?"
+                        f" AND player_id IN ({','.join('?' * len(player_ids))})", (guild_id, *player_ids),
+                    ).fetchall()
+            return rows
+        async with self.writing:
+            pending = self._pending(guild_id)
+            rows = await asyncio.to_thread(read, list(pending))
+        players = {player_id: [name, wins, games, flags] for player_id, name, wins, games, flags in rows}
+        for player_id, (name, games, wins, flags, _, _) in pending.items():
+            player = players.setdefault(player_id, [name, 0, 0, 0])
+            player[0] = name
+            player[1] += wins
+            player[2] += games
+            player[3] += flags
+        ranking = sorted(players.values(), key=lambda player: (player[1], player[3]), reverse=True)
+        return [tuple(player) for player in ranking[:limit]]
+
+    def close(self) -> None:
+        """
+        À l'arrêt du processus : écrit ce qui reste dans le tampon.
+        """
+        if self.conn is None:
+            return
+        while self.buffer:
+            batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+            self._write(batch)
+        self.conn.close()
+        self.conn = None
+
+    def stats(self) -> dict:
+        return {**self.counters, "buffered": len(self.buffer)}
@@ -0,0 +1,176 @@
+import os
+import threading
+from functools import lru_cache
+from io import BytesIO
+from typing import Optional
+from emojis import EMOJIS_ENDGAME
+from games import MinesweeperGame, FLAG_E
+from metrics import timed
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Pillow est optionnel : sans lui, seul le rendu emoji est disponible
+    Image = None
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+TILE_SIZE = 32
+BOARD_IMAGE_NAME = "board.png"
+LABEL_COLOR = (220, 221, 222)
+BACKGROUND = (49, 51, 56)
+
+def images_available() -> bool:
+    return Image is not None
+
+def column_label(c: int) -> str:
+    label = ""
+    c += 1
+    while c:
+        c, rest = divmod(c - 1, 26)
+        label = chr(ord('A') + rest) + label
+    return label
+
+class TileAtlas:
+    """
+    Tuiles de assets/ chargées et redimensionnées une seule fois,
+    rangées en table [status][value] comme CELL_EMOJIS.
+    """
+
+    def __init__(self, tile_size: int = TILE_SIZE):
+        self.tile_size = tile_size
+        names = ["empty", *(f"0{i}" for i in range(1, 9)), "bomb", "bomb_e", "flag", "flag_e",
+                 "hidden", "happy_boom", "sad_boom", "swag_boom"]
+        self.tiles = {name: self._load(name) for name in names}
+        revealed = [self.tiles["empty"], *(self.tiles[f"0{i}"] for i in range(1, 9))]
+        revealed += [self.tiles["bomb"], self.tiles["bomb_e"], self.tiles["flag_e"]]
+        flagged = [self.tiles["flag"]] * (FLAG_E + 1)
+        flagged[FLAG_E] = self.tiles["flag_e"]
+        hidden = [self.tiles["hidden"]] * (FLAG_E + 1)
+        self.cells = (tuple(hidden), tuple(revealed), tuple(flagged))
+        self.corners = {
+            EMOJIS_ENDGAME[0]: self.tiles["sad_boom"],
+            EMOJIS_ENDGAME[1]: self.tiles["swag_boom"],
+        }
+        try:
+            self.font = ImageFont.load_default(size=tile_size // 2)
+        except TypeError:  # Pillow < 10.1
+            self.font = ImageFont.load_default()
+
+    def _load(self, name: str):
+        # Les tuiles sont aplaties sur le fond une fois pour toutes : le collage
+        # dans la toile se fait ensuite sans masque alpha.
+        with Image.open(os.path.join(ASSETS_DIR, f"{name}.png")) as image:
+            tile = image.convert("RGBA").resize((self.tile_size, self.tile_size), Image.LANCZOS)
+        background = Image.new("RGBA", tile.size, BACKGROUND)
+        return Image.alpha_composite(background, tile).convert("RGB")
+
+    def corner(self, header_emoji: str):
+        return self.corners.get(header_emoji, self.tiles["happy_boom"])
+
+@lru_cache(maxsize=1)
+def tile_atlas() -> TileAtlas:
+    return TileAtlas()
+
+class BoardImageRenderer:
+    """
+    Compose la grille affichée (la carte entière, ou la fenêtre d'une grande
+    carte) en une seule image PNG.
+    Les toiles et le tampon d'encodage sont réutilisés d'une partie à l'autre
+    (une toile par dimension et par thread : les grandes cartes sont rendues
+    dans le pool de game_executor), et le PNG produit est gardé par partie
+    tant que l'état de la grille affichée ne change pas.
+    """
+
+    def __init__(self, atlas: Optional[TileAtlas] = None):
+        self._atlas = atlas
+        self.local = threading.local()
+        self.cache: dict[int, tuple[int, bytes]] = {}
+
+    @property
+    def atlas(self) -> TileAtlas:
+        if self._atlas is None:
+            self._atlas = tile_atlas()
+        return self._atlas
+
+    def viewport(self, game: MinesweeperGame) -> tuple[tuple[int, int, int, int], bytes, bytes]:
+        """
+        (fenêtre affichée, status, values) : toute la grille d'une partie
+        classique, la fenêtre courante d'une grande carte.
+        """
+        renderer = game.renderer
+        return (renderer.window(), *renderer.window_planes())
+
+    def state_key(self, game: MinesweeperGame) -> int:
+        return hash((*self.viewport(game), game.header[0]))
+
+    @timed("render_image")
+    def render_png(self, game: MinesweeperGame, cache_key: Optional[int] = None) -> tuple[int, bytes]:
+        """
+        Retourne (clé d'état, PNG). cache_key identifie la partie (l'id du salon).
+        """
+        viewport = self.viewport(game)
+        state = hash((*viewport, game.header[0]))
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None and cached[0] == state:
+                return cached
+
+        canvas = self._compose(game.header[0], *viewport)
+        buffer = self._local().buffer
+        buffer.seek(0)
+        buffer.truncate()
+        canvas.save(buffer, format="PNG", optimize=False)
+        png = buffer.getvalue()
+        if cache_key is not None:
+            self.cache[cache_key] = (state, png)
+        return state, png
+
+    def forget(self, cache_key: int) -> None:
+        self.cache.pop(cache_key, None)
+
+    def _local(self):
+        local = self.local
+        if not hasattr(local, "buffer"):
+            local.buffer = BytesIO()
+            local.canvases = {}
+            # Origine (r0, c0) des étiquettes dessinées sur chaque toile
+            local.origins = {}
+        return local
+
+    def _compose(self, corner: str, window: tuple[int, int, int, int], status: bytes, values: bytes):
+        atlas = self.atlas
+        tile = atlas.tile_size
+        r0, c0, r1, c1 = window
+        rows, cols = r1 - r0, c1 - c0
+        dims = ((cols + 1) * tile, (rows + 1) * tile)
+        local = self._local()
+        canvas = local.canvases.get(dims)
+        if canvas is None:
+            canvas = local.canvases[dims] = Image.new("RGB", dims, BACKGROUND)
+        if local.origins.get(dims) != (r0, c0):
+            self._draw_labels(canvas, r0, c0, rows, cols)
+            local.origins[dims] = (r0, c0)
+
+        canvas.paste(atlas.corner(corner), (0, 0))
+
+        cells = atlas.cells
+        for r in range(rows):
+            y = (r + 1) * tile
+            base = r * cols
+            for c in range(cols):
+                image = cells[status[base + c]][values[base + c]]
+                canvas.paste(image, ((c + 1) * tile, y))
+        return canvas
+
+    def _draw_labels(self, canvas, r0: int, c0: int, rows: int, cols: int) -> None:
+        tile = self.atlas.tile_size
+        draw = ImageDraw.Draw(canvas)
+        width, height = canvas.size
+        # La fenêtre a pu bouger : on efface les étiquettes précédentes
+        draw.rectangle((tile, 0, width - 1, tile - 1), fill=BACKGROUND)
+        draw.rectangle((0, tile, tile - 1, height - 1), fill=BACKGROUND)
+        for c in range(cols):
+            draw.text(((c + 1.5) * tile, tile / 2), column_label(c0 + c), fill=LABEL_COLOR, font=self.atlas.font, anchor="mm")
+        for r in range(rows):
+            draw.text((tile / 2, (r + 1.5) * tile), str(r0 + r + 1), fill=LABEL_COLOR, font=self.atlas.font, anchor="mm")
+
+image_renderer = BoardImageRenderer()
@@ -0,0 +1,405 @@
+"""
+Mode grande carte : grilles rectangulaires jusqu'à MAX_DIMENSION de côté.
+
+La grille est découpée en morceaux de CHUNK x CHUNK cases, créés à la
+première lecture. Au premier clic, seul le nombre de bombes de chaque morceau
+est tiré ; leurs positions sont tirées (d'une graine propre au morceau) quand
+le morceau ou l'un de ses voisins est touché. La carte affichée est une
+fenêtre de VIEW_SIZE x VIEW_SIZE cases autour du dernier coup (ou de `!view`).
+"""
+import random
+import sys
+from collections import deque
+from emojis import EMOJI_HEADER
+from games import (
+    MinesweeperGame, CELL_EMOJIS, ENDGAME_CORNERS, DIRECTIONS, HIDDEN, REVEALED, FLAGGED,
+    BOMB, BOMB_E, FLAG_E, MOVE_REVEAL, MOVE_REVEAL_FLAGGED, MOVE_FLAG
+)
+from image_renderer import column_label
+from metrics import timed
+
+CHUNK = 16
+MAX_DIMENSION = 200
+VIEW_SIZE = 12
+# Densité de bombes par défaut, celle de la carte classique (22 bombes sur 144 cases)
+DEFAULT_DENSITY = 22 / 144
+# Les cartes carrées jusqu'à cette taille gardent la grille classique, affichée en entier
+CLASSIC_MAX_SIZE = 16
+
+class Chunk:
+    __slots__ = ("values", "status", "flag_owners")
+
+    def __init__(self, values: bytearray):
+        self.values = values
+        self.status = bytearray(CHUNK * CHUNK)
+        self.flag_owners = bytearray(CHUNK * CHUNK)
+
+class PlaneView:
+    """
+    Accès en lecture à un plan par index global r*cols+c, comme les plans plats
+    de MinesweeperGame (utilisé par CellView et les outils hors Discord).
+    """
+    __slots__ = ("game", "plane")
+
+    def __init__(self, game: "LargeMinesweeperGame", plane: str):
+        self.game = game
+        self.plane = plane
+
+    def __getitem__(self, idx: int) -> int:
+        r, c = divmod(idx, self.game.cols)
+        return self.game.cell_plane(self.plane, r, c)
+
+    def __len__(self) -> int:
+        return self.game.rows * self.game.cols
+
+    def __iter__(self):
+        return (self[idx] for idx in range(len(self)))
+
+class ViewportRenderer:
+    """
+    Rendu emoji d'une fenêtre de la grille : en-tête avec les coordonnées de
+    la fenêtre, puis une ligne par rangée préfixée de son numéro.
+    """
+    __slots__ = ("game",)
+    width = VIEW_SIZE
+
+    def __init__(self, game: "LargeMinesweeperGame"):
+        self.game = game
+
+    def window(self) -> tuple[int, int, int, int]:
+        game = self.game
+        r, c = game.view
+        height, width = min(VIEW_SIZE, game.rows), min(VIEW_SIZE, game.cols)
+        r0 = min(max(0, r - height // 2), game.rows - height)
+        c0 = min(max(0, c - width // 2), game.cols - width)
+        return r0, c0, r0 + height, c0 + width
+
+    @timed("render")
+    def render_lines(self) -> list[str]:
+        game = self.game
+        r0, c0, r1, c1 = self.window()
+        hidden = CELL_EMOJIS[HIDDEN][0]
+        lines = [f"{game.header[0]} `{column_label(c0)}{r0 + 1}` → `{column_label(c1 - 1)}{r1}` "
+                 f"(carte {column_label(0)}1-{column_label(game.cols - 1)}{game.rows})"]
+        for r in range(r0, r1):
+            cells = []
+            for c in range(c0, c1):
+                chunk = game.chunks.get(game.chunk_key(r, c))
+                if chunk is None:
+                    cells.append(hidden)
+                else:
+                    local = game.local_index(r, c)
+                    cells.append(CELL_EMOJIS[chunk.status[local]][chunk.values[local]])
+            lines.append(f"`{r + 1:>3}`" + "".join(cells))
+        return lines
+
+    def render(self) -> str:
+        return "\n".join(self.render_lines())
+
+    def window_planes(self) -> tuple[bytes, bytes]:
+        """
+        (status, values) des cases de la fenêtre, ligne par ligne ; les
+        morceaux jamais créés sont lus comme cachés, sans être créés.
+        """
+        game = self.game
+        r0, c0, r1, c1 = self.window()
+        status, values = bytearray(), bytearray()
+        for r in range(r0, r1):
+            for c in range(c0, c1):
+                chunk = game.chunks.get(game.chunk_key(r, c))
+                if chunk is None:
+                    status.append(HIDDEN)
+                    values.append(0)
+                else:
+                    local = game.local_index(r, c)
+                    status.append(chunk.status[local])
+                    values.append(chunk.values[local])
+        return bytes(status), bytes(values)
+
+class LargeMinesweeperGame(MinesweeperGame):
+    """
+    Même interface que MinesweeperGame (coups, compteurs, fin de partie,
+    journal), sur une grille rectangulaire stockée par morceaux.
+    """
+
+    def __init__(self, rows: int, cols: int, bomb_count: int, seed=None):
+        self.view = (0, 0)
+        super().__init__(size=max(rows, cols), bomb_count=bomb_count, seed=seed)
+        self.rows = rows
+        self.cols = cols
+        self.chunk_cols = (cols + CHUNK - 1) // CHUNK
+        self.chunk_rows = (rows + CHUNK - 1) // CHUNK
+
+    def new_header(self) -> list[str]:
+        # Seul le coin est affiché : les colonnes sont repérées dans l'en-tête de la fenêtre
+        return [EMOJI_HEADER[0]]
+
+    def new_renderer(self) -> ViewportRenderer:
+        return ViewportRenderer(self)
+
+    def initialize_board(self) -> None:
+        """
+        Aucun plan plat : les morceaux sont créés à la première lecture, les
+        plans sont lus à travers PlaneView.
+        """
+        self.chunks: dict[int, Chunk] = {}
+        self.chunk_bombs: dict[int, frozenset[int]] = {}
+        self.chunk_bomb_counts: list[int] = []
+        self.excluded: tuple[int, ...] = ()
+        self.values = PlaneView(self, "values")
+        self.status = PlaneView(self, "status")
+        self.flag_owners = PlaneView(self, "flag_owners")
+        self.owner_ids = []
+        self.safe_cells_done = 0
+        self.flag_total = 0
+        self.correct_flags = {}
+
+    def blank_copy(self) -> "LargeMinesweeperGame":
+        return type(self)(self.rows, self.cols, self.bomb_count, seed=self.seed)
+
+    def is_valid_coords(self, r, c) -> bool:
+        return 0 <= r < self.rows and 0 <= c < self.cols
+
+    def chunk_key(self, r: int, c: int) -> int:
+        return (r // CHUNK) * self.chunk_cols + c // CHUNK
+
+    @staticmethod
+    def local_index(r: int, c: int) -> int:
+        return (r % CHUNK) * CHUNK + c % CHUNK
+
+    def chunk_bounds(self, key: int) -> tuple[int, int, int, int]:
+        kr, kc = divmod(key, self.chunk_cols)
+        r0, c0 = kr * CHUNK, kc * CHUNK
+        return r0, c0, min(r0 + CHUNK, self.rows), min(c0 + CHUNK, self.cols)
+
+    def generate_bombs(self, first_click_coords) -> None:
+        """
+        Tire le nombre de bombes de chaque morceau : un tirage sans remise
+        parmi toutes les cases autorisées, dont on ne garde que les effectifs.
+        Les positions sont tirées plus tard, morceau par morceau.
+        """
+        fr, fc = first_click_coords
+        self.excluded = tuple(sorted(
+            (fr + dr) * self.cols + fc + dc
+            for dr, dc in ((0, 0), *DIRECTIONS)
+            if self.is_valid_coords(fr + dr, fc + dc)
+        ))
+        counts = [0] * (self.chunk_rows * self.chunk_cols)
+        allowed = self.rows * self.cols - len(self.excluded)
+        for pos in random.Random(self.seed).sample(range(allowed), self.bomb_count):
+            # pos-ième case autorisée -> index de case, en sautant les cases exclues
+            idx = pos
+            for excluded in self.excluded:
+                if excluded <= idx:
+                    idx += 1
+            counts[self.chunk_key(*divmod(idx, self.cols))] += 1
+        self.chunk_bomb_counts = counts
+
+    def bombs_in_chunk(self, key: int) -> frozenset[int]:
+        bombs = self.chunk_bombs.get(key)
+        if bombs is None:
+            r0, c0, r1, c1 = self.chunk_bounds(key)
+            excluded = set(self.excluded)
+            cells = [r * self.cols + c for r in range(r0, r1) for c in range(c0, c1)
+                     if r * self.cols + c not in excluded]
+            rng = random.Random(self.seed << 32 | key)
+            bombs = self.chunk_bombs[key] = frozenset(rng.sample(cells, self.chunk_bomb_counts[key]))
+        return bombs
+
+    def chunk(self, key: int) -> Chunk:
+        """
+        Morceau de la grille, créé (avec ses nombres) au premier accès.
+        Les bombes des morceaux voisins servent au comptage des cases du bord.
+        """
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            r0, c0, r1, c1 = self.chunk_bounds(key)
+            kr, kc = divmod(key, self.chunk_cols)
+            bombs = set()
+            for nr in range(max(0, kr - 1), min(self.chunk_rows, kr + 2)):
+                for nc in range(max(0, kc - 1), min(self.chunk_cols, kc + 2)):
+                    bombs |= self.bombs_in_chunk(nr * self.chunk_cols + nc)
+            cols = self.cols
+            values = bytearray(CHUNK * CHUNK)
+            for r in range(r0, r1):
+                for c in range(c0, c1):
+                    idx = r * cols + c
+                    local = (r - r0) * CHUNK + c - c0
+                    if idx in bombs:
+                        values[local] = BOMB
+                        continue
+                    values[local] = sum(
+                        1 for dr, dc in DIRECTIONS
+                        if 0 <= r + dr < self.rows and 0 <= c + dc < cols and (r + dr) * cols + c + dc in bombs
+                    )
+            chunk = self.chunks[key] = Chunk(values)
+        return chunk
+
+    def cell_plane(self, plane: str, r: int, c: int) -> int:
+        chunk = self.chunks.get(self.chunk_key(r, c))
+        if chunk is None:
+            # Morceau jamais touché : tout est caché, sans drapeau
+            if plane != "values" or not self.first_click_done:
+                return 0
+            chunk = self.chunk(self.chunk_key(r, c))
+        return getattr(chunk, plane)[self.local_index(r, c)]
+
+    def count_adjacent_bombs(self, r, c) -> int:
+        return sum(
+            1 for dr, dc in DIRECTIONS
+            if self.is_valid_coords(r + dr, c + dc) and self.cell_plane("values", r + dr, c + dc) == BOMB
+        )
+
+    @timed("logic")
+    def reveal_case(self, r, c, player_id=None) -> str:
+        local = self.local_index(r, c)
+        if self.first_click_done:
+            status = self.chunk(self.chunk_key(r, c)).status[local]
+            if status == REVEALED:
+                return "Cette case est déjà révélée."
+            if status == FLAGGED:
+                return "Impossible de révéler une case déjà flaggée."
+        self.log_move(MOVE_REVEAL, r, c, player_id)
+
+        if not self.first_click_done:
+            self.first_click_done = True
+            self.generate_bombs((r, c))
+
+        chunk = self.chunk(self.chunk_key(r, c))
+        chunk.status[local] = REVEALED
+        self.view = (r, c)
+        value = chunk.values[local]
+        if value == BOMB:
+            return "💥 BOOM! Bombe touchée."
+        self.safe_cells_done += 1
+        if value == 0:
+            self.flood_reveal(r, c)
+            return "Case vide. Révélation autour."
+        return f"La case contient {value}."
+
+    @timed("logic")
+    def reveal_flagged_case(self, r, c, player_id=None) -> None:
+        chunk = self.chunk(self.chunk_key(r, c))
+        local = self.local_index(r, c)
+        if chunk.status[local] == FLAGGED:
+            self.log_move(MOVE_REVEAL_FLAGGED, r, c, player_id)
+            chunk.status[local] = REVEALED
+            self.view = (r, c)
+            self.flag_total -= 1
+            if chunk.values[local] == BOMB:
+                owner_id = self.owner_ids[chunk.flag_owners[local] - 1]
+                self.correct_flags[owner_id] -= 1
+
+    def flood_reveal(self, sr, sc) -> None:
+        """
+        Parcours en largeur sur les coordonnées globales : la file traverse
+        les bords des morceaux, qui sont créés au fur et à mesure.
+        """
+        rows, cols = self.rows, self.cols
+        chunks = self.chunks
+        revealed = 0
+        queue = deque()
+        queue.append((sr, sc))
+        while queue:
+            r, c = queue.popleft()
+            for dr, dc in DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                key = (nr // CHUNK) * self.chunk_cols + nc // CHUNK
+                chunk = chunks.get(key) or self.chunk(key)
+                local = (nr % CHUNK) * CHUNK + nc % CHUNK
+                if chunk.status[local] == HIDDEN and chunk.values[local] != BOMB:
+                    chunk.status[local] = REVEALED
+                    revealed += 1
+                    if chunk.values[local] == 0:
+                        queue.append((nr, nc))
+        self.safe_cells_done += revealed
+
+    @timed("logic")
+    def flag_case(self, r, c, user_id) -> str:
+        if not self.is_valid_coords(r, c):
+            return "La case est hors de la grille."
+        if not self.first_click_done:
+            return "Impossible de poser un drapeau avant la première révélation."
+        chunk = self.chunk(self.chunk_key(r, c))
+        local = self.local_index(r, c)
+        if chunk.status[local] == REVEALED:
+            return "Cette case est déjà révélée, impossible de flag."
+        if chunk.status[local] == FLAGGED:
+            return "Impossible de retirer un drapeau (déjà flaggé)."
+
+        self.log_move(MOVE_FLAG, r, c, user_id)
+        chunk.status[local] = FLAGGED
+        self.view = (r, c)
+        chunk.flag_owners[local] = self._owner_slot(user_id)
+        self.flag_total += 1
+        if chunk.values[local] == BOMB:
+            self.correct_flags[user_id] = self.correct_flags.get(user_id, 0) + 1
+        else:
+            self.safe_cells_done += 1
+        return "Drapeau placé."
+
+    def is_all_safe_revealed(self) -> bool:
+        safe_cells = self.rows * self.cols - self.bomb_count
+        return self.safe_cells_done >= safe_cells and self.flag_total <= self.bomb_count
+
+    def reveal_all_bombs(self) -> None:
+        """
+        Révèle les bombes des morceaux déjà créés et de la fenêtre affichée.
+        Les autres morceaux ne sont jamais montrés : les créer annulerait le
+        découpage paresseux (toute la carte en fin de partie).
+        """
+        if not self.first_click_done:
+            return
+        r0, c0, r1, c1 = self.renderer.window()
+        keys = set(self.chunks)
+        keys.update(self.chunk_key(r, c) for r in (r0, r1 - 1) for c in (c0, c1 - 1))
+        for key in keys:
+            chunk = self.chunk(key)
+            for local, value in enumerate(chunk.values):
+                if value == BOMB and chunk.status[local] != FLAGGED:
+                    chunk.status[local] = REVEALED
+
+    def finalize_endgame(self, scenario, last_click=None, bomb_clicked=False, safe_flag_clicked=False) -> str:
+        corner = ENDGAME_CORNERS.get(scenario)
+        if corner is None:
+            raise ValueError(f"Fin de partie inconnue : {scenario!r}")
+        self.header[0] = corner
+
+        if last_click is not None and self.is_valid_coords(*last_click):
+            self.view = last_click
+        self.reveal_all_bombs()
+
+        if last_click is not None and self.first_click_done:
+            (r, c) = last_click
+            if self.is_valid_coords(r, c):
+                chunk = self.chunk(self.chunk_key(r, c))
+                local = self.local_index(r, c)
+                if bomb_clicked and chunk.values[local] == BOMB:
+                    chunk.values[local] = BOMB_E
+                if safe_flag_clicked and chunk.status[local] == REVEALED and chunk.values[local] < BOMB:
+                    chunk.values[local] = FLAG_E
+
+        return self.print_board_text()
+
+    def memory_estimate(self) -> int:
+        per_chunk = sum(map(sys.getsizeof, (bytearray(CHUNK * CHUNK),) * 3))
+        bombs = sum(map(sys.getsizeof, self.chunk_bombs.values()))
+        return (len(self.chunks) * per_chunk + bombs + sys.getsizeof(self.chunk_bomb_counts)
+                + sys.getsizeof(self.move_log) + sys.getsizeof(self.owner_ids))
+
+def is_classic(rows: int, cols: int) -> bool:
+    return rows == cols <= CLASSIC_MAX_SIZE
+
+def create_game(rows: int, cols: int, bomb_count=None, seed=None, no_guess=False) -> MinesweeperGame:
+    """
+    Grille classique (affichée en entier) si elle est carrée et tient dans les
+    emojis de coordonnées, grande carte sinon. Le mode sans hasard n'existe
+    que pour les grilles classiques.
+    """
+    if bomb_count is None:
+        bomb_count = max(1, round(rows * cols * DEFAULT_DENSITY))
+    if is_classic(rows, cols):
+        return MinesweeperGame(size=rows, bomb_count=bomb_count, seed=seed, no_guess=no_guess)
+    return LargeMinesweeperGame(rows, cols, bomb_count, seed=seed)
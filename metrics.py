@@ -0,0 +1,173 @@
+"""
+Mesures internes du bot : durée de chaque phase d'une commande (validation,
+logique du jeu, rendu, envoi Discord), retard de la boucle d'événements et
+jauges (parties en cours, mémoire estimée, file d'envoi).
+
+Désactivé par défaut : les fonctions décorées par `timed` ne font alors qu'un
+test de booléen en plus. Une fois activé (section `metrics` de config.yml), les
+mesures sont exposées au format texte Prometheus sur http://host:port/metrics
+et/ou écrites périodiquement sur une ligne JSON.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from functools import wraps
+from typing import Callable, Optional
+
+class PhaseStats:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+class Metrics:
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self.enabled = False
+        self.phases: dict[str, PhaseStats] = {}
+        self.gauges: dict[str, Callable[[], float]] = {}
+        self.loop_lag = 0.0
+        self.loop_lag_max = 0.0
+        self.tasks: list[asyncio.Task] = []
+        self.lag_task: Optional[asyncio.Task] = None
+        self.server = None
+
+    def observe(self, phase: str, seconds: float) -> None:
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        stats.add(seconds)
+
+    def timed(self, phase: str):
+        """
+        Décorateur : mesure la durée de chaque appel quand les mesures sont actives.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(phase, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """
+        Jauge lue seulement au moment de l'export.
+        """
+        self.gauges[name] = read
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, log_interval: float = 0, lag_interval: float = 0.5) -> None:
+        self.enabled = True
+        self.watch_loop_lag(lag_interval)
+        if log_interval:
+            self.tasks.append(asyncio.create_task(self._log_periodically(log_interval)))
+        if port:
+            from aiohttp import web
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            self.server = runner
+            await web.TCPSite(runner, host, port).start()
+            print(f"Mesures disponibles sur http://{host}:{port}/metrics")
+
+    async def stop(self) -> None:
+        self.enabled = False
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+        if self.lag_task is not None:
+            self.lag_task.cancel()
+            self.lag_task = None
+        if self.server is not None:
+            await self.server.cleanup()
+            self.server = None
+
+    def watch_loop_lag(self, interval: float = 0.5) -> None:
+        """
+        Mesure le retard de la boucle, même mesures désactivées (contrôle
+        d'admission). Sans effet si la mesure tourne déjà.
+        """
+        if self.lag_task is None:
+            self.lag_task = asyncio.create_task(self._watch_loop_lag(interval))
+
+    async def _watch_loop_lag(self, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.loop_lag = max(0.0, loop.time() - start - interval)
+            self.loop_lag_max = max(self.loop_lag_max, self.loop_lag)
+
+    async def _log_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            print(json.dumps(self.snapshot(), separators=(",", ":")))
+
+    async def _handle_metrics(self, request):
+        from aiohttp import web
+        return web.Response(text=self.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    def read_gauges(self) -> dict[str, float]:
+        values = {"loop_lag_seconds": self.loop_lag, "loop_lag_max_seconds": self.loop_lag_max}
+        for name, read in self.gauges.items():
+            try:
+                values[name] = read()
+            except Exception as e:
+                print(f"Jauge {name} illisible : {e}")
+        return values
+
+    def snapshot(self) -> dict:
+        """
+        Résumé pour la ligne de log : jauges et, par phase, nombre d'appels et quantiles en ms.
+        """
+        phases = {
+            phase: {
+                "count": stats.count,
+                **{f"p{int(q * 100)}_ms": round(stats.quantile(q) * 1000, 3) for q in self.QUANTILES},
+                "max_ms": round(stats.max * 1000, 3),
+            }
+            for phase, stats in self.phases.items()
+        }
+        return {"ts": round(time.time(), 3), **self.read_gauges(), "phases": phases}
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP boombot_phase_seconds Durée des phases de traitement des commandes.",
+            "# TYPE boombot_phase_seconds summary",
+        ]
+        for phase, stats in self.phases.items():
+            for q in self.QUANTILES:
+                lines.append(f'boombot_phase_seconds{{phase="{phase}",quantile="{q}"}} {stats.quantile(q):.6f}')
+            lines.append(f'boombot_phase_seconds_sum{{phase="{phase}"}} {stats.total:.6f}')
+            lines.append(f'boombot_phase_seconds_count{{phase="{phase}"}} {stats.count}')
+        for name, value in self.read_gauges().items():
+            lines.append(f"# TYPE boombot_{name} gauge")
+            lines.append(f"boombot_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def timed(phase: str):
+    return metrics.timed(phase)
@@ -0,0 +1,170 @@
+"""
+Grilles sans hasard : seules sont acceptées les dispositions que le solveur
+résout entièrement depuis le premier clic, sans jamais deviner.
+
+Une disposition est désignée par sa graine : en mode sans hasard, les bombes
+sont tirées autour du clic canonique (games.canonical_click) puis ramenées par
+symétrie autour du vrai clic. Une graine vérifiée pour un clic canonique vaut
+donc pour tous les clics symétriques, et la partie reste rejouable depuis sa
+graine et son journal.
+
+Vérifier une graine coûte cher : LayoutPool garde une réserve de graines
+vérifiées par (taille, bombes, clic canonique), remplie en arrière-plan dans
+un pool de processus. Seules les grilles configurées (warm_layouts) sont
+remplies d'avance ; les autres ne sont cherchées qu'après un premier clic
+sans graine en réserve (cette partie-là se joue sur une grille ordinaire),
+et la réserve ne garde que les max_layouts classes les plus récentes.
+Le premier clic n'attend jamais la recherche : il tient la file de
+commandes du salon.
+
+Les processus du pool sont lancés en mode "spawn" : un fork depuis la boucle
+d'événements copierait ses verrous et threads (exécuteur, SQLite) dans un
+état incohérent.
+"""
+import asyncio
+import multiprocessing
+import random
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from games import MinesweeperGame, HIDDEN, canonical_click
+from solver import Solver
+
+def is_solvable(size: int, bomb_count: int, seed: int, click: tuple[int, int], budget: float = 1.0) -> bool:
+    """
+    Joue la partie avec les seules déductions certaines du solveur. Une
+    grille dont la résolution dépasse budget secondes est écartée.
+    """
+    deadline = time.perf_counter() + budget
+    game = MinesweeperGame(size=size, bomb_count=bomb_count, seed=seed, no_guess=True)
+    game.reveal_case(*click)
+    solver = Solver(game)
+    status = game.status
+    while not game.is_all_safe_revealed():
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        result = solver.solve(budget=remaining)
+        hidden_safe = [idx for idx in result.safe if status[idx] == HIDDEN]
+        if not hidden_safe:
+            return False
+        for idx in hidden_safe:
+            if status[idx] == HIDDEN:
+                game.reveal_case(*divmod(idx, size))
+    return True
+
+def search_seeds(size: int, bomb_count: int, click: tuple[int, int], count: int, max_attempts: int,
+                 budget: float = 1.0) -> list[int]:
+    """
+    Tire des graines au hasard jusqu'à en trouver count résolubles depuis click
+    (exécuté dans un processus du pool).
+    """
+    rng = random.Random()
+    seeds = []
+    for _ in range(max_attempts):
+        seed = rng.getrandbits(64)
+        if is_solvable(size, bomb_count, seed, click, budget):
+            seeds.append(seed)
+            if len(seeds) == count:
+                break
+    return seeds
+
+def canonical_clicks(size: int) -> list[tuple[int, int]]:
+    return sorted({canonical_click(size, r, c)[0] for r in range(size) for c in range(size)})
+
+class LayoutPool:
+    """
+    Réserve de graines vérifiées. take() et seed_for() sont instantanés ; une
+    réserve vide est remplie en arrière-plan.
+    """
+
+    def __init__(self, target: int = 2, workers: int = 1, max_attempts: int = 500, budget: float = 1.0,
+                 warm_layouts=((12, 22),), max_layouts: int = 256):
+        self.target = target
+        self.workers = workers
+        self.max_attempts = max_attempts
+        # Temps de résolution maximal d'une grille candidate (secondes)
+        self.budget = budget
+        # (taille, bombes) remplies d'avance et après chaque prise
+        self.warm_layouts: set[tuple[int, int]] = {tuple(layout) for layout in warm_layouts}
+        # Nombre de classes (taille, bombes, clic canonique) gardées, les moins récentes sortent d'abord
+        self.max_layouts = max_layouts
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.seeds: OrderedDict[tuple[int, int, tuple[int, int]], deque[int]] = OrderedDict()
+        self.filling: dict[tuple[int, int, tuple[int, int]], asyncio.Future] = {}
+        self.counters = {"hits": 0, "misses": 0, "fallbacks": 0, "searched": 0, "not_warmed": 0, "evicted": 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self.executor
+
+    def _refill(self, key) -> asyncio.Future:
+        future = self.filling.get(key)
+        if future is None:
+            future = self.filling[key] = asyncio.ensure_future(self._search(key))
+            future.add_done_callback(lambda _: self.filling.pop(key, None))
+        return future
+
+    async def _search(self, key) -> None:
+        size, bomb_count, click = key
+        missing = self.target - len(self.seeds.get(key, ()))
+        if missing <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        seeds = await loop.run_in_executor(self._executor(), search_seeds, size, bomb_count, click, missing,
+                                           self.max_attempts, self.budget)
+        self.counters["searched"] += len(seeds)
+        self._pool(key).extend(seeds)
+
+    def _pool(self, key) -> deque[int]:
+        pool = self.seeds.get(key)
+        if pool is None:
+            pool = self.seeds[key] = deque()
+            while len(self.seeds) > self.max_layouts:
+                self.seeds.popitem(last=False)
+                self.counters["evicted"] += 1
+        else:
+            self.seeds.move_to_end(key)
+        return pool
+
+    def warm(self, size: int, bomb_count: int) -> None:
+        """
+        Lance le remplissage de toutes les classes de premier clic pour cette
+        grille, si elle fait partie des grilles configurées.
+        """
+        if (size, bomb_count) not in self.warm_layouts:
+            self.counters["not_warmed"] += 1
+            return
+        for click in canonical_clicks(size):
+            self._refill((size, bomb_count, click))
+
+    def take(self, size: int, bomb_count: int, r: int, c: int) -> Optional[int]:
+        key = (size, bomb_count, canonical_click(size, r, c)[0])
+        pool = self.seeds.get(key)
+        seed = pool.popleft() if pool else None
+        self.counters["hits" if seed is not None else "misses"] += 1
+        if (size, bomb_count) in self.warm_layouts:
+            self._refill(key)
+        return seed
+
+    def seed_for(self, size: int, bomb_count: int, r: int, c: int) -> Optional[int]:
+        """
+        Graine vérifiée pour ce premier clic ; None si la réserve est vide (la
+        partie se joue alors avec une grille ordinaire, et la classe est
+        cherchée en arrière-plan pour les parties suivantes).
+        """
+        seed = self.take(size, bomb_count, r, c)
+        if seed is None:
+            self.counters["fallbacks"] += 1
+            if (size, bomb_count) not in self.warm_layouts:
+                self._refill((size, bomb_count, canonical_click(size, r, c)[0]))
+        return seed
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+layout_pool = LayoutPool()
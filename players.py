@@ -0,0 +1,31 @@
+"""
+Joueurs d'une partie.
+
+Une partie ne garde de ses joueurs que l'id, la mention et le nom affiché :
+pas d'objet Member, qui retient sa guilde, ses rôles et sa présence, et
+n'existe que si le cache des membres de discord.py est actif. C'est ce qui
+permet de couper les intents presences/members (discord.lean dans config.yml).
+"""
+
+class PlayerRef:
+    __slots__ = ("id", "mention", "display_name")
+
+    def __init__(self, player_id: int, display_name: str = ""):
+        self.id = player_id
+        self.mention = f"<@{player_id}>"
+        self.display_name = display_name or self.mention
+
+    @classmethod
+    def from_member(cls, member) -> "PlayerRef":
+        if isinstance(member, PlayerRef):
+            return member
+        return cls(member.id, member.display_name)
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return f"PlayerRef({self.id}, {self.display_name!r})"
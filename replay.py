@@ -0,0 +1,149 @@
+"""
+Rejoue une partie à partir de sa graine et de son journal de coups.
+
+Les bombes sont tirées de la graine au premier clic : rejouer les mêmes coups
+dans le même ordre redonne exactement la même grille, coup par coup.
+
+Utilisation (sur la base du stockage SQLite) :
+    python replay.py games.sqlite3 <id du salon> [N]
+affiche la liste des coups et la carte après le N-ième coup (par défaut le dernier).
+"""
+import sqlite3
+import sys
+from typing import Callable, Optional
+from games import (
+    MinesweeperGame, MOVE_RECORD, HIDDEN, FLAGGED, BOMB, BOMB_E, FLAG_E,
+    MOVE_REVEAL, MOVE_FLAG, MOVE_REVEAL_FLAGGED, MOVE_ELIMINATE
+)
+from image_renderer import column_label
+
+MOVE_NAMES = {
+    MOVE_REVEAL: "révèle",
+    MOVE_FLAG: "drapeau",
+    MOVE_REVEAL_FLAGGED: "révèle le drapeau",
+    MOVE_ELIMINATE: "éliminé",
+}
+
+Move = tuple[int, int, int, int]
+
+def apply_move(game: MinesweeperGame, move: Move) -> None:
+    kind, r, c, player_id = move
+    if kind == MOVE_REVEAL:
+        game.reveal_case(r, c, player_id)
+    elif kind == MOVE_FLAG:
+        game.flag_case(r, c, player_id)
+    elif kind == MOVE_REVEAL_FLAGGED:
+        game.reveal_flagged_case(r, c, player_id)
+    elif kind == MOVE_ELIMINATE:
+        game.log_move(MOVE_ELIMINATE, player_id=player_id)
+    else:
+        raise ValueError(f"Type de coup inconnu : {kind}")
+
+def board_ascii(game: MinesweeperGame) -> str:
+    """
+    Carte en texte brut pour le terminal : # cachée, F drapeau, * bombe, . vide.
+    """
+    specials = {BOMB: "*", BOMB_E: "X", FLAG_E: "f"}
+    lines = ["    " + " ".join(column_label(c) for c in range(game.cols))]
+    for r in range(game.rows):
+        cells = []
+        for idx in range(r * game.cols, (r + 1) * game.cols):
+            status = game.status[idx]
+            if status == HIDDEN:
+                cells.append("#")
+            elif status == FLAGGED:
+                cells.append("F")
+            else:
+                value = game.values[idx]
+                cells.append(specials.get(value) or str(value or "."))
+        lines.append(f"{r + 1:>3} " + " ".join(cells))
+    return "\n".join(lines)
+
+def describe_move(move: Move) -> str:
+    kind, r, c, player_id = move
+    if kind == MOVE_ELIMINATE:
+        return f"{player_id} {MOVE_NAMES[kind]}"
+    return f"{player_id} {MOVE_NAMES[kind]} {column_label(c)}{r + 1}"
+
+class GameReplay:
+    """
+    Reconstruit l'état d'une partie après n'importe quel coup.
+    Avancer rejoue les coups suivants ; reculer repart de la graine.
+    """
+
+    def __init__(self, new_game: Callable[[], MinesweeperGame], move_log: bytes):
+        self.new_game = new_game
+        self.moves: list[Move] = list(MOVE_RECORD.iter_unpack(move_log))
+        self.position = 0
+        self.game = new_game()
+
+    @classmethod
+    def from_game(cls, game: MinesweeperGame) -> "GameReplay":
+        return cls(game.blank_copy, bytes(game.move_log))
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def eliminated(self) -> list[int]:
+        """
+        Ids des joueurs éliminés jusqu'à la position courante, dans l'ordre.
+        """
+        return [move[3] for move in self.moves[:self.position] if move[0] == MOVE_ELIMINATE]
+
+    def reset(self) -> None:
+        self.position = 0
+        self.game = self.new_game()
+
+    def step(self) -> Optional[Move]:
+        if self.position >= len(self.moves):
+            return None
+        move = self.moves[self.position]
+        apply_move(self.game, move)
+        self.position += 1
+        return move
+
+    def seek(self, n: int) -> MinesweeperGame:
+        """
+        État de la partie après les n premiers coups.
+        """
+        n = max(0, min(n, len(self.moves)))
+        if n < self.position:
+            self.reset()
+        while self.position < n:
+            self.step()
+        return self.game
+
+def replay(size: int, bomb_count: int, seed: int, move_log: bytes, upto: Optional[int] = None) -> MinesweeperGame:
+    """
+    Rejoue move_log depuis la graine, jusqu'au coup upto (tous par défaut).
+    """
+    moves = GameReplay(lambda: MinesweeperGame(size=size, bomb_count=bomb_count, seed=seed), move_log)
+    return moves.seek(len(moves) if upto is None else upto)
+
+def load_snapshot(path: str, channel_id: int) -> bytes:
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT snapshot FROM games WHERE channel_id = ?", (channel_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        raise SystemExit(f"Aucune partie enregistrée pour le salon {channel_id}.")
+    return row[0]
+
+def main() -> None:
+    from snapshot import game_data_from_bytes
+    if len(sys.argv) < 3:
+        raise SystemExit(__doc__)
+    data = game_data_from_bytes(load_snapshot(sys.argv[1], int(sys.argv[2])))
+    moves = GameReplay.from_game(data["game"])
+    upto = int(sys.argv[3]) if len(sys.argv) > 3 else len(moves)
+
+    game = moves.game
+    print(f"Graine {game.seed}, grille {game.rows}x{game.cols}, {game.bomb_count} bombes, {len(moves)} coups.")
+    for i, move in enumerate(moves.moves[:upto], start=1):
+        print(f"{i:4d}. {describe_move(move)}")
+    game = moves.seek(upto)
+    print(board_ascii(game))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Règles des coups, de fin de partie et d'ordre des tours, sans dépendance à
+Discord : utilisées par le bot (via utils) comme par les simulations
+(simulate.py). Les joueurs sont des PlayerRef, ou tout objet ayant un id.
+"""
+from typing import Optional
+from games import MinesweeperGame, GameData, MOVE_ELIMINATE, FLAGGED, BOMB
+from executor import game_executor
+from players import PlayerRef
+
+def find_member_by_id(members: list[PlayerRef], member_id) -> Optional[PlayerRef]:
+    for member in members:
+        if member.id == member_id:
+            return member
+    return None
+
+def remove_player_from_game(data: GameData, member: PlayerRef):
+    turn_order = data["turn_order"]
+    # Comparaison par id : member peut être l'auteur du message (Member) ou un PlayerRef
+    idx = next((i for i, player in enumerate(turn_order) if player.id == member.id), None)
+    if idx is not None:
+        player = turn_order.pop(idx)
+        data["elimination_order"].append(player)
+        data["game"].log_move(MOVE_ELIMINATE, player_id=member.id)
+        if idx < data["current_player_index"]:
+            data["current_player_index"] -= 1
+        if turn_order:
+            data["current_player_index"] %= len(turn_order)
+
+def next_turn(data: GameData) -> PlayerRef:
+    data["current_player_index"] = (data["current_player_index"] + 1) % len(data["turn_order"])
+    return data["turn_order"][data["current_player_index"]]
+
+# Causes d'élimination d'un coup
+ELIMINATED_BOMB = "bombe"
+ELIMINATED_FLAGGED_BOMB = "bombe sous drapeau"
+ELIMINATED_FALSE_FLAG = "faux drapeau"
+
+class MoveOutcome:
+    """
+    Résultat d'un coup. Refusé : refused contient le message du jeu et rien
+    n'a changé. Joué : les éliminations sont appliquées et, si la partie
+    continue, le tour est déjà passé au joueur suivant.
+    """
+    __slots__ = ("refused", "message", "flag_revealed", "bomb_clicked", "eliminated", "ended", "scenario")
+
+    def __init__(self, refused: Optional[str] = None, message: Optional[str] = None, flag_revealed: bool = False,
+                 bomb_clicked: bool = False):
+        self.refused = refused
+        # Message du jeu (None pour la révélation d'un drapeau adverse)
+        self.message = message
+        self.flag_revealed = flag_revealed
+        self.bomb_clicked = bomb_clicked
+        # (joueur, cause) dans l'ordre des éliminations
+        self.eliminated: list[tuple[PlayerRef, str]] = []
+        self.ended = False
+        self.scenario: Optional[str] = None
+
+    def eliminate(self, data: GameData, player: PlayerRef, cause: str) -> None:
+        remove_player_from_game(data, player)
+        self.eliminated.append((player, cause))
+
+async def play_reveal(channel_id: int, data: GameData, player: PlayerRef, r: int, c: int) -> MoveOutcome:
+    """
+    Révèle (r, c) pour player, dont c'est le tour. Sur un drapeau adverse :
+    bombe dessous, player est éliminé ; sinon le poseur du drapeau l'est,
+    s'il joue encore.
+    """
+    game: MinesweeperGame = data["game"]
+    idx = r * game.cols + c
+    if game.status[idx] == FLAGGED:
+        owner_id = game.flag_owner_of(idx)
+        if owner_id == player.id:
+            return MoveOutcome(refused="Coup interdit (c'est TON propre drapeau).")
+        await game_executor.run(channel_id, game, game.reveal_flagged_case, r, c, player.id)
+        outcome = MoveOutcome(flag_revealed=True, bomb_clicked=game.values[idx] == BOMB)
+        if outcome.bomb_clicked:
+            outcome.eliminate(data, player, ELIMINATED_FLAGGED_BOMB)
+        else:
+            owner = find_member_by_id(data["turn_order"], owner_id)
+            if owner is not None:
+                outcome.eliminate(data, owner, ELIMINATED_FALSE_FLAG)
+        outcome.ended, outcome.scenario = await check_end_game(data)
+        if not outcome.ended:
+            # Le tour reste à la place courante : un joueur vient d'en sortir
+            data["current_player_index"] %= len(data["turn_order"])
+        return outcome
+
+    message = await game_executor.run(channel_id, game, game.reveal_case, r, c, player.id)
+    if "Impossible" in message or "déjà révélée" in message:
+        return MoveOutcome(refused=message)
+    outcome = MoveOutcome(message=message, bomb_clicked="BOOM" in message)
+    if outcome.bomb_clicked:
+        outcome.eliminate(data, player, ELIMINATED_BOMB)
+    return await _finish_move(data, outcome)
+
+async def play_flag(channel_id: int, data: GameData, player: PlayerRef, r: int, c: int) -> MoveOutcome:
+    """
+    Pose un drapeau de player, dont c'est le tour, en (r, c).
+    """
+    game: MinesweeperGame = data["game"]
+    message = await game_executor.run(channel_id, game, game.flag_case, r, c, player.id)
+    if "Impossible" in message or "déjà révélée" in message or "hors de la grille" in message:
+        return MoveOutcome(refused=message)
+    return await _finish_move(data, MoveOutcome(message=message))
+
+async def _finish_move(data: GameData, outcome: MoveOutcome) -> MoveOutcome:
+    outcome.ended, outcome.scenario = await check_end_game(data)
+    if not outcome.ended:
+        next_turn(data)
+    return outcome
+
+async def check_end_game(data) -> tuple[bool, Optional[str]]:
+    turn_order = data["turn_order"]
+    game: MinesweeperGame = data["game"]
+
+    if len(turn_order) == 1:
+        return True, "one_left"
+    elif game.is_all_safe_revealed():
+        return True, "all_solved"
+    
+    return False, None
+
+def rank_players(data: GameData) -> list[tuple[PlayerRef, int, bool]]:
+    """
+    Classement final : (joueur, drapeaux corrects, éliminé), survivants
+    d'abord par drapeaux décroissants, puis les éliminés dans l'ordre.
+    """
+    game: MinesweeperGame = data["game"]
+    turn_order = data["turn_order"]
+    elimination_order = data["elimination_order"]
+
+    # Un seul calcul de score par joueur
+    scores = {p.id: game.count_flags_by_user(p.id) for p in (*turn_order, *elimination_order)}
+    survivors = sorted(turn_order, key=lambda p: scores[p.id], reverse=True)
+    return [(p, scores[p.id], False) for p in survivors] + [(e, scores[e.id], True) for e in elimination_order]
+
+async def finalize_and_rank(channel_id: int, data: GameData, scenario: Optional[str], last_click=None, bomb_clicked=False, safe_flag_clicked=False) -> list[str]:
+    """
+    Modifie la map finale (header, bomb_e, flag_e, etc.) selon scenario,
+    puis construit un classement.
+    Retourne la liste de lignes (strings) à envoyer.
+    """
+    game: MinesweeperGame = data["game"]
+
+    final_map = await game_executor.run(
+        channel_id, game, game.finalize_endgame,
+        scenario,
+        last_click=last_click,
+        bomb_clicked=bomb_clicked,
+        safe_flag_clicked=safe_flag_clicked
+    )
+
+    ranking_list = rank_players(data)
+    survivors = [p for p, _, eliminated in ranking_list if not eliminated]
+
+    lines = []
+    if scenario == 'all_solved':
+        lines.append("**Fin de partie : puzzle complété !**")
+    elif len(survivors) == 1:
+        winner: PlayerRef = survivors[0]
+        lines.append(f"{winner.mention} est le dernier survivant ! Fin de partie.")
+    else:
+        lines.append(f"C'est quoi ce scenario de Fin de partie ?")
+
+    lines.append(final_map)
+
+    pos = 1
+    for (player, sc, elim) in ranking_list:
+        st = "(Éliminé)" if elim else "(Survivant)"
+        lines.append(f"{pos}. {player.display_name} {st} - Drapeau trouvés: {sc}")
+        pos += 1
+
+    return lines
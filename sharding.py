@@ -0,0 +1,77 @@
+"""
+Déploiement shardé : plusieurs processus, chacun responsable de quelques
+shards de la passerelle Discord.
+
+Discord envoie les événements d'une guilde au shard (guild_id >> 22) % total :
+les commandes d'un salon arrivent donc toujours au processus qui tient le
+shard de sa guilde, qui est seul à jouer la partie. Les parties sont dans une
+base SQLite partagée (store.backend: sqlite) ; un bail par salon (voir
+store.SqliteGameStore) garantit qu'un seul processus les tient à la fois, y
+compris quand un shard change de processus (redémarrage, nouveau découpage).
+
+Usage : python sharding.py --shards 8 --processes 4
+        (lance 4 processus boomBot.py de 2 shards chacun)
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+from typing import Optional
+
+# Shards tenus par un processus, transmis par le lanceur (prioritaires sur config.yml)
+SHARD_COUNT_ENV = "BOOMBOT_SHARD_COUNT"
+SHARD_IDS_ENV = "BOOMBOT_SHARD_IDS"
+
+def shard_for_guild(guild_id: Optional[int], shard_count: int) -> int:
+    """
+    Shard qui reçoit les événements de la guilde (messages privés : shard 0).
+    """
+    if guild_id is None:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+def split_shards(shard_count: int, processes: int) -> list[list[int]]:
+    return [list(range(first, shard_count, processes)) for first in range(min(processes, shard_count))]
+
+def process_owner() -> str:
+    """
+    Identifiant de ce processus pour les bails des salons.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def shard_settings(config) -> tuple[int, Optional[list[int]]]:
+    """
+    (nombre total de shards, shards de ce processus ou None pour tous).
+    0 shard : pas de sharding, un seul processus comme avant.
+    """
+    count = int(os.environ.get(SHARD_COUNT_ENV) or config.get("sharding.count", 0))
+    ids = os.environ.get(SHARD_IDS_ENV)
+    if ids:
+        return count, [int(shard) for shard in ids.split(",")]
+    return count, config.get("sharding.ids")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, required=True, help="nombre total de shards")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    children = []
+    for shard_ids in split_shards(args.shards, args.processes):
+        env = {**os.environ, SHARD_COUNT_ENV: str(args.shards), SHARD_IDS_ENV: ",".join(map(str, shard_ids))}
+        children.append(subprocess.Popen([sys.executable, os.path.join(root, "boomBot.py")], env=env, cwd=root))
+        print(f"Processus {children[-1].pid} : shards {shard_ids}")
+
+    def stop(signum, frame):
+        for child in children:
+            child.send_signal(signal.SIGINT)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    sys.exit(max(child.wait() for child in children))
+
+if __name__ == "__main__":
+    main()
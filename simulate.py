@@ -0,0 +1,244 @@
+"""
+Simulations sans Discord : des parties entières jouées par des joueurs
+scriptés, avec les vraies règles (play_reveal, play_flag et
+finalize_and_rank de rules.py, comme le bot), réparties sur un pool de
+processus.
+
+Chaque processus joue un lot de parties et ne renvoie que des compteurs
+agrégés : la mémoire ne dépend pas du nombre de parties. Les statistiques
+(victoires par stratégie et par place dans l'ordre des tours, causes
+d'élimination, fins de partie, longueur des parties, coups et parties par
+seconde) sont affichées au fil des lots.
+
+Stratégies : "random" (coups au hasard, quelques drapeaux et révélations de
+drapeaux adverses) et "solver" (joue les déductions du solveur, pose ses
+drapeaux sur les bombes certaines et révèle les drapeaux adverses posés sur
+des cases sûres).
+
+Usage : python simulate.py [--games 100000] [--size 12] [--bombs 22] [--players random,random,solver,random]
+                           [--workers N] [--batch 500] [--seed 1]
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional
+from games import MinesweeperGame, GameData, HIDDEN, FLAGGED, seeded_turn_order
+from large_board import CLASSIC_MAX_SIZE
+from players import PlayerRef
+from rules import play_reveal, play_flag, finalize_and_rank, rank_players
+
+# Coup : ("r" ou "f", ligne, colonne), None si le joueur ne peut plus jouer
+Move = Optional[tuple[str, int, int]]
+
+def random_move(game: MinesweeperGame, player: PlayerRef, rng: random.Random) -> Move:
+    status = game.status
+    hidden = [idx for idx, s in enumerate(status) if s == HIDDEN]
+    opponents = [idx for idx, s in enumerate(status) if s == FLAGGED and game.flag_owner_of(idx) != player.id]
+    if game.first_click_done and opponents and (rng.random() < 0.05 or not hidden):
+        return ("r", *divmod(rng.choice(opponents), game.size))
+    if not hidden:
+        return None
+    kind = "f" if game.first_click_done and rng.random() < 0.25 else "r"
+    return (kind, *divmod(rng.choice(hidden), game.size))
+
+def solver_move(game: MinesweeperGame, player: PlayerRef, rng: random.Random) -> Move:
+    from solver import suggest
+    if not game.first_click_done:
+        return random_move(game, player, rng)
+    idx, _, result = suggest(game, budget=0.01)
+    status = game.status
+    # Drapeau adverse sur une case sûre : le révéler élimine son auteur
+    for safe in result.safe:
+        if status[safe] == FLAGGED and game.flag_owner_of(safe) != player.id:
+            return ("r", *divmod(safe, game.size))
+    mines = [mine for mine in result.mines if status[mine] == HIDDEN]
+    if mines:
+        return ("f", *divmod(min(mines), game.size))
+    if idx is not None:
+        return ("r", *divmod(idx, game.size))
+    return random_move(game, player, rng)
+
+STRATEGIES = {"random": random_move, "solver": solver_move}
+
+class SimulationStats:
+    """
+    Compteurs agrégés d'un ensemble de parties, fusionnables entre processus.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.moves = 0
+        # Temps de calcul cumulé des lots (somme sur les processus)
+        self.seconds = 0.0
+        # Par stratégie et par place dans l'ordre des tours : (parties jouées, victoires)
+        self.played = Counter()
+        self.wins = Counter()
+        self.played_by_position = Counter()
+        self.wins_by_position = Counter()
+        self.endings = Counter()
+        self.eliminations = Counter()
+        # Nombre de coups par partie -> nombre de parties
+        self.lengths = Counter()
+
+    def merge(self, other: "SimulationStats") -> None:
+        self.games += other.games
+        self.moves += other.moves
+        self.seconds += other.seconds
+        for name in ("played", "wins", "played_by_position", "wins_by_position", "endings", "eliminations", "lengths"):
+            getattr(self, name).update(getattr(other, name))
+
+    def length_quantile(self, q: float) -> int:
+        target = q * self.games
+        seen = 0
+        for length in sorted(self.lengths):
+            seen += self.lengths[length]
+            if seen >= target:
+                return length
+        return 0
+
+    def report(self, elapsed: float) -> str:
+        elapsed = max(elapsed, 1e-9)
+        games = max(1, self.games)
+        lines = [
+            f"{self.games} parties, {self.moves} coups en {elapsed:.1f} s : "
+            f"{self.games / elapsed:.0f} parties/s ({self.games / max(self.seconds, 1e-9):.0f} par cœur), "
+            f"{self.moves / elapsed:.0f} coups/s",
+            f"  longueur (coups) : p50 {self.length_quantile(0.5)}  p90 {self.length_quantile(0.9)}  "
+            f"moyenne {self.moves / max(1, self.games):.1f}",
+            "  fins : " + ", ".join(f"{ending} {count / games:.1%}" for ending, count in self.endings.most_common()),
+            "  éliminations par partie : " + ", ".join(
+                f"{cause} {count / games:.2f}" for cause, count in self.eliminations.most_common()),
+            "  victoires par stratégie : " + ", ".join(
+                f"{name} {self.wins[name] / max(1, self.played[name]):.1%}" for name in sorted(self.played)),
+            "  victoires par place : " + ", ".join(
+                f"{position + 1}e {self.wins_by_position[position] / max(1, self.played_by_position[position]):.1%}"
+                for position in sorted(self.played_by_position)),
+        ]
+        return "\n".join(lines)
+
+async def play_game(size: int, bomb_count: int, strategies: list[str], seed: int, stats: SimulationStats) -> None:
+    """
+    Joue une partie avec les règles du bot (rules.play_reveal / play_flag)
+    et l'ajoute aux statistiques.
+    """
+    rng = random.Random(seed)
+    game = MinesweeperGame(size=size, bomb_count=bomb_count, seed=seed)
+    players = [PlayerRef(seat + 1, f"{name}{seat + 1}") for seat, name in enumerate(strategies)]
+    turn_order = seeded_turn_order(players, seed)
+    position = {p.id: i for i, p in enumerate(turn_order)}
+    data: GameData = {
+        "game": game,
+        "turn_order": turn_order,
+        "current_player_index": 0,
+        "elimination_order": [],
+        "edit_in_place": False,
+        "render_mode": "text",
+        "board_message_ids": [],
+        "board_chunk_hashes": [],
+        "started_at": 0,
+    }
+
+    moves = 0
+    outcome = None
+    last_click = None
+    while moves < 4 * size * size:
+        player = data["turn_order"][data["current_player_index"]]
+        move = STRATEGIES[strategies[player.id - 1]](game, player, rng)
+        if move is None:
+            break
+        kind, r, c = move
+        moves += 1
+        last_click = (r, c)
+        # Même résolution que reveal_move / flag_move ; la graine tient lieu d'id de salon pour l'exécuteur
+        play = play_reveal if kind == "r" else play_flag
+        outcome = await play(seed, data, player, r, c)
+        for _, cause in outcome.eliminated:
+            stats.eliminations[cause] += 1
+        if outcome.ended:
+            break
+
+    stats.games += 1
+    stats.moves += moves
+    stats.lengths[moves] += 1
+    if outcome is None or not outcome.ended:
+        stats.endings["bloquée"] += 1
+        return
+    stats.endings[outcome.scenario] += 1
+    await finalize_and_rank(seed, data, scenario=outcome.scenario, last_click=last_click,
+                            bomb_clicked=outcome.bomb_clicked, safe_flag_clicked=kind == "r" and not outcome.bomb_clicked)
+    winner = rank_players(data)[0][0]
+    for p in players:
+        name = strategies[p.id - 1]
+        stats.played[name] += 1
+        stats.played_by_position[position[p.id]] += 1
+    stats.wins[strategies[winner.id - 1]] += 1
+    stats.wins_by_position[position[winner.id]] += 1
+
+def run_batch(size: int, bomb_count: int, strategies: list[str], seeds: range) -> SimulationStats:
+    """
+    Joue un lot de parties (dans un processus du pool) et retourne ses compteurs.
+    """
+    stats = SimulationStats()
+    start = time.perf_counter()
+
+    async def play_all():
+        for seed in seeds:
+            await play_game(size, bomb_count, strategies, seed, stats)
+
+    asyncio.run(play_all())
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+def simulate(games: int, size: int, bomb_count: int, strategies: list[str], workers: int, batch: int = 500,
+             seed: int = 1, report_every: float = 2.0) -> SimulationStats:
+    total = SimulationStats()
+    start = last_report = time.perf_counter()
+    base = seed << 32
+    batches = (range(base + first, base + min(first + batch, games)) for first in range(0, games, batch))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Deux lots en vol par processus : la file reste bornée
+        pending = set()
+        for seeds in batches:
+            pending.add(pool.submit(run_batch, size, bomb_count, strategies, seeds))
+            if len(pending) < 2 * workers:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                total.merge(future.result())
+            if time.perf_counter() - last_report >= report_every:
+                last_report = time.perf_counter()
+                print(total.report(last_report - start), flush=True)
+        for future in pending:
+            total.merge(future.result())
+    print(total.report(time.perf_counter() - start))
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--size", type=int, default=12)
+    parser.add_argument("--bombs", type=int, default=22)
+    parser.add_argument("--players", default="random,random", help="stratégie de chaque joueur (2 à 4)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch", type=int, default=500, help="parties par lot envoyé à un processus")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    strategies = args.players.split(",")
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown or not 2 <= len(strategies) <= 4:
+        parser.error(f"2 à 4 joueurs parmi {', '.join(STRATEGIES)}")
+    if args.games < 0:
+        parser.error("Le nombre de parties ne peut pas être négatif.")
+    if not 4 <= args.size <= CLASSIC_MAX_SIZE:
+        parser.error(f"Taille de grille entre 4 et {CLASSIC_MAX_SIZE}.")
+    if not 1 <= args.bombs <= args.size * args.size - 9:
+        parser.error(f"Entre 1 et {args.size * args.size - 9} bombes pour une grille {args.size}x{args.size}.")
+    simulate(args.games, args.size, args.bombs, strategies, args.workers, args.batch, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Format binaire versionné des parties.
+
+Partie (MinesweeperGame.to_bytes) :
+    "BM", version, drapeaux d'état, taille, bombes, graine,
+    table des joueurs (ids), drapeaux posés (index de case, n° de joueur),
+    plan des valeurs sur 4 bits par case, plan des statuts sur 2 bits par case,
+    puis le journal des coups (nombre de coups, enregistrements MOVE_RECORD).
+Grande carte (large_board.py) :
+    "BL", version, coin, lignes, colonnes, bombes, graine, puis le journal des
+    coups seul : la grille est reconstruite en le rejouant.
+Partie + tours (game_data_to_bytes) :
+    "BD", version, index du joueur courant, ordre des tours et des
+    éliminations (ids), options d'affichage, ids des messages de la carte,
+    noms affichés des joueurs (longueur sur un octet puis UTF-8), heure de
+    début de la partie (secondes Unix), puis la partie.
+
+Un instantané d'une autre version est refusé (ValueError).
+"""
+import struct
+from emojis import EMOJI_HEADER, EMOJIS_ENDGAME
+from games import MinesweeperGame, GameData, MOVE_RECORD
+from large_board import LargeMinesweeperGame
+from players import PlayerRef
+
+GAME_MAGIC = b"BM"
+GAME_DATA_MAGIC = b"BD"
+LARGE_GAME_MAGIC = b"BL"
+SNAPSHOT_VERSION = 1
+
+# magic, version, état (bit 0 : premier clic fait, bits 1-2 : emoji de coin, bit 3 : sans hasard),
+# taille, bombes, graine, nb de joueurs, nb de drapeaux
+GAME_HEADER = struct.Struct("<2sBBHHQBH")
+FLAG_ENTRY = struct.Struct("<IB")
+# magic, version, emoji de coin, lignes, colonnes, bombes, graine, nb de coups
+LARGE_GAME_HEADER = struct.Struct("<2sBBHHIQI")
+MOVE_COUNT = struct.Struct("<I")
+# magic, version, joueur courant, nb de joueurs, nb d'éliminés, nb de messages,
+# options (bit 0 : mode édition, bit 1 : rendu image)
+GAME_DATA_HEADER = struct.Struct("<2sBBBBBB")
+STARTED_AT = struct.Struct("<I")
+
+CORNERS = (EMOJI_HEADER[0], EMOJIS_ENDGAME[0], EMOJIS_ENDGAME[1])
+RENDER_MODES = ("text", "image")
+
+# Tables de dépaquetage : un octet -> 2 valeurs (4 bits) ou 4 statuts (2 bits)
+_NIBBLES = [bytes((b & 0xF, b >> 4)) for b in range(256)]
+_QUARTERS = [bytes((b & 3, (b >> 2) & 3, (b >> 4) & 3, b >> 6)) for b in range(256)]
+
+def pack_nibbles(plane: bytes) -> bytes:
+    padded = bytes(plane) + bytes(len(plane) % 2)
+    return bytes(lo | hi << 4 for lo, hi in zip(padded[0::2], padded[1::2]))
+
+def unpack_nibbles(packed: bytes, count: int) -> bytearray:
+    return bytearray(b"".join(map(_NIBBLES.__getitem__, packed))[:count])
+
+def pack_quarters(plane: bytes) -> bytes:
+    padded = bytes(plane) + bytes(-len(plane) % 4)
+    return bytes(
+        a | b << 2 | c << 4 | d << 6
+        for a, b, c, d in zip(padded[0::4], padded[1::4], padded[2::4], padded[3::4])
+    )
+
+def unpack_quarters(packed: bytes, count: int) -> bytearray:
+    return bytearray(b"".join(map(_QUARTERS.__getitem__, packed))[:count])
+
+def encode_game(game: MinesweeperGame) -> bytes:
+    if isinstance(game, LargeMinesweeperGame):
+        return encode_large_game(game)
+    # Toute case ayant porté un drapeau garde son propriétaire (même révélée)
+    flagged = [idx for idx, owner in enumerate(game.flag_owners) if owner]
+    corner = CORNERS.index(game.header[0]) if game.header[0] in CORNERS else 0
+    state = int(game.first_click_done) | corner << 1 | int(game.no_guess) << 3
+    parts = [
+        GAME_HEADER.pack(GAME_MAGIC, SNAPSHOT_VERSION, state, game.size, game.bomb_count,
+                         game.seed, len(game.owner_ids), len(flagged)),
+        struct.pack(f"<{len(game.owner_ids)}Q", *game.owner_ids),
+        b"".join(FLAG_ENTRY.pack(idx, game.flag_owners[idx]) for idx in flagged),
+        pack_nibbles(game.values),
+        pack_quarters(game.status),
+        MOVE_COUNT.pack(game.move_count),
+        bytes(game.move_log),
+    ]
+    return b"".join(parts)
+
+def decode_game(blob: bytes, cls=MinesweeperGame) -> MinesweeperGame:
+    if blob[:2] == LARGE_GAME_MAGIC:
+        return decode_large_game(blob)
+    if blob[:2] != GAME_MAGIC:
+        raise ValueError("Instantané de partie invalide")
+    _, version, state, size, bomb_count, seed, nb_players, nb_flags = GAME_HEADER.unpack_from(blob)
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Version d'instantané non supportée : {version}")
+
+    game = cls(size=size, bomb_count=bomb_count, seed=seed, no_guess=bool(state & 8))
+    cells = size * size
+    pos = GAME_HEADER.size
+    game.owner_ids = list(struct.unpack_from(f"<{nb_players}Q", blob, pos))
+    pos += 8 * nb_players
+    for _ in range(nb_flags):
+        idx, owner = FLAG_ENTRY.unpack_from(blob, pos)
+        game.flag_owners[idx] = owner
+        pos += FLAG_ENTRY.size
+    values_len = (cells + 1) // 2
+    game.values = unpack_nibbles(blob[pos:pos + values_len], cells)
+    pos += values_len
+    game.status = unpack_quarters(blob[pos:pos + (cells + 3) // 4], cells)
+    pos += (cells + 3) // 4
+    (nb_moves,) = MOVE_COUNT.unpack_from(blob, pos)
+    pos += MOVE_COUNT.size
+    game.move_log = bytearray(blob[pos:pos + nb_moves * MOVE_RECORD.size])
+    game.first_click_done = bool(state & 1)
+    game.header[0] = CORNERS[(state >> 1) & 3]
+    game.recount()
+    return game
+
+def encode_large_game(game: LargeMinesweeperGame) -> bytes:
+    corner = CORNERS.index(game.header[0]) if game.header[0] in CORNERS else 0
+    header = LARGE_GAME_HEADER.pack(LARGE_GAME_MAGIC, SNAPSHOT_VERSION, corner, game.rows, game.cols,
+                                    game.bomb_count, game.seed, game.move_count)
+    return header + bytes(game.move_log)
+
+def decode_large_game(blob: bytes) -> LargeMinesweeperGame:
+    from replay import apply_move
+    _, version, corner, rows, cols, bomb_count, seed, nb_moves = LARGE_GAME_HEADER.unpack_from(blob)
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Version d'instantané non supportée : {version}")
+    game = LargeMinesweeperGame(rows, cols, bomb_count, seed=seed)
+    end = LARGE_GAME_HEADER.size + nb_moves * MOVE_RECORD.size
+    for move in MOVE_RECORD.iter_unpack(blob[LARGE_GAME_HEADER.size:end]):
+        apply_move(game, move)
+    game.header[0] = CORNERS[corner]
+    return game
+
+def game_data_to_bytes(data: GameData) -> bytes:
+    """
+    Sérialise une partie avec l'ordre des tours : les joueurs sont stockés par
+    id et nom affiché.
+    """
+    players = [p.id for p in data["turn_order"]]
+    eliminated = [p.id for p in data["elimination_order"]]
+    names = b""
+    for p in (*data["turn_order"], *data["elimination_order"]):
+        name = p.display_name.encode()[:255]
+        names += bytes((len(name),)) + name
+    message_ids = data["board_message_ids"]
+    options = int(data["edit_in_place"]) | RENDER_MODES.index(data["render_mode"]) << 1
+    header = GAME_DATA_HEADER.pack(
+        GAME_DATA_MAGIC, SNAPSHOT_VERSION, data["current_player_index"],
+        len(players), len(eliminated), len(message_ids), options
+    )
+    ids = struct.pack(f"<{len(players) + len(eliminated) + len(message_ids)}Q", *players, *eliminated, *message_ids)
+    return header + ids + names + STARTED_AT.pack(int(data["started_at"])) + encode_game(data["game"])
+
+def game_data_from_bytes(blob: bytes) -> GameData:
+    """
+    Inverse de game_data_to_bytes : les joueurs sont rendus en PlayerRef.
+    """
+    if blob[:2] != GAME_DATA_MAGIC:
+        raise ValueError("Instantané de partie invalide")
+    _, version, current, nb_players, nb_eliminated, nb_messages, options = GAME_DATA_HEADER.unpack_from(blob)
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Version d'instantané non supportée : {version}")
+    count = nb_players + nb_eliminated + nb_messages
+    ids = struct.unpack_from(f"<{count}Q", blob, GAME_DATA_HEADER.size)
+    pos = GAME_DATA_HEADER.size + 8 * count
+    players = []
+    for player_id in ids[:nb_players + nb_eliminated]:
+        length = blob[pos]
+        players.append(PlayerRef(player_id, blob[pos + 1:pos + 1 + length].decode(errors="replace")))
+        pos += 1 + length
+    (started_at,) = STARTED_AT.unpack_from(blob, pos)
+    pos += STARTED_AT.size
+    message_ids = list(ids[nb_players + nb_eliminated:])
+    return {
+        "game": decode_game(blob[pos:]),
+        "turn_order": players[:nb_players],
+        "current_player_index": current,
+        "elimination_order": players[nb_players:],
+        "edit_in_place": bool(options & 1),
+        "render_mode": RENDER_MODES[(options >> 1) & 1],
+        "board_message_ids": message_ids,
+        # hash() des chaînes change d'un processus à l'autre : tout sera réédité une fois
+        "board_chunk_hashes": [0] * len(message_ids),
+        "started_at": started_at,
+    }
@@ -0,0 +1,302 @@
+"""
+Solveur et indices.
+
+Le solveur suit une partie coup par coup : il lit les nouvelles entrées du
+journal des coups et n'examine que les cases révélées depuis l'appel précédent
+(zone de propagation comprise). Il garde la frontière (cases chiffrées
+révélées ayant encore des voisines inconnues) et ses déductions d'un appel à
+l'autre.
+
+Chaque appel à solve() :
+1. règles simples (reste 0 -> voisines sûres, reste = inconnues -> bombes) et
+   règle des sous-ensembles entre contraintes voisines, jusqu'au point fixe ;
+2. énumération bornée des composantes indépendantes de la frontière pour
+   estimer la probabilité de bombe de chaque case (résultats gardés tant que
+   la composante ne change pas) ;
+le tout dans un budget de temps : au-delà, le résultat partiel est renvoyé.
+
+Les drapeaux des joueurs ne sont pas des informations : une case flaggée
+reste inconnue pour le solveur.
+"""
+import time
+from functools import lru_cache
+from typing import Optional
+from weakref import WeakKeyDictionary, ref
+from games import (
+    MinesweeperGame, DIRECTIONS, HIDDEN, REVEALED, BOMB, BOMB_E,
+    MOVE_REVEAL, MOVE_REVEAL_FLAGGED, MOVE_RECORD
+)
+
+# Au-delà de ce nombre de variables, une composante n'est pas énumérée
+MAX_COMPONENT_VARS = 24
+MAX_CACHED_COMPONENTS = 256
+
+@lru_cache(maxsize=8)
+def grid_neighbours(rows: int, cols: int) -> tuple[tuple[int, ...], ...]:
+    return tuple(
+        tuple(
+            (r + dr) * cols + c + dc
+            for dr, dc in DIRECTIONS
+            if 0 <= r + dr < rows and 0 <= c + dc < cols
+        )
+        for r in range(rows) for c in range(cols)
+    )
+
+class SolverResult:
+    __slots__ = ("safe", "mines", "probabilities", "complete", "default_probability")
+
+    def __init__(self, safe, mines, probabilities, complete, default_probability):
+        self.safe: set[int] = safe
+        self.mines: set[int] = mines
+        # Probabilité de bombe des cases de la frontière (composantes énumérées)
+        self.probabilities: dict[int, float] = probabilities
+        # False si le budget de temps a été dépassé avant la fin
+        self.complete: bool = complete
+        # Densité de bombes estimée pour une case hors frontière
+        self.default_probability: Optional[float] = default_probability
+
+class Solver:
+    def __init__(self, game: MinesweeperGame):
+        # Référence faible : le solveur est la valeur de _solvers, dont la partie est la clé
+        self._game = ref(game)
+        self.neighbours = grid_neighbours(game.rows, game.cols)
+        self.log_position = 0
+        self.known: set[int] = set()
+        self.frontier: set[int] = set()
+        self.safe: set[int] = set()
+        self.mines: set[int] = set()
+        self.components: dict[frozenset, dict[int, float]] = {}
+
+    @property
+    def game(self) -> MinesweeperGame:
+        return self._game()
+
+    def update(self) -> None:
+        """
+        Intègre les coups joués depuis le dernier appel.
+        """
+        game = self.game
+        log = game.move_log
+        start = self.log_position * MOVE_RECORD.size
+        for kind, r, c, _ in MOVE_RECORD.iter_unpack(log[start:]):
+            if kind == MOVE_REVEAL or kind == MOVE_REVEAL_FLAGGED:
+                self._absorb(r * game.cols + c)
+        self.log_position = len(log) // MOVE_RECORD.size
+
+    def _absorb(self, start: int) -> None:
+        # Les cases révélées par propagation sont retrouvées en suivant les zéros
+        status, values = self.game.status, self.game.values
+        stack = [start]
+        while stack:
+            idx = stack.pop()
+            if idx in self.known or status[idx] != REVEALED:
+                continue
+            self.known.add(idx)
+            self.safe.discard(idx)
+            value = values[idx]
+            if value == BOMB or value == BOMB_E:
+                self.mines.add(idx)
+            elif value == 0:
+                stack.extend(self.neighbours[idx])
+            else:
+                self.frontier.add(idx)
+
+    def _is_open(self, idx: int) -> bool:
+        return idx not in self.known and idx not in self.mines and idx not in self.safe
+
+    def _constraints(self) -> dict[int, tuple[frozenset[int], int]]:
+        """
+        Contrainte de chaque case de la frontière : (voisines indéterminées, bombes restantes).
+        """
+        values = self.game.values
+        constraints = {}
+        for idx in list(self.frontier):
+            unknown = frozenset(n for n in self.neighbours[idx] if self._is_open(n))
+            if not unknown:
+                self.frontier.discard(idx)
+                continue
+            mines = sum(1 for n in self.neighbours[idx] if n in self.mines)
+            constraints[idx] = (unknown, values[idx] - mines)
+        return constraints
+
+    def _propagate(self, deadline: float) -> bool:
+        """
+        Règles simples et des sous-ensembles jusqu'au point fixe.
+        Retourne False si le budget est dépassé.
+        """
+        changed = True
+        while changed:
+            if time.perf_counter() > deadline:
+                return False
+            changed = False
+            constraints = self._constraints()
+            by_var: dict[int, list[int]] = {}
+            for idx, (unknown, _) in constraints.items():
+                for var in unknown:
+                    by_var.setdefault(var, []).append(idx)
+
+            for idx, (unknown, remaining) in constraints.items():
+                if remaining == 0:
+                    self.safe |= unknown
+                    changed = True
+                elif remaining == len(unknown):
+                    self.mines |= unknown
+                    changed = True
+            if changed:
+                continue
+
+            for idx, (unknown, remaining) in constraints.items():
+                others = {other for var in unknown for other in by_var[var] if other != idx}
+                for other in others:
+                    other_unknown, other_remaining = constraints[other]
+                    if unknown < other_unknown:
+                        rest = other_unknown - unknown
+                        rest_mines = other_remaining - remaining
+                        if rest_mines == 0:
+                            self.safe |= rest
+                            changed = True
+                        elif rest_mines == len(rest):
+                            self.mines |= rest
+                            changed = True
+                if changed:
+                    break
+                if time.perf_counter() > deadline:
+                    return False
+        return True
+
+    def _components(self, constraints) -> list[list[int]]:
+        # Composantes connexes des contraintes, reliées par leurs variables communes
+        by_var: dict[int, list[int]] = {}
+        for idx, (unknown, _) in constraints.items():
+            for var in unknown:
+                by_var.setdefault(var, []).append(idx)
+        seen, components = set(), []
+        for idx in constraints:
+            if idx in seen:
+                continue
+            component, stack = [], [idx]
+            seen.add(idx)
+            while stack:
+                current = stack.pop()
+                component.append(current)
+                for var in constraints[current][0]:
+                    for other in by_var[var]:
+                        if other not in seen:
+                            seen.add(other)
+                            stack.append(other)
+            components.append(component)
+        return components
+
+    def _enumerate(self, component, constraints, deadline: float) -> Optional[dict[int, float]]:
+        """
+        Compte, pour chaque variable, les affectations cohérentes où elle porte une bombe.
+        """
+        variables = sorted({var for idx in component for var in constraints[idx][0]})
+        if len(variables) > MAX_COMPONENT_VARS:
+            return None
+        position = {var: i for i, var in enumerate(variables)}
+        checks = [([position[v] for v in constraints[idx][0]], constraints[idx][1]) for idx in component]
+        # Contraintes à vérifier dès que leur dernière variable est affectée
+        ready: list[list[tuple[list[int], int]]] = [[] for _ in variables]
+        for members, remaining in checks:
+            ready[max(members)].append((members, remaining))
+
+        assignment = [0] * len(variables)
+        hits = [0] * len(variables)
+        total = 0
+        steps = 0
+
+        def explore(i: int) -> bool:
+            nonlocal total, steps
+            steps += 1
+            if steps & 1023 == 0 and time.perf_counter() > deadline:
+                return False
+            if i == len(variables):
+                total += 1
+                for j, value in enumerate(assignment):
+                    hits[j] += value
+                return True
+            for value in (0, 1):
+                assignment[i] = value
+                if all(sum(assignment[m] for m in members) == remaining for members, remaining in ready[i]):
+                    if not explore(i + 1):
+                        return False
+            assignment[i] = 0
+            return True
+
+        if not explore(0) or total == 0:
+            return None
+        return {var: hits[i] / total for i, var in enumerate(variables)}
+
+    def solve(self, budget: float = 0.05) -> SolverResult:
+        deadline = time.perf_counter() + budget
+        self.update()
+        complete = self._propagate(deadline)
+
+        probabilities: dict[int, float] = {}
+        if complete:
+            constraints = self._constraints()
+            for component in self._components(constraints):
+                # Le résultat ne dépend que des contraintes : voisines inconnues et bombes restantes
+                key = frozenset(constraints[idx] for idx in component)
+                result = self.components.get(key)
+                if result is None:
+                    if time.perf_counter() > deadline:
+                        complete = False
+                        break
+                    result = self._enumerate(component, constraints, deadline)
+                    if result is None:
+                        complete = complete and time.perf_counter() <= deadline
+                        continue
+                    if len(self.components) >= MAX_CACHED_COMPONENTS:
+                        self.components.clear()
+                    self.components[key] = result
+                for var, p in result.items():
+                    # Bombe (ou case sûre) dans toutes les affectations cohérentes : c'est certain
+                    if p == 0.0:
+                        self.safe.add(var)
+                    elif p == 1.0:
+                        self.mines.add(var)
+                    else:
+                        probabilities[var] = p
+
+        game = self.game
+        open_cells = game.rows * game.cols - len(self.known) - len(self.mines) - len(self.safe)
+        outside = open_cells - len(probabilities)
+        expected = sum(probabilities.values())
+        left = game.bomb_count - len(self.mines) - expected
+        default = max(0.0, min(1.0, left / outside)) if outside > 0 else None
+        return SolverResult(set(self.safe), set(self.mines), probabilities, complete, default)
+
+_solvers: "WeakKeyDictionary[MinesweeperGame, Solver]" = WeakKeyDictionary()
+
+def solver_for(game: MinesweeperGame) -> Solver:
+    """
+    Solveur attaché à la partie, réutilisé d'un coup à l'autre.
+    """
+    solver = _solvers.get(game)
+    if solver is None:
+        solver = _solvers[game] = Solver(game)
+    return solver
+
+def suggest(game: MinesweeperGame, budget: float = 0.05) -> tuple[Optional[int], float, SolverResult]:
+    """
+    Meilleure case à révéler : (index de case, probabilité de bombe, résultat).
+    Une case sûre encore cachée si possible, sinon la moins risquée.
+    """
+    solver = solver_for(game)
+    result = solver.solve(budget)
+    status = game.status
+    hidden_safe = sorted(idx for idx in result.safe if status[idx] == HIDDEN)
+    if hidden_safe:
+        return hidden_safe[0], 0.0, result
+    candidates = {idx: p for idx, p in result.probabilities.items() if status[idx] == HIDDEN}
+    if candidates:
+        idx = min(candidates, key=candidates.get)
+        if result.default_probability is None or candidates[idx] <= result.default_probability:
+            return idx, candidates[idx], result
+    # Case hors frontière : toutes se valent, on prend la première cachée
+    for idx in range(game.rows * game.cols):
+        if status[idx] == HIDDEN and idx not in result.probabilities and solver._is_open(idx):
+            return idx, result.default_probability or 0.0, result
+    return None, 0.0, result
@@ -0,0 +1,357 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from games import GameData
+from snapshot import game_data_to_bytes, game_data_from_bytes
+
+class ChannelOwnedElsewhere(Exception):
+    """
+    La partie du salon est tenue par un autre processus (bail encore valide).
+    """
+
+class LeaseLost(ChannelOwnedElsewhere):
+    """
+    Écriture refusée : le bail du salon a été repris par un autre processus
+    pendant que la partie était en mémoire ici. Elle en a été retirée.
+    """
+
+class GameStore:
+    """
+    Parties en cours, indexées par id de salon.
+    `resident` contient les parties chargées en mémoire ; les sous-classes
+    persistantes implémentent _read/_write/_erase pour le stockage.
+    """
+    persistent = False
+
+    def __init__(self):
+        self.resident: dict[int, GameData] = {}
+        self.last_used: dict[int, float] = {}
+        # Verrou par salon (et nombre d'utilisateurs) : chargement, écriture,
+        # éviction et suppression d'une même partie ne se croisent pas
+        self.locks: dict[int, list] = {}
+        self.counters = {"fenced_writes": 0}
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self.resident
+
+    async def get(self, channel_id: int) -> Optional[GameData]:
+        """
+        Partie du salon, chargée depuis le stockage au premier accès.
+        """
+        data = self.resident.get(channel_id)
+        if data is None and self.persistent:
+            async with self._locked(channel_id):
+                # Un autre appel a pu charger la partie pendant l'attente du verrou
+                data = self.resident.get(channel_id)
+                if data is None:
+                    data = await self._load(channel_id)
+        if data is not None:
+            self.last_used[channel_id] = time.monotonic()
+        return data
+
+    async def put(self, channel_id: int, data: GameData) -> None:
+        if channel_id not in self.resident:
+            await self._acquire(channel_id)
+        self.resident[channel_id] = data
+        await self.save(channel_id, data)
+
+    async def save(self, channel_id: int, data: GameData) -> None:
+        """
+        À appeler après chaque coup. La partie est écrite même si elle vient
+        d'être évincée de la mémoire pendant le coup. Lève LeaseLost si un
+        autre processus a repris le salon : le coup n'est pas enregistré.
+        """
+        self.last_used[channel_id] = time.monotonic()
+        if self.persistent:
+            async with self._locked(channel_id):
+                await self._write(channel_id, game_data_to_bytes(data))
+
+    async def remove(self, channel_id: int) -> None:
+        self.resident.pop(channel_id, None)
+        self.last_used.pop(channel_id, None)
+        if self.persistent:
+            async with self._locked(channel_id):
+                await self._erase(channel_id)
+                await self._release(channel_id)
+
+    def idle_channels(self, max_idle: float) -> list[int]:
+        """
+        Salons dont la partie est inactive depuis max_idle secondes.
+        Sans stockage persistant, aucun : rien ne peut être évincé.
+        """
+        if not self.persistent:
+            return []
+        limit = time.monotonic() - max_idle
+        return [channel_id for channel_id, used in self.last_used.items() if used < limit]
+
+    async def evict(self, channel_id: int, max_idle: float) -> bool:
+        """
+        Sort une partie inactive de la mémoire. Elle reste sur disque et sera
+        rechargée au prochain coup. Retourne False si elle a été jouée ou
+        supprimée entre-temps.
+        """
+        async with self._locked(channel_id):
+            used = self.last_used.get(channel_id)
+            if used is None or used >= time.monotonic() - max_idle:
+                return False
+            data = self.resident.pop(channel_id, None)
+            del self.last_used[channel_id]
+            if data is not None:
+                await self._write(channel_id, game_data_to_bytes(data))
+            # Le bail n'est rendu qu'une fois l'instantané complet sur disque
+            await self._release(channel_id)
+        return True
+
+    async def evict_idle(self, max_idle: float) -> int:
+        """
+        Évince toutes les parties inactives depuis max_idle secondes.
+        """
+        evicted = 0
+        for channel_id in self.idle_channels(max_idle):
+            evicted += await self.evict(channel_id, max_idle)
+        return evicted
+
+    async def stored_games(self) -> list[tuple[int, float]]:
+        """
+        (salon, heure de la dernière écriture) des parties sur disque que ce
+        processus peut reprendre. Sans stockage persistant, aucune.
+        """
+        return []
+
+    async def renew_leases(self) -> list[int]:
+        """
+        Prolonge les bails des parties en mémoire. Celles dont le bail a été
+        repris par un autre processus sont oubliées ; retourne leurs salons.
+        """
+        return []
+
+    def close(self) -> None:
+        """
+        À l'arrêt du processus : rend les bails pour qu'un autre processus
+        reprenne les salons sans attendre leur expiration.
+        """
+
+    @asynccontextmanager
+    async def _locked(self, channel_id: int):
+        entry = self.locks.get(channel_id)
+        if entry is None:
+            entry = self.locks[channel_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.locks[channel_id]
+
+    async def _load(self, channel_id: int) -> Optional[GameData]:
+        # Salon sans partie (cas de tout !boom) : une lecture, pas de bail
+        blob = await self._read(channel_id)
+        if blob is None:
+            return None
+        if await self._acquire(channel_id):
+            # L'ancien propriétaire du bail a pu écrire depuis la première lecture
+            blob = await self._read(channel_id)
+            if blob is None:
+                await self._release(channel_id)
+                return None
+        data = game_data_from_bytes(blob)
+        self.resident[channel_id] = data
+        return data
+
+    async def _read(self, channel_id: int) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def _write(self, channel_id: int, blob: bytes) -> None:
+        raise NotImplementedError
+
+    async def _erase(self, channel_id: int) -> None:
+        raise NotImplementedError
+
+    async def _acquire(self, channel_id: int) -> bool:
+        """
+        Prend le bail du salon ; retourne False si le stockage n'en gère pas.
+        """
+        return False
+
+    async def _release(self, channel_id: int) -> None:
+        pass
+
+class MemoryGameStore(GameStore):
+    """
+    Comportement historique : tout reste en mémoire et disparaît au redémarrage.
+    """
+
+class SqliteGameStore(GameStore):
+    """
+    Instantané binaire de chaque partie dans SQLite (mode WAL), écrit après
+    chaque coup dans un thread pour ne pas bloquer la boucle d'événements.
+    Un numéro de version par salon empêche une écriture plus ancienne
+    d'écraser une plus récente si deux threads se croisent.
+
+    Avec owner (mode shardé, plusieurs processus sur la même base), chaque
+    salon est tenu par un seul processus à la fois grâce à un bail : pris au
+    chargement ou à la création de la partie, prolongé tant qu'elle reste en
+    mémoire, rendu à l'éviction, à la fin de partie et à l'arrêt. Un bail
+    expiré (processus tombé) peut être repris par le nouveau propriétaire du
+    shard, qui recharge la partie depuis la base. Les écritures d'un
+    processus qui a perdu le bail sont refusées : elles sont comptées
+    (fenced_writes), la partie est aussitôt retirée de la mémoire et
+    l'écriture lève LeaseLost.
+    """
+    persistent = True
+
+    def __init__(self, path: str = "games.sqlite3", owner: Optional[str] = None, lease_seconds: float = 30.0):
+        super().__init__()
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            " channel_id INTEGER PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " snapshot BLOB NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            " channel_id INTEGER PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self.lock = threading.Lock()
+        self.versions: dict[int, int] = {}
+
+    def _next_version(self, channel_id: int) -> int:
+        version = self.versions.get(channel_id, time.time_ns())
+        self.versions[channel_id] = version + 1
+        return version + 1
+
+    async def _read(self, channel_id: int) -> Optional[bytes]:
+        def read():
+            with self.lock:
+                row = self.conn.execute("SELECT snapshot FROM games WHERE channel_id = ?", (channel_id,)).fetchone()
+            return row[0] if row else None
+        return await asyncio.to_thread(read)
+
+    async def _write(self, channel_id: int, blob: bytes) -> None:
+        version = self._next_version(channel_id)
+        def write():
+            with self.lock:
+                if self.owner is not None:
+                    # Rien n'est écrit si le bail appartient à un autre processus
+                    cursor = self.conn.execute(
+                        "INSERT INTO games (channel_id, version, updated_at, snapshot)"
+                        " SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM leases WHERE channel_id = ? AND owner = ?)"
+                        " ON CONFLICT(channel_id) DO UPDATE SET"
+                        " version = excluded.version, updated_at = excluded.updated_at, snapshot = excluded.snapshot"
+                        " WHERE excluded.version > games.version",
+                        (channel_id, version, time.time(), blob, channel_id, self.owner)
+                    )
+                    # Aucune ligne écrite : bail perdu, ou version plus ancienne que celle en base
+                    return cursor.rowcount == 0 and self.conn.execute(
+                        "SELECT 1 FROM leases WHERE channel_id = ? AND owner = ?", (channel_id, self.owner)
+                    ).fetchone() is None
+                self.conn.execute(
+                    "INSERT INTO games (channel_id, version, updated_at, snapshot) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(channel_id) DO UPDATE SET"
+                    " version = excluded.version, updated_at = excluded.updated_at, snapshot = excluded.snapshot"
+                    " WHERE excluded.version > games.version",
+                    (channel_id, version, time.time(), blob)
+                )
+                return False
+        if await asyncio.to_thread(write):
+            self.counters["fenced_writes"] += 1
+            self.resident.pop(channel_id, None)
+            self.last_used.pop(channel_id, None)
+            raise LeaseLost(channel_id)
+
+    async def _erase(self, channel_id: int) -> None:
+        self.versions.pop(channel_id, None)
+        def erase():
+            with self.lock:
+                self.conn.execute("DELETE FROM games WHERE channel_id = ?", (channel_id,))
+        await asyncio.to_thread(erase)
+
+    def _take_leases(self, channel_ids) -> set[int]:
+        """
+        Prend ou prolonge les bails : libres, expirés ou déjà à nous.
+        Retourne les salons effectivement tenus.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO leases (channel_id, owner, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(channel_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                [(channel_id, self.owner, now + self.lease_seconds, now) for channel_id in channel_ids]
+            )
+            held = self.conn.execute(
+                "SELECT channel_id FROM leases WHERE owner = ? AND expires_at > ?", (self.owner, now)
+            ).fetchall()
+        return {channel_id for (channel_id,) in held}
+
+    async def _acquire(self, channel_id: int) -> bool:
+        if self.owner is None:
+            return False
+        held = await asyncio.to_thread(self._take_leases, (channel_id,))
+        if channel_id not in held:
+            raise ChannelOwnedElsewhere(channel_id)
+        # La version en base a pu avancer chez l'ancien propriétaire
+        self.versions.pop(channel_id, None)
+        return True
+
+    async def _release(self, channel_id: int) -> None:
+        if self.owner is None:
+            return
+        def release():
+            with self.lock:
+                self.conn.execute("DELETE FROM leases WHERE channel_id = ? AND owner = ?", (channel_id, self.owner))
+        await asyncio.to_thread(release)
+
+    async def stored_games(self) -> list[tuple[int, float]]:
+        def read():
+            with self.lock:
+                if self.owner is None:
+                    return self.conn.execute("SELECT channel_id, updated_at FROM games").fetchall()
+                # Les parties tenues par un autre processus vivant ne sont pas à nous
+                return self.conn.execute(
+                    "SELECT games.channel_id, games.updated_at FROM games"
+                    " LEFT JOIN leases ON leases.channel_id = games.channel_id"
+                    " WHERE leases.owner IS NULL OR leases.owner = ? OR leases.expires_at < ?",
+                    (self.owner, time.time())
+                ).fetchall()
+        return await asyncio.to_thread(read)
+
+    async def renew_leases(self) -> list[int]:
+        if self.owner is None or not self.resident:
+            return []
+        channel_ids = list(self.resident)
+        held = await asyncio.to_thread(self._take_leases, channel_ids)
+        lost = [channel_id for channel_id in channel_ids if channel_id not in held]
+        for channel_id in lost:
+            self.resident.pop(channel_id, None)
+            self.last_used.pop(channel_id, None)
+        return lost
+
+    def close(self) -> None:
+        if self.owner is not None:
+            with self.lock:
+                self.conn.execute("DELETE FROM leases WHERE owner = ?", (self.owner,))
+        self.conn.close()
+
+def create_game_store(backend: str = "memory", path: str = "games.sqlite3", owner: Optional[str] = None,
+                      lease_seconds: float = 30.0) -> GameStore:
+    if backend == "sqlite":
+        return SqliteGameStore(path, owner=owner, lease_seconds=lease_seconds)
+    if owner is not None:
+        raise ValueError("Le mode shardé demande un stockage partagé (store.backend: sqlite).")
+    if backend == "memory":
+        return MemoryGameStore()
+    raise ValueError(f"Backend de stockage inconnu : {backend}")
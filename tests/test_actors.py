@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+from actors import ChannelActors
+
+def context(channel_id: int, author_id: int):
+    return SimpleNamespace(channel=SimpleNamespace(id=channel_id), author=SimpleNamespace(id=author_id))
+
+def test_commands_of_a_channel_never_interleave():
+    actors = ChannelActors()
+    log = []
+
+    @actors.serialized
+    async def command(ctx, name):
+        log.append(("début", ctx.channel.id, name))
+        await asyncio.sleep(0.01)
+        log.append(("fin", ctx.channel.id, name))
+
+    async def run():
+        await asyncio.gather(*(command(context(1, author), str(author)) for author in range(4)),
+                             command(context(2, 9), "autre"))
+
+    asyncio.run(run())
+    channel_one = [entry for entry in log if entry[1] == 1]
+    assert channel_one == [(step, 1, str(author)) for author in range(4) for step in ("début", "fin")]
+    # L'autre salon avance pendant ce temps
+    assert log.index(("début", 2, "autre")) < log.index(("fin", 1, "0"))
+    assert actors.workers == {} and actors.queues == {}
+
+def test_identical_pending_command_is_dropped():
+    actors = ChannelActors()
+    calls = []
+
+    @actors.serialized
+    async def command(ctx, case):
+        calls.append(case)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        ctx = context(1, 5)
+        await asyncio.gather(command(ctx, "A1"), command(ctx, "A1"), command(ctx, "B2"), command(context(1, 6), "A1"))
+
+    asyncio.run(run())
+    assert calls == ["A1", "B2", "A1"]
+    assert actors.counters["duplicates"] == 1
+
+def test_expired_commands_are_skipped():
+    actors = ChannelActors(max_age=0.005)
+    calls = []
+
+    async def run():
+        async def slow():
+            calls.append("lent")
+            await asyncio.sleep(0.05)
+        first = actors.submit(1, ("a",), slow)
+        second = actors.submit(1, ("b",), lambda: asyncio.sleep(0))
+        return await first, await second
+
+    # La première n'a pas attendu ; la seconde a attendu la première
+    assert asyncio.run(run()) == (True, False)
+    assert calls == ["lent"]
+    assert actors.counters["expired"] == 1
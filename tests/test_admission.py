@@ -0,0 +1,32 @@
+import asyncio
+from admission import AdmissionControl
+
+def test_games_without_guild_only_count_against_global_limit():
+    # Messages privés (guilde None) : pas de limite par serveur
+    admission = AdmissionControl(max_games=0, max_games_per_guild=2, max_loop_lag=0)
+
+    async def run():
+        for channel_id in range(10):
+            assert await admission.admit(channel_id, None) is None
+        assert await admission.admit(100, 7) is None
+        assert await admission.admit(101, 7) is None
+        assert await admission.admit(102, 7) is not None
+
+    asyncio.run(run())
+    stats = admission.stats()
+    assert stats["live_games"] == 12
+    assert stats["guilds"] == 1
+    assert stats["rejected_guild"] == 1
+
+def test_release_frees_guild_slot():
+    admission = AdmissionControl(max_games=0, max_games_per_guild=1, max_loop_lag=0)
+
+    async def run():
+        assert await admission.admit(1, 7) is None
+        assert await admission.admit(2, 7) is not None
+        admission.release(1)
+        admission.release(3)
+        assert await admission.admit(2, 7) is None
+
+    asyncio.run(run())
+    assert admission.per_guild[7] == 1
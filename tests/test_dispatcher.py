@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+from discord.errors import HTTPException
+from dispatcher import OutboundDispatcher
+
+def http_error(status, retry_after=None):
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+    return HTTPException(SimpleNamespace(status=status, reason="", headers=headers), "erreur")
+
+class Channel:
+    _ids = itertools.count(1)
+
+    def __init__(self, failures=()):
+        self.id = next(self._ids)
+        self.sent = []
+        self.edited = []
+        # Erreurs levées par les premiers envois, dans l'ordre
+        self.failures = list(failures)
+
+    async def send(self, content=None, **kwargs):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append(content)
+        return SimpleNamespace(id=len(self.sent))
+
+    def get_partial_message(self, message_id):
+        channel = self
+
+        class Partial:
+            async def edit(self, content=None, **kwargs):
+                channel.edited.append((message_id, content))
+        return Partial()
+
+def test_posts_in_the_window_are_merged_up_to_the_limit():
+    dispatcher = OutboundDispatcher(window=0.01, limit=25, rate=1000)
+    channel = Channel()
+
+    async def run():
+        futures = [dispatcher.send(channel, text) for text in ("un", "deux", "trois", "x" * 20, "fin")]
+        separate = dispatcher.send(channel, "seul", mergeable=False)
+        results = await asyncio.gather(*futures, separate)
+        assert results[0] is results[1] is results[2]
+        assert results[3] is results[4]
+
+    asyncio.run(run())
+    assert channel.sent == ["un\ndeux\ntrois", "x" * 20 + "\nfin", "seul"]
+    assert dispatcher.counters["merged"] == 3
+    assert not dispatcher.workers and not dispatcher.queues
+
+def test_successive_edits_of_a_message_keep_the_last():
+    dispatcher = OutboundDispatcher(window=0.01, rate=1000)
+    channel = Channel()
+
+    async def run():
+        await asyncio.gather(*(dispatcher.edit(channel, 7, f"v{i}") for i in range(4)), dispatcher.edit(channel, 8, "autre"))
+
+    asyncio.run(run())
+    assert channel.edited == [(7, "v3"), (8, "autre")]
+
+def test_rate_limited_sends_are_retried():
+    dispatcher = OutboundDispatcher(window=0, rate=1000, backoff=0.01)
+    channel = Channel(failures=[http_error(429, 0.01), http_error(429)])
+
+    async def run():
+        return await dispatcher.send(channel, "bonjour")
+
+    message = asyncio.run(run())
+    assert message.id == 1
+    assert channel.sent == ["bonjour"]
+    assert dispatcher.counters["rate_limited"] == 2
+
+def test_other_errors_and_exhausted_retries_fail_the_future():
+    dispatcher = OutboundDispatcher(window=0, rate=1000, backoff=0.001, max_retries=2)
+    forbidden = Channel(failures=[http_error(403)])
+    throttled = Channel(failures=[http_error(429)] * 3)
+
+    async def run():
+        results = await asyncio.gather(dispatcher.send(forbidden, "a"), dispatcher.send(throttled, "b"),
+                                       return_exceptions=True)
+        assert all(isinstance(result, HTTPException) for result in results)
+
+    asyncio.run(run())
+    assert forbidden.sent == throttled.sent == []
+    assert dispatcher.counters["failed"] == 2
+
+def test_idle_channel_buckets_are_swept():
+    dispatcher = OutboundDispatcher(window=0, rate=1000, per=0.01)
+    dispatcher.bucket_sweep_at = 4
+
+    async def run():
+        for _ in range(4):
+            await dispatcher.send(Channel(), "x")
+            await asyncio.sleep(0.02)
+
+    asyncio.run(run())
+    # Le 4e seau déclenche la purge : tous sont revenus pleins (per très court)
+    assert dispatcher.buckets == {}
+    assert dispatcher.bucket_sweep_at == 1024
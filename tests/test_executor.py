@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from executor import GameExecutor
+from games import MinesweeperGame
+
+def test_jobs_are_serialized_per_channel():
+    executor = GameExecutor(heavy_cells=1)
+    game = MinesweeperGame(size=5, bomb_count=3, seed=1)
+    order = []
+
+    async def run():
+        jobs = [executor.run(7, game, order.append, i) for i in range(5)]
+        await asyncio.gather(*jobs)
+        assert executor.workers == {} and executor.queues == {}
+
+    asyncio.run(run())
+    executor.shutdown()
+    assert order == list(range(5))
+    assert executor.counters["offloaded"] == 5
+
+def test_forget_cancels_pending_jobs_and_frees_the_channel():
+    executor = GameExecutor(heavy_cells=1)
+    game = MinesweeperGame(size=5, bomb_count=3, seed=1)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return "en cours"
+
+    async def run():
+        first = asyncio.ensure_future(executor.run(7, game, blocking))
+        pending = asyncio.ensure_future(executor.run(7, game, lambda: "annulé"))
+        await asyncio.to_thread(started.wait, 5)
+        executor.forget(7)
+        release.set()
+        assert 7 not in executor.workers and 7 not in executor.queues
+        # Nouvelle partie dans le même salon : son propre travailleur
+        assert await executor.run(7, game, lambda: "nouvelle") == "nouvelle"
+        assert await first == "en cours"
+        assert pending.cancelled()
+        await asyncio.sleep(0)
+        assert executor.workers == {} and executor.queues == {}
+
+    asyncio.run(run())
+    executor.shutdown()
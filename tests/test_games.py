@@ -0,0 +1,147 @@
+import random
+from collections import deque
+import pytest
+from games import (
+    MinesweeperGame, DIRECTIONS, BOMB, adjacent_counts_numpy, adjacent_counts_python, neighbour_table, np
+)
+
+class DictBoard:
+    """
+    Ancien modèle : un dict par case, "b" pour une bombe. Il reçoit la même
+    disposition de bombes que la partie comparée.
+    """
+
+    def __init__(self, size, bombs):
+        self.size = size
+        self.board = {(r, c): {"value": 0, "status": "hidden", "flag_owner": None}
+                      for r in range(size) for c in range(size)}
+        for idx in bombs:
+            self.board[divmod(idx, size)]["value"] = "b"
+        for (r, c), cell in self.board.items():
+            if cell["value"] != "b":
+                cell["value"] = sum(1 for dr, dc in DIRECTIONS
+                                    if self.board.get((r + dr, c + dc), {}).get("value") == "b")
+
+    def reveal(self, r, c):
+        cell = self.board[(r, c)]
+        if cell["status"] != "hidden":
+            return
+        cell["status"] = "revealed"
+        if cell["value"] != 0:
+            return
+        queue = deque([(r, c)])
+        while queue:
+            rr, cc = queue.popleft()
+            for dr, dc in DIRECTIONS:
+                neigh = self.board.get((rr + dr, cc + dc))
+                if neigh and neigh["status"] == "hidden" and neigh["value"] != "b":
+                    neigh["status"] = "revealed"
+                    if neigh["value"] == 0:
+                        queue.append((rr + dr, cc + dc))
+
+    def flag(self, r, c, user_id):
+        cell = self.board[(r, c)]
+        if cell["status"] == "hidden":
+            cell["status"] = "flagged"
+            cell["flag_owner"] = user_id
+
+    def reveal_flagged(self, r, c):
+        cell = self.board[(r, c)]
+        if cell["status"] == "flagged":
+            cell["status"] = "revealed"
+
+def play_both(seed, size=12, bomb_count=22, moves=60):
+    rng = random.Random(seed)
+    game = MinesweeperGame(size=size, bomb_count=bomb_count, seed=seed)
+    first = (rng.randrange(size), rng.randrange(size))
+    game.reveal_case(*first, 1)
+    reference = DictBoard(size, [idx for idx, v in enumerate(game.values) if v == BOMB])
+    reference.reveal(*first)
+    yield game, reference
+    for _ in range(moves):
+        r, c = rng.randrange(size), rng.randrange(size)
+        user = rng.choice((1, 2, 3))
+        roll = rng.random()
+        if roll < 0.6:
+            game.reveal_case(r, c, user)
+            reference.reveal(r, c)
+        elif roll < 0.9:
+            game.flag_case(r, c, user)
+            reference.flag(r, c, user)
+        else:
+            game.reveal_flagged_case(r, c, user)
+            reference.reveal_flagged(r, c)
+        yield game, reference
+
+def test_planes_match_dict_model():
+    for seed in range(30):
+        for game, reference in play_both(seed):
+            assert {coords: dict(cell) for coords, cell in game.board.items()} == reference.board
+
+def test_first_click_and_neighbours_are_never_bombs():
+    for seed in range(50):
+        game = MinesweeperGame(size=8, bomb_count=40, seed=seed)
+        game.reveal_case(0, 7)
+        assert sum(1 for v in game.values if v == BOMB) == 40
+        assert all(game.board[(r, c)]["value"] != "b" for r in (0, 1) for c in (6, 7))
+
+def test_unknown_ending_is_refused_before_touching_the_board():
+    game = MinesweeperGame(size=8, bomb_count=10, seed=1)
+    game.reveal_case(4, 4)
+    status, header = bytes(game.status), list(game.header)
+    with pytest.raises(ValueError):
+        game.finalize_endgame(None)
+    assert bytes(game.status) == status and game.header == header
+
+def scanned_counters(reference, users):
+    """
+    Compteurs calculés comme avant, en parcourant toutes les cases.
+    """
+    cells = reference.board.values()
+    flags = sum(1 for cell in cells if cell["status"] == "flagged")
+    by_user = {user: sum(1 for cell in cells if cell["status"] == "flagged" and cell["flag_owner"] == user
+                         and cell["value"] == "b") for user in users}
+    safe_done = all(cell["status"] in ("revealed", "flagged") for cell in cells if cell["value"] != "b")
+    return flags, by_user, safe_done
+
+def test_running_counters_match_full_scans():
+    users = (1, 2, 3)
+    for seed in range(30):
+        for game, reference in play_both(seed, size=6, bomb_count=5, moves=80):
+            flags, by_user, solved = scanned_counters(reference, users)
+            assert game.count_all_flags() == flags
+            assert {user: game.count_flags_by_user(user) for user in users} == by_user
+            assert game.is_all_safe_revealed() == (solved and flags <= game.bomb_count)
+
+def test_recount_rebuilds_running_counters():
+    for seed in range(10):
+        for game, _ in play_both(seed):
+            pass
+        counters = (game.safe_cells_done, game.flag_total, {k: v for k, v in game.correct_flags.items() if v})
+        game.recount()
+        assert (game.safe_cells_done, game.flag_total, game.correct_flags) == counters
+
+@pytest.mark.parametrize("size", (1, 2, 5, 12, 16))
+def test_neighbour_table_matches_directions(size):
+    table = neighbour_table(size)
+    for r in range(size):
+        for c in range(size):
+            expected = {(r + dr) * size + c + dc for dr, dc in DIRECTIONS
+                        if 0 <= r + dr < size and 0 <= c + dc < size}
+            assert set(table[r * size + c]) == expected
+            assert len(table[r * size + c]) == len(expected)
+
+@pytest.mark.parametrize("size", (5, 12, 16, 30))
+def test_adjacent_counts_match_per_cell_count(size):
+    rng = random.Random(size)
+    bombs = rng.sample(range(size * size), size * size // 5)
+    values = adjacent_counts_python(size, bombs)
+    for idx, value in enumerate(values):
+        r, c = divmod(idx, size)
+        if idx in bombs:
+            assert value == BOMB
+        else:
+            assert value == sum(1 for dr, dc in DIRECTIONS
+                                if 0 <= r + dr < size and 0 <= c + dc < size and (r + dr) * size + c + dc in bombs)
+    if np is not None:
+        assert adjacent_counts_numpy(size, bombs) == values
@@ -0,0 +1,77 @@
+import asyncio
+import sqlite3
+from games import MinesweeperGame
+from history import GameHistory
+from players import PlayerRef
+
+def finished_game(seed: int) -> dict:
+    winner, loser = PlayerRef(1, "alice"), PlayerRef(2, "bob")
+    return {
+        "game": MinesweeperGame(size=8, bomb_count=10, seed=seed),
+        "turn_order": [winner],
+        "elimination_order": [loser],
+        "started_at": None,
+    }
+
+def test_games_without_guild_stay_off_the_leaderboards(tmp_path):
+    history = GameHistory(str(tmp_path / "history.sqlite3"))
+
+    async def run():
+        history.record(42, 10, finished_game(1), "one_left")
+        history.record(None, 11, finished_game(2), "one_left")
+        assert await history.flush() == 2
+        assert (await history.player_stats(42, 1))["games"] == 1
+        assert await history.player_stats(None, 1) is None
+        assert await history.top(None) == []
+
+    asyncio.run(run())
+    guilds = [row[0] for row in history.conn.execute("SELECT guild_id FROM games ORDER BY id")]
+    assert guilds == [42, None]
+    assert history.conn.execute("SELECT DISTINCT guild_id FROM leaderboard").fetchall() == [(42,)]
+    history.close()
+
+def test_failed_batches_are_counted(tmp_path):
+    history = GameHistory(str(tmp_path / "history.sqlite3"))
+
+    def fail(batch):
+        raise sqlite3.OperationalError("disk I/O error")
+    history._write = fail
+
+    async def run():
+        history.record(42, 10, finished_game(1), "one_left")
+        assert await history.flush() == 0
+
+    asyncio.run(run())
+    assert history.counters["dropped"] == 1
+    assert history.counters["write_errors"] == 1
+    history.close()
+
+def test_reads_merge_the_buffer_without_writing(tmp_path):
+    history = GameHistory(str(tmp_path / "history.sqlite3"), flush_interval=3600)
+
+    async def run():
+        history.record(42, 10, finished_game(1), "one_left")
+        assert await history.flush() == 1
+        history.record(42, 11, finished_game(2), "one_left")
+        carol = PlayerRef(3, "carol")
+        third = finished_game(3)
+        third["turn_order"] = [carol]
+        history.record(42, 12, third, "one_left")
+        alice = await history.player_stats(42, 1)
+        assert (alice["games"], alice["wins"]) == (2, 2)
+        assert (await history.player_stats(42, 3))["games"] == 1
+        assert [(name, wins, games) for name, wins, games, _ in await history.top(42)] == [
+            ("alice", 2, 2), ("carol", 1, 1), ("bob", 0, 3)]
+        # Rien n'a été écrit par les lectures
+        assert len(history.buffer) == 2
+        history.task.cancel()
+
+    asyncio.run(run())
+    assert history.counters["written"] == 1
+    history.close()
+
+def test_history_is_disabled_without_a_path():
+    history = GameHistory()
+    assert not history.enabled
+    history.record(42, 10, finished_game(1), "one_left")
+    assert not history.buffer
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("PIL")
+
+from io import BytesIO
+from PIL import Image
+from games import MinesweeperGame
+from image_renderer import BoardImageRenderer, TILE_SIZE
+from large_board import VIEW_SIZE, LargeMinesweeperGame
+
+def image_size(png: bytes) -> tuple[int, int]:
+    with Image.open(BytesIO(png)) as image:
+        return image.size
+
+def test_classic_board_is_rendered_whole():
+    game = MinesweeperGame(size=9, bomb_count=10, seed=3)
+    game.reveal_case(4, 4, 1)
+    _, png = BoardImageRenderer().render_png(game)
+    assert image_size(png) == (10 * TILE_SIZE, 10 * TILE_SIZE)
+
+def test_large_board_renders_its_viewport_without_creating_chunks():
+    game = LargeMinesweeperGame(60, 90, 300, seed=1)
+    game.reveal_case(30, 45, 1)
+    chunks = set(game.chunks)
+    renderer = BoardImageRenderer()
+    state, png = renderer.render_png(game, cache_key=1)
+    assert image_size(png) == ((VIEW_SIZE + 1) * TILE_SIZE, (VIEW_SIZE + 1) * TILE_SIZE)
+    game.view = (0, 0)
+    moved, _ = renderer.render_png(game, cache_key=1)
+    assert moved != state
+    assert set(game.chunks) == chunks
+
+def test_labels_follow_the_viewport():
+    game = LargeMinesweeperGame(60, 90, 300, seed=1)
+    game.reveal_case(30, 45, 1)
+    renderer = BoardImageRenderer()
+    _, first = renderer.render_png(game)
+    game.view = (50, 80)
+    renderer.render_png(game)
+    game.view = (30, 45)
+    # Même toile réutilisée : les étiquettes de l'autre fenêtre ont été effacées
+    assert renderer.render_png(game)[1] == first
+    assert BoardImageRenderer().render_png(game)[1] == first
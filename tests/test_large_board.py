@@ -0,0 +1,47 @@
+from collections import deque
+from games import DIRECTIONS, HIDDEN, REVEALED, BOMB
+from large_board import CHUNK, LargeMinesweeperGame
+
+def flood_reference(values, rows, cols, start):
+    """
+    Cases révélées par un clic sur une grille plate : la case, puis la propagation depuis les zéros.
+    """
+    revealed, queue = {start}, deque([start])
+    while queue:
+        r, c = queue.popleft()
+        if values[r * cols + c] != 0:
+            continue
+        for dr, dc in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and (nr, nc) not in revealed and values[nr * cols + nc] != BOMB:
+                revealed.add((nr, nc))
+                queue.append((nr, nc))
+    return revealed
+
+def test_flood_crosses_chunks_like_a_flat_board():
+    rows, cols = 70, 45
+    for seed in range(5):
+        game = LargeMinesweeperGame(rows, cols, 60, seed=seed)
+        game.reveal_case(33, 20, 1)
+        status = list(game.status)
+        # Lire toutes les valeurs crée les morceaux restants, sans toucher aux statuts
+        values = list(game.values)
+        expected = flood_reference(values, rows, cols, (33, 20))
+        revealed = {divmod(idx, cols) for idx, s in enumerate(status) if s == REVEALED}
+        assert revealed == expected
+        assert len({game.chunk_key(r, c) for r, c in revealed}) > 1
+        assert game.safe_cells_done == len(revealed)
+
+def test_end_of_game_only_creates_shown_chunks():
+    game = LargeMinesweeperGame(200, 200, 6000, seed=3)
+    game.reveal_case(100, 100, 1)
+    created = set(game.chunks)
+    game.finalize_endgame("one_left", last_click=(5, 190))
+    window = game.renderer.window()
+    assert len(game.chunks) < (200 // CHUNK + 1) ** 2
+    assert set(game.chunks) - created <= {game.chunk_key(r, c) for r in (window[0], window[2] - 1)
+                                          for c in (window[1], window[3] - 1)}
+    for key, chunk in game.chunks.items():
+        for local, value in enumerate(chunk.values):
+            if value == BOMB:
+                assert chunk.status[local] != HIDDEN
@@ -0,0 +1,91 @@
+import asyncio
+import itertools
+import random
+from types import SimpleNamespace
+import pytest
+from dispatcher import DISCORD_MESSAGE_LIMIT, outbound
+from emojis import EMOJIS_ENDGAME
+from games import MinesweeperGame, CELL_EMOJIS
+from utils import board_chunks, pack_lines, show_board
+
+def test_pack_lines_respects_limit_and_keeps_content():
+    rng = random.Random(1)
+    for _ in range(200):
+        lines = ["x" * rng.choice((1, 50, 400, 1999, 2000, 2001, 4500)) for _ in range(rng.randrange(1, 15))]
+        messages = pack_lines(lines)
+        assert all(0 < len(message) <= DISCORD_MESSAGE_LIMIT for message in messages)
+        # Sans ligne trop longue, le découpage ne fait que remplacer des "\n" par des frontières de message
+        if all(len(line) <= DISCORD_MESSAGE_LIMIT for line in lines):
+            assert "\n".join(messages) == "\n".join(lines)
+
+def test_pack_lines_fills_messages():
+    lines = ["y" * 999] * 6
+    assert pack_lines(lines) == ["\n".join(["y" * 999] * 2)] * 3
+    assert pack_lines(["a", "b", "c"], limit=3) == ["a\nb", "c"]
+    assert pack_lines(["z" * 5], limit=2) == ["zz", "zz", "z"]
+
+@pytest.mark.parametrize("size", range(5, 17))
+def test_edit_chunks_fit_whatever_the_board_shows(size):
+    game = MinesweeperGame(size=size, bomb_count=size)
+    # Contenu le plus long possible dans chaque case, coin de fin de partie compris
+    widest = max(((status, value) for status in range(len(CELL_EMOJIS)) for value in range(len(CELL_EMOJIS[status]))),
+                 key=lambda sv: len(CELL_EMOJIS[sv[0]][sv[1]]))
+    game.status = bytearray([widest[0]]) * (size * size)
+    game.values = bytearray([widest[1]]) * (size * size)
+    game.header[0] = max(EMOJIS_ENDGAME.values(), key=len)
+    game.renderer.mark_all_dirty()
+    chunks = board_chunks(game)
+    assert all(len(chunk) <= DISCORD_MESSAGE_LIMIT for chunk in chunks)
+    assert "\n".join(chunks) == game.print_board_text()
+
+class EditChannel:
+    """
+    Salon factice : les éditions des messages listés dans failing lèvent l'erreur associée.
+    """
+
+    def __init__(self):
+        self.id = 1
+        self.ids = itertools.count(100)
+        self.edits = []
+        self.failing = {}
+
+    async def send(self, content=None, **kwargs):
+        return SimpleNamespace(id=next(self.ids))
+
+    def get_partial_message(self, message_id):
+        channel = self
+
+        class Partial:
+            async def edit(self, content=None, **kwargs):
+                error = channel.failing.pop(message_id, None)
+                if error is not None:
+                    raise error
+                channel.edits.append(message_id)
+        return Partial()
+
+def test_failed_chunk_edit_is_retried(monkeypatch, capsys):
+    monkeypatch.setattr(outbound, "window", 0)
+    monkeypatch.setattr(outbound, "rate", 1000)
+    game = MinesweeperGame(size=16, bomb_count=40, seed=2)
+    channel = EditChannel()
+    ctx = SimpleNamespace(channel=channel)
+    data = {"game": game, "edit_in_place": True, "render_mode": "text", "board_message_ids": [], "board_chunk_hashes": []}
+
+    async def run():
+        await show_board(ctx, data)
+        first_ids = list(data["board_message_ids"])
+        assert len(first_ids) > 1
+        game.reveal_case(8, 8, 1)
+        changed = [message_id for message_id, chunk, old in zip(first_ids, board_chunks(game), data["board_chunk_hashes"])
+                   if hash(chunk) != old]
+        channel.failing[changed[0]] = RuntimeError("réseau")
+        await show_board(ctx, data)
+        assert "réseau" in capsys.readouterr().out
+        assert sorted(channel.edits) == changed[1:]
+        channel.edits.clear()
+        # Seul le morceau dont l'édition a échoué est réédité
+        await show_board(ctx, data)
+        assert channel.edits == [changed[0]]
+        assert data["board_message_ids"] == first_ids
+
+    asyncio.run(run())
@@ -0,0 +1,23 @@
+import asyncio
+from games import canonical_click
+from no_guess import LayoutPool, is_solvable
+
+def test_solvability_check_respects_its_budget():
+    seed = next(seed for seed in range(1000) if is_solvable(12, 22, seed, (0, 0), budget=10.0))
+    assert not is_solvable(12, 22, seed, (0, 0), budget=0.0)
+
+def test_first_click_never_waits_for_the_search():
+    # target 0 : la recherche lancée après un raté ne démarre pas de processus
+    pool = LayoutPool(target=0, warm_layouts=())
+
+    async def run():
+        assert pool.seed_for(8, 8, 3, 3) is None
+        key = (8, 8, canonical_click(8, 3, 3)[0])
+        assert key in pool.filling
+        pool._pool(key).append(1234)
+        assert pool.seed_for(8, 8, 3, 3) == 1234
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert pool.counters["fallbacks"] == 1
+    assert pool.counters["hits"] == 1
@@ -0,0 +1,48 @@
+import random
+from games import MinesweeperGame, BoardRenderer
+
+class CountingRenderer(BoardRenderer):
+    __slots__ = ("rendered",)
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.rendered = []
+
+    def render_row(self, r):
+        self.rendered.append(r)
+        return super().render_row(r)
+
+def fresh_render(game):
+    return BoardRenderer(game).render()
+
+def test_cached_rows_match_full_render():
+    for seed in range(20):
+        rng = random.Random(seed)
+        game = MinesweeperGame(size=12, bomb_count=22, seed=seed)
+        game.reveal_case(6, 6, 1)
+        for _ in range(50):
+            r, c = rng.randrange(12), rng.randrange(12)
+            if rng.random() < 0.7:
+                game.reveal_case(r, c, 1)
+            else:
+                game.flag_case(r, c, 2)
+            assert game.print_board_text() == fresh_render(game)
+        game.finalize_endgame("one_left", last_click=(r, c), bomb_clicked=True)
+        assert game.print_board_text() == fresh_render(game)
+
+def test_only_dirty_rows_are_rendered():
+    game = MinesweeperGame(size=12, bomb_count=22, seed=4)
+    game.renderer = CountingRenderer(game)
+    game.reveal_case(0, 0, 1)
+    game.print_board_text()
+    assert sorted(game.renderer.rendered) == list(range(12))
+    hidden = next(idx for idx, s in enumerate(game.status) if s == 0)
+    r, c = divmod(hidden, 12)
+    rendered = game.renderer.rendered
+    rendered.clear()
+    game.flag_case(r, c, 1)
+    game.print_board_text()
+    assert rendered == [r]
+    rendered.clear()
+    game.print_board_text()
+    assert rendered == []
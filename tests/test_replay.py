@@ -0,0 +1,50 @@
+import random
+from games import MinesweeperGame, HIDDEN, FLAGGED, MOVE_ELIMINATE
+from large_board import LargeMinesweeperGame
+from replay import GameReplay
+
+def play(game: MinesweeperGame, moves: int, seed: int) -> list[tuple]:
+    """
+    Coups au hasard de deux joueurs ; retourne l'état de la grille après chaque coup du journal.
+    """
+    rng = random.Random(seed)
+    states = [state(game)]
+    for turn in range(moves):
+        player = 1 + turn % 2
+        hidden = [idx for idx, s in enumerate(game.status) if s == HIDDEN]
+        flagged = [idx for idx, s in enumerate(game.status) if s == FLAGGED and game.flag_owner_of(idx) != player]
+        if not hidden:
+            break
+        if flagged and rng.random() < 0.1:
+            game.reveal_flagged_case(*divmod(rng.choice(flagged), game.cols), player)
+        elif game.first_click_done and rng.random() < 0.3:
+            game.flag_case(*divmod(rng.choice(hidden), game.cols), player)
+        else:
+            game.reveal_case(*divmod(rng.choice(hidden), game.cols), player)
+        if turn % 7 == 6:
+            game.log_move(MOVE_ELIMINATE, player_id=player)
+        while len(states) <= game.move_count:
+            states.append(state(game))
+    return states
+
+def state(game: MinesweeperGame) -> tuple:
+    return bytes(game.status), bytes(game.values), [game.flag_owner_of(idx) for idx in range(game.rows * game.cols)]
+
+def test_replay_matches_every_step():
+    for seed in range(5):
+        game = MinesweeperGame(size=10, bomb_count=18, seed=seed)
+        states = play(game, 40, seed)
+        replay = GameReplay.from_game(game)
+        assert len(replay) == game.move_count
+        assert state(replay.game) == states[0]
+        for n in range(1, len(replay) + 1):
+            replay.step()
+            assert state(replay.game) == states[n]
+        # Reculer repart de la graine
+        assert state(replay.seek(len(replay) // 2)) == states[len(replay) // 2]
+
+def test_large_board_replay_matches_final_state():
+    game = LargeMinesweeperGame(40, 50, 150, seed=4)
+    states = play(game, 25, 4)
+    replayed = GameReplay.from_game(game).seek(game.move_count)
+    assert state(replayed) == states[-1]
@@ -0,0 +1,53 @@
+import asyncio
+from games import MinesweeperGame, HIDDEN, BOMB
+from players import PlayerRef
+from rules import ELIMINATED_BOMB, ELIMINATED_FALSE_FLAG, play_flag, play_reveal
+
+def game_data(players) -> dict:
+    game = MinesweeperGame(size=8, bomb_count=10, seed=5)
+    return {
+        "game": game,
+        "turn_order": list(players),
+        "current_player_index": 0,
+        "elimination_order": [],
+        "edit_in_place": False,
+        "render_mode": "text",
+        "board_message_ids": [],
+        "board_chunk_hashes": [],
+        "started_at": 0.0,
+    }
+
+def test_false_flag_eliminates_its_owner_and_keeps_the_turn_in_place():
+    alice, bob, carol = PlayerRef(1, "alice"), PlayerRef(2, "bob"), PlayerRef(3, "carol")
+    data = game_data((alice, bob, carol))
+    game = data["game"]
+
+    async def run():
+        assert not (await play_reveal(0, data, alice, 0, 0)).ended
+        hidden = [idx for idx, s in enumerate(game.status) if s == HIDDEN]
+        safe = next(idx for idx in hidden if game.values[idx] != BOMB)
+        outcome = await play_flag(0, data, bob, *divmod(safe, 8))
+        assert outcome.refused is None and data["turn_order"][data["current_player_index"]] is carol
+        assert (await play_reveal(0, data, bob, *divmod(safe, 8))).refused is not None
+        return await play_reveal(0, data, carol, *divmod(safe, 8))
+
+    outcome = asyncio.run(run())
+    assert outcome.flag_revealed and not outcome.bomb_clicked
+    assert outcome.eliminated == [(bob, ELIMINATED_FALSE_FLAG)]
+    assert data["turn_order"] == [alice, carol]
+    # Bob sorti avant Carol : c'est à Carol de rejouer
+    assert data["turn_order"][data["current_player_index"]] is carol
+
+def test_bomb_ends_a_two_player_game():
+    alice, bob = PlayerRef(1, "alice"), PlayerRef(2, "bob")
+    data = game_data((alice, bob))
+    game = data["game"]
+
+    async def run():
+        await play_reveal(0, data, alice, 0, 0)
+        bomb = next(idx for idx in range(64) if game.status[idx] == HIDDEN and game.values[idx] == BOMB)
+        return await play_reveal(0, data, bob, *divmod(bomb, 8))
+
+    outcome = asyncio.run(run())
+    assert outcome.bomb_clicked and outcome.eliminated == [(bob, ELIMINATED_BOMB)]
+    assert (outcome.ended, outcome.scenario) == (True, "one_left")
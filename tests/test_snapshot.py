@@ -0,0 +1,69 @@
+import random
+import pytest
+from games import MinesweeperGame
+from large_board import LargeMinesweeperGame
+from players import PlayerRef
+from snapshot import GAME_DATA_HEADER, decode_game, encode_game, game_data_from_bytes, game_data_to_bytes
+
+def played_game(game, rng, moves=40):
+    game.reveal_case(game.rows // 2, game.cols // 2, 1)
+    for _ in range(moves):
+        r, c = rng.randrange(game.rows), rng.randrange(game.cols)
+        if rng.random() < 0.7:
+            game.reveal_case(r, c, rng.choice((1, 2)))
+        else:
+            game.flag_case(r, c, rng.choice((1, 2, 3)))
+    return game
+
+def assert_same_game(a, b):
+    assert (a.rows, a.cols, a.bomb_count, a.seed, a.no_guess) == (b.rows, b.cols, b.bomb_count, b.seed, b.no_guess)
+    assert list(a.values) == list(b.values)
+    assert list(a.status) == list(b.status)
+    assert [a.flag_owner_of(idx) for idx in range(a.rows * a.cols)] == [b.flag_owner_of(idx) for idx in range(b.rows * b.cols)]
+    assert (a.safe_cells_done, a.flag_total, a.correct_flags) == (b.safe_cells_done, b.flag_total, b.correct_flags)
+    assert a.move_log == b.move_log
+    assert a.header[0] == b.header[0]
+
+@pytest.mark.parametrize("size", (5, 12, 16))
+def test_game_round_trip(size):
+    rng = random.Random(size)
+    game = played_game(MinesweeperGame(size=size, bomb_count=size * size // 6, seed=rng.getrandbits(64)), rng)
+    assert_same_game(game, decode_game(encode_game(game)))
+    game.finalize_endgame("all_solved")
+    assert_same_game(game, decode_game(encode_game(game)))
+
+def test_large_game_round_trip():
+    rng = random.Random(7)
+    game = played_game(LargeMinesweeperGame(40, 70, 300, seed=11), rng)
+    restored = decode_game(encode_game(game))
+    assert isinstance(restored, LargeMinesweeperGame)
+    assert_same_game(game, restored)
+
+def test_game_data_round_trip():
+    game = played_game(MinesweeperGame(size=12, bomb_count=22, seed=5), random.Random(5))
+    alice, bob, carol = PlayerRef(1, "alice"), PlayerRef(2, "bób"), PlayerRef(3, "carol")
+    data = {
+        "game": game, "turn_order": [carol, alice], "current_player_index": 1, "elimination_order": [bob],
+        "edit_in_place": False, "render_mode": "image", "board_message_ids": [10, 11],
+        "board_chunk_hashes": [123, 456], "started_at": 1_700_000_000,
+    }
+    restored = game_data_from_bytes(game_data_to_bytes(data))
+    assert [(p.id, p.display_name) for p in restored["turn_order"]] == [(3, "carol"), (1, "alice")]
+    assert [(p.id, p.display_name) for p in restored["elimination_order"]] == [(2, "bób")]
+    for key in ("current_player_index", "edit_in_place", "render_mode", "board_message_ids", "started_at"):
+        assert restored[key] == data[key]
+    assert restored["board_chunk_hashes"] == [0, 0]
+    assert_same_game(game, restored["game"])
+
+def test_other_versions_are_rejected():
+    data = {
+        "game": MinesweeperGame(size=8, bomb_count=10, seed=1), "turn_order": [], "current_player_index": 0,
+        "elimination_order": [], "edit_in_place": True, "render_mode": "text", "board_message_ids": [],
+        "board_chunk_hashes": [], "started_at": 0,
+    }
+    blob = bytearray(game_data_to_bytes(data))
+    blob[2] += 1
+    with pytest.raises(ValueError):
+        game_data_from_bytes(bytes(blob))
+    with pytest.raises(ValueError):
+        game_data_from_bytes(b"\x00" * GAME_DATA_HEADER.size)
@@ -0,0 +1,58 @@
+import gc
+import random
+from games import MinesweeperGame, HIDDEN, BOMB
+from solver import Solver, solver_for, suggest, _solvers
+
+def play(game: MinesweeperGame, rng: random.Random, result) -> bool:
+    """
+    Un coup : une case sûre connue ou une case cachée au hasard (sans bombe),
+    parfois un drapeau sur une bombe certaine. False quand il n'y a plus rien à jouer.
+    """
+    size = game.size
+    hidden = [idx for idx, s in enumerate(game.status) if s == HIDDEN and game.values[idx] != BOMB]
+    if not hidden:
+        return False
+    mines = sorted(idx for idx in result.mines if game.status[idx] == HIDDEN)
+    if mines and rng.random() < 0.3:
+        game.flag_case(*divmod(mines[0], size), 1)
+    safe = sorted(idx for idx in result.safe if game.status[idx] == HIDDEN)
+    idx = rng.choice(safe) if safe and rng.random() < 0.5 else rng.choice(hidden)
+    game.reveal_case(*divmod(idx, size), 1)
+    return True
+
+def test_component_cache_matches_fresh_enumeration():
+    # Deux solveurs suivent la même partie ; l'un vide son cache avant chaque appel
+    compared = 0
+    for seed in range(40):
+        game = MinesweeperGame(size=9, bomb_count=12, seed=seed)
+        game.reveal_case(4, 4, 1)
+        rng = random.Random(seed)
+        cached, fresh = Solver(game), Solver(game)
+        while True:
+            result = cached.solve(budget=5)
+            fresh.components.clear()
+            expected = fresh.solve(budget=5)
+            assert result.complete and expected.complete
+            assert (result.safe, result.mines, result.probabilities) == \
+                   (expected.safe, expected.mines, expected.probabilities)
+            assert all(game.values[idx] != BOMB for idx in result.safe)
+            assert all(game.values[idx] == BOMB for idx in result.mines)
+            compared += 1
+            if not play(game, rng, result):
+                break
+    assert compared > 500
+
+def test_solvers_do_not_keep_games_alive():
+    _solvers.clear()
+    games = [MinesweeperGame(size=9, bomb_count=10, seed=seed) for seed in range(20)]
+    for game in games:
+        game.reveal_case(4, 4, 1)
+        suggest(game)
+    assert len(_solvers) == 20
+    del games, game
+    gc.collect()
+    assert len(_solvers) == 0
+
+def test_solver_for_reuses_solver():
+    game = MinesweeperGame(size=9, bomb_count=10, seed=1)
+    assert solver_for(game) is solver_for(game)
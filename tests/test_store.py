@@ -0,0 +1,109 @@
+import asyncio
+import time
+import pytest
+from games import MinesweeperGame
+from players import PlayerRef
+from store import ChannelOwnedElsewhere, LeaseLost, SqliteGameStore
+
+def game_data(seed: int = 1) -> dict:
+    return {
+        "game": MinesweeperGame(size=8, bomb_count=10, seed=seed),
+        "turn_order": [PlayerRef(1, "alice"), PlayerRef(2, "bob")],
+        "current_player_index": 0,
+        "elimination_order": [],
+        "edit_in_place": True,
+        "render_mode": "text",
+        "board_message_ids": [],
+        "board_chunk_hashes": [],
+        "started_at": 0.0,
+    }
+
+def stored_version(store: SqliteGameStore, channel_id: int) -> int:
+    return store.conn.execute("SELECT version FROM games WHERE channel_id = ?", (channel_id,)).fetchone()[0]
+
+def test_older_write_never_overwrites_a_newer_one(tmp_path):
+    store = SqliteGameStore(str(tmp_path / "games.sqlite3"))
+
+    async def run():
+        data = game_data()
+        await store.put(7, data)
+        data["game"].reveal_case(3, 3, 1)
+        await store.save(7, data)
+        newest = stored_version(store, 7)
+        # Écriture d'un thread en retard, avec un numéro de version plus ancien
+        store.versions[7] = newest - 2
+        await store._write(7, b"ancien")
+        assert stored_version(store, 7) == newest
+        assert await store.evict(7, max_idle=-1)
+        assert list((await store.get(7))["game"].status) == list(data["game"].status)
+
+    asyncio.run(run())
+    store.close()
+
+def test_lease_keeps_a_channel_on_one_process(tmp_path):
+    path = str(tmp_path / "games.sqlite3")
+    first = SqliteGameStore(path, owner="A", lease_seconds=60)
+    second = SqliteGameStore(path, owner="B", lease_seconds=60)
+
+    async def run():
+        await first.put(7, game_data())
+        with pytest.raises(ChannelOwnedElsewhere):
+            await second.get(7)
+        # Rendu à l'éviction : l'autre processus peut reprendre la partie
+        assert await first.evict(7, max_idle=-1)
+        assert await second.get(7) is not None
+        with pytest.raises(ChannelOwnedElsewhere):
+            await first.get(7)
+
+    asyncio.run(run())
+    first.close()
+    second.close()
+
+def test_expired_lease_is_taken_over_and_the_old_owner_is_fenced(tmp_path):
+    path = str(tmp_path / "games.sqlite3")
+    first = SqliteGameStore(path, owner="A", lease_seconds=60)
+    second = SqliteGameStore(path, owner="B", lease_seconds=60)
+
+    async def run():
+        data = game_data()
+        await first.put(7, data)
+        # Processus A figé : son bail expire et B reprend le salon
+        first.conn.execute("UPDATE leases SET expires_at = ?", (time.time() - 1,))
+        taken = await second.get(7)
+        taken["game"].reveal_case(3, 3, 2)
+        await second.save(7, taken)
+        snapshot = second.conn.execute("SELECT snapshot FROM games").fetchone()[0]
+        # A se réveille : le renouvellement lui apprend la perte, rien n'est écrit
+        assert await first.renew_leases() == [7]
+        assert 7 not in first
+        data["game"].reveal_case(0, 0, 1)
+        with pytest.raises(LeaseLost):
+            await first.save(7, data)
+        assert first.conn.execute("SELECT snapshot FROM games").fetchone()[0] == snapshot
+
+    asyncio.run(run())
+    first.close()
+    second.close()
+
+def test_fenced_write_is_counted_and_evicts_the_game(tmp_path):
+    path = str(tmp_path / "games.sqlite3")
+    first = SqliteGameStore(path, owner="A", lease_seconds=60)
+    second = SqliteGameStore(path, owner="B", lease_seconds=60)
+
+    async def run():
+        data = game_data()
+        await first.put(7, data)
+        first.conn.execute("UPDATE leases SET expires_at = ?", (time.time() - 1,))
+        await second.get(7)
+        with pytest.raises(LeaseLost):
+            await first.save(7, data)
+        assert 7 not in first
+        # Une écriture plus ancienne que celle en base, bail tenu : ignorée sans erreur
+        second.versions[7] = 0
+        await second.save(7, data)
+
+    asyncio.run(run())
+    assert first.counters["fenced_writes"] == 1
+    assert second.counters["fenced_writes"] == 0
+    first.close()
+    second.close()
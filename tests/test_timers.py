@@ -0,0 +1,58 @@
+import asyncio
+from timers import TimerWheel
+
+def test_timers_fire_on_their_tick_even_past_one_turn():
+    # Tick très long : la roue est avancée à la main
+    wheel = TimerWheel(tick=3600, slots=8)
+    fired = []
+
+    async def run():
+        for key, ticks in (("a", 1), ("b", 3), ("c", 8), ("d", 20)):
+            wheel.schedule(key, ticks * 3600, lambda key=key: fired.append((key, wheel.position)))
+        for _ in range(20):
+            wheel.advance()
+        wheel.task.cancel()
+
+    asyncio.run(run())
+    # Position modulo 8 : "c" fait un tour complet, "d" deux tours et demi
+    assert fired == [("a", 1), ("b", 3), ("c", 0), ("d", 4)]
+    assert len(wheel) == 0
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(tick=3600, slots=8)
+    fired = []
+
+    async def run():
+        wheel.schedule("a", 2 * 3600, lambda: fired.append("a"))
+        wheel.schedule("b", 2 * 3600, lambda: fired.append("b"))
+        assert wheel.cancel("a")
+        assert not wheel.cancel("a")
+        # Reprogrammer remplace la minuterie précédente
+        wheel.schedule("b", 5 * 3600, lambda: fired.append("b2"))
+        for _ in range(2):
+            wheel.advance()
+        assert fired == [] and "b" in wheel
+        for _ in range(3):
+            wheel.advance()
+        wheel.task.cancel()
+
+    asyncio.run(run())
+    assert fired == ["b2"]
+    assert wheel.counters == {"scheduled": 3, "fired": 1, "cancelled": 2}
+
+def test_coroutine_callbacks_run_in_the_loop():
+    wheel = TimerWheel(tick=0.01)
+    done = []
+
+    async def callback():
+        done.append(asyncio.get_running_loop().time())
+
+    async def run():
+        start = asyncio.get_running_loop().time()
+        wheel.schedule("a", 0.03, callback)
+        await asyncio.sleep(0.1)
+        return start
+
+    start = asyncio.run(run())
+    assert len(done) == 1 and done[0] - start >= 0.03
+    assert wheel.task is None and not wheel.running
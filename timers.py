@@ -0,0 +1,94 @@
+"""
+Minuteries des parties (délai de jeu d'un tour, parties abandonnées) sur une
+roue hachée : une seule tâche asyncio avance d'une case par tick, quel que
+soit le nombre de parties.
+
+Programmer, reprogrammer ou annuler une minuterie coûte O(1) : elle est
+rangée dans la case (position + délai en ticks) modulo le nombre de cases,
+avec le nombre de tours de roue restants. Chaque tick n'examine que sa case.
+Une minuterie est identifiée par une clé (par exemple ("turn", id du salon)) :
+la reprogrammer remplace la précédente.
+"""
+import asyncio
+import math
+from typing import Callable, Hashable, Optional
+
+class TimerWheel:
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self.slots: list[dict[Hashable, list]] = [{} for _ in range(slots)]
+        # Case de chaque minuterie, pour l'annuler sans parcourir la roue
+        self.where: dict[Hashable, int] = {}
+        self.position = 0
+        self.task: Optional[asyncio.Task] = None
+        # Tâches lancées par les minuteries, gardées jusqu'à leur fin
+        self.running: set[asyncio.Task] = set()
+        self.counters = {"scheduled": 0, "fired": 0, "cancelled": 0}
+
+    def __len__(self) -> int:
+        return len(self.where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.where
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], object]) -> None:
+        """
+        callback() est appelé après delay secondes (à un tick près). S'il
+        retourne une coroutine, elle est lancée dans une tâche.
+        """
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self.position + ticks) % len(self.slots)
+        self.slots[slot][key] = [(ticks - 1) // len(self.slots), callback]
+        self.where[key] = slot
+        self.counters["scheduled"] += 1
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self.where.pop(key, None)
+        if slot is None:
+            return False
+        del self.slots[slot][key]
+        self.counters["cancelled"] += 1
+        return True
+
+    def advance(self) -> None:
+        """
+        Avance d'un tick et déclenche les minuteries arrivées à échéance.
+        """
+        self.position = (self.position + 1) % len(self.slots)
+        entries = self.slots[self.position]
+        due = []
+        for key, entry in entries.items():
+            if entry[0] > 0:
+                entry[0] -= 1
+            else:
+                due.append((key, entry[1]))
+        for key, callback in due:
+            del entries[key]
+            del self.where[key]
+            self.counters["fired"] += 1
+            try:
+                result = callback()
+                if asyncio.iscoroutine(result):
+                    task = asyncio.create_task(result)
+                    self.running.add(task)
+                    task.add_done_callback(self.running.discard)
+            except Exception as e:
+                print(f"Minuterie {key} en erreur : {e}")
+
+    async def _run(self) -> None:
+        # Les ticks en retard (boucle chargée) sont rattrapés d'un coup
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        try:
+            while self.where:
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+                while loop.time() >= next_tick:
+                    self.advance()
+                    next_tick += self.tick
+        finally:
+            self.task = None
+
+timer_wheel = TimerWheel()
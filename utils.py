@@ -1,35 +1,32 @@
-from discord.user import User
-from discord.member import Member
+import asyncio
+import re
+from discord.errors import HTTPException
+from functools import lru_cache
 from typing import Optional
-from games import MinesweeperGame, GameData
+from games import MinesweeperGame, GameData, CELL_EMOJIS
+from emojis import EMOJI_HEADER, EMOJI_LINES, EMOJIS_ENDGAME
 from discord.ext.commands import Context
+from dispatcher import DISCORD_MESSAGE_LIMIT, outbound
+from executor import game_executor
+from rules import find_member_by_id, remove_player_from_game, next_turn, check_end_game, rank_players, finalize_and_rank
+from image_renderer import image_renderer, BOARD_IMAGE_NAME
+from metrics import timed
 
-def find_member_by_id(members: list[User | Member], member_id) -> Optional[User | Member]:
-    for member in members:
-        if member.id == member_id:
-            return member
-    return None
+# Colonne puis ligne ("B12"), ou l'inverse ("12B")
+CASE_PATTERN = re.compile(r"\s*(?:([A-Za-z]{1,3})(\d{1,4})|(\d{1,4})([A-Za-z]{1,3}))\s*")
 
 def convert_case_to_coords(case: str) -> tuple[int, int]:
-    case = case.strip().upper()
-    col_part, row_part = "", ""
-    for char in case:
-        if char.isalpha():
-            col_part += char
-        elif char.isdigit():
-            row_part += char
-
-    if not col_part or not row_part:
+    match = CASE_PATTERN.fullmatch(case)
+    if match is None:
         return -1, -1
+    letters, digits = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
 
     col = 0
-    for ch in col_part:
+    for ch in letters.upper():
         col = col * 26 + (ord(ch) - ord('A') + 1)
-    col -= 1
-
-    row = int(row_part) - 1
-    return (row, col)
+    return int(digits) - 1, col - 1
 
+@timed("validate")
 def validate_move(ctx: Context, data: GameData, case: str, is_flag: bool = False) -> tuple[Optional[str], Optional[int], Optional[int]]:
     """
     Vérifie si un mouvement est valide.
@@ -37,7 +34,7 @@ def validate_move(ctx: Context, data: GameData, case: str, is_flag: bool = False
     """
     game = data["game"]
 
-    if ctx.author != data["turn_order"][data["current_player_index"]]:
+    if ctx.author.id != data["turn_order"][data["current_player_index"]].id:
         return "Ce n'est pas ton tour.", None, None
 
     if is_flag and not game.first_click_done:
@@ -49,93 +46,160 @@ def validate_move(ctx: Context, data: GameData, case: str, is_flag: bool = False
 
     return None, row, col
 
-def remove_player_from_game(data: GameData, member: User | Member):
-    turn_order = data["turn_order"]
-    if member in turn_order:
-        idx = turn_order.index(member)
-        turn_order.remove(member)
-        data["elimination_order"].append(member)
-        if idx < data["current_player_index"]:
-            data["current_player_index"] -= 1
-        if turn_order:
-            data["current_player_index"] %= len(turn_order)
-
 async def pass_to_next_player(ctx: Context, data: GameData):
-    data["current_player_index"] = (data["current_player_index"] + 1) % len(data["turn_order"])
-    next_player = data["turn_order"][data["current_player_index"]]
-    await ctx.send(f"Tour de {next_player.mention}.")
+    next_player = next_turn(data)
+    outbound.post(ctx.channel, f"Tour de {next_player.mention}.")
 
-async def display_map_in_chunks(ctx: Context, game: MinesweeperGame):
-    board_text = game.print_board_text()
-    bombs_left = game.bomb_count - game.count_all_flags()
-    await send_map_in_chunks(ctx, board_text, bombs_left)
-
-async def send_map_in_chunks(ctx: Context, board_text: str, bombs_left: int):
-    lines = board_text.split("\n")
-    chunk1 = lines[0:5]
-    chunk2 = lines[5:9]
-    chunk3 = lines[9:13]
-
-    await ctx.send("\n".join(chunk1))
-    await ctx.send("\n".join(chunk2))
-    await ctx.send(f"{"\n".join(chunk3)}\n\nBombes restantes: {bombs_left}")
-
-async def check_end_game(data) -> tuple[bool, Optional[str]]:
-    turn_order = data["turn_order"]
-    game: MinesweeperGame = data["game"]
-
-    if len(turn_order) == 1:
-        return True, "one_left"
-    elif game.is_all_safe_revealed():
-        return True, "all_solved"
-    
-    return False, None
-
-async def finalize_and_rank(data: GameData, scenario: Optional[str], last_click=None, bomb_clicked=False, safe_flag_clicked=False) -> list[str]:
+def pack_lines(lines: list[str], limit: int = DISCORD_MESSAGE_LIMIT) -> list[str]:
     """
-    Modifie la map finale (header, bomb_e, flag_e, etc.) selon scenario,
-    puis construit un classement.
-    Retourne la liste de lignes (strings) à envoyer.
+    Regroupe les lignes dans le moins de messages possible sans dépasser
+    limit caractères. Une ligne seule trop longue est coupée.
     """
-    game: MinesweeperGame = data["game"]
-    turn_order = data["turn_order"]
-    elimination_order = data["elimination_order"]
-
-    final_map = game.finalize_endgame(
-        scenario,
-        last_click=last_click,
-        bomb_clicked=bomb_clicked,
-        safe_flag_clicked=safe_flag_clicked
-    )
-
-    # Construire le classement
-    survivors = list(turn_order)
-    survivors.sort(key=lambda p: game.count_flags_by_user(p.id), reverse=True)
-    
-    # On réunit ensuite les éliminés dans l'ordre
-    ranking_list = []
-    for p in survivors:
-        sc = game.count_flags_by_user(p.id)
-        ranking_list.append((p, sc, False))
-    for e in elimination_order:
-        sc = game.count_flags_by_user(e.id)
-        ranking_list.append((e, sc, True))
+    messages = []
+    current = ""
+    for line in lines:
+        while len(line) > limit:
+            if current:
+                messages.append(current)
+                current = ""
+            messages.append(line[:limit])
+            line = line[limit:]
+        if not current:
+            current = line
+        elif len(current) + 1 + len(line) <= limit:
+            current += "\n" + line
+        else:
+            messages.append(current)
+            current = line
+    if current:
+        messages.append(current)
+    return messages
+
+async def display_map_in_chunks(ctx: Context, game: MinesweeperGame, before: Optional[str] = None, after: Optional[str] = None):
+    board_text = await game_executor.run(ctx.channel.id, game, game.print_board_text)
+    bombs_left = game.bomb_count - game.count_all_flags()
+    await send_map_in_chunks(ctx, board_text, bombs_left, before=before, after=after)
 
+async def send_map_in_chunks(ctx: Context, board_text: str, bombs_left: int, before: Optional[str] = None, after: Optional[str] = None):
+    """
+    Envoie la carte en remplissant chaque message jusqu'à la limite Discord.
+    Le texte d'action (before) et le statut (bombes restantes, after) sont
+    placés dans les mêmes messages que la carte quand ils tiennent.
+    """
     lines = []
-    if scenario == 'all_solved':
-        lines.append("**Fin de partie : puzzle complété !**")
-    elif len(survivors) == 1:
-        winner: User | Member = survivors[0]
-        lines.append(f"{winner.mention} est le dernier survivant ! Fin de partie.")
-    else:
-        lines.append(f"C'est quoi ce scenario de Fin de partie ?")
-
-    lines.append(final_map)
-
-    pos = 1
-    for (player, sc, elim) in ranking_list:
-        st = "(Éliminé)" if elim else "(Survivant)"
-        lines.append(f"{pos}. {player.display_name} {st} - Drapeau trouvés: {sc}")
-        pos += 1
-
-    return lines
\ No newline at end of file
+    if before:
+        lines.extend(before.split("\n"))
+    lines.extend(board_text.split("\n"))
+    lines.append("")
+    lines.append(f"Bombes restantes: {bombs_left}")
+    if after:
+        lines.extend(after.split("\n"))
+
+    for message in pack_lines(lines):
+        outbound.post(ctx.channel, message)
+
+@lru_cache(maxsize=None)
+def rows_per_board_message(size: int, limit: int = DISCORD_MESSAGE_LIMIT) -> tuple[int, int]:
+    """
+    Découpage fixe de la carte pour le mode édition : (lignes du premier message,
+    lignes des suivants), calculé sur la longueur maximale possible d'une ligne
+    pour qu'un morceau ne dépasse jamais la limite, quel que soit son contenu.
+    """
+    widest_cell = max(len(emoji) for row in CELL_EMOJIS for emoji in row)
+    widest_prefix = max(len(EMOJI_LINES[r + 1]) for r in range(size))
+    row_len = widest_prefix + size * widest_cell + 1
+    header_len = max(len(e) for e in (EMOJI_HEADER[0], *EMOJIS_ENDGAME.values()))
+    header_len += sum(len(EMOJI_HEADER[i]) for i in range(1, size + 1)) + 1
+    per_message = max(1, limit // row_len)
+    first = max(1, (limit - header_len) // row_len)
+    return first, per_message
+
+def board_chunks(game: MinesweeperGame) -> list[str]:
+    lines = game.renderer.render_lines()
+    header, rows = lines[0], lines[1:]
+    first, per_message = rows_per_board_message(game.renderer.width)
+    chunks = ["\n".join([header, *rows[:first]])]
+    for start in range(first, len(rows), per_message):
+        chunks.append("\n".join(rows[start:start + per_message]))
+    return chunks
+
+async def show_board(ctx: Context, data: GameData, before: Optional[str] = None, after: Optional[str] = None, bombs_left: Optional[int] = None):
+    """
+    Affiche la carte selon le mode du salon.
+    En mode édition, les messages de la carte sont postés une seule fois puis
+    seuls les morceaux dont le contenu a changé sont édités. Le résultat du
+    coup, les bombes restantes et le tour partent dans un nouveau message
+    court : Discord ne notifie pas les mentions ajoutées par une édition, et
+    c'est ce message qui prévient le joueur suivant.
+    Un morceau dont l'édition échoue garde son ancienne empreinte et sera
+    réédité au coup suivant.
+    """
+    game = data["game"]
+    if bombs_left is None:
+        bombs_left = game.bomb_count - game.count_all_flags()
+    if data["render_mode"] == "image":
+        await show_board_image(ctx, data, before=before, after=after, bombs_left=bombs_left)
+        return
+    if not data["edit_in_place"]:
+        board_text = await game_executor.run(ctx.channel.id, game, game.print_board_text)
+        await send_map_in_chunks(ctx, board_text, bombs_left, before=before, after=after)
+        return
+
+    chunks = await game_executor.run(ctx.channel.id, game, board_chunks, game)
+    hashes = [hash(chunk) for chunk in chunks]
+    message_ids = data["board_message_ids"]
+    if len(message_ids) == len(chunks):
+        stored = data["board_chunk_hashes"]
+        changed = [i for i, chunk_hash in enumerate(hashes) if chunk_hash != stored[i]]
+        results = await asyncio.gather(
+            *(outbound.edit(ctx.channel, message_ids[i], chunks[i]) for i in changed), return_exceptions=True
+        )
+        errors = []
+        for i, result in zip(changed, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                stored[i] = hashes[i]
+        for error in errors:
+            if not isinstance(error, HTTPException):
+                # Le coup est déjà joué : on journalise, le morceau sera réédité au coup suivant
+                print(f"Édition de la carte en erreur : {error!r}")
+        if any(isinstance(error, HTTPException) for error in errors):
+            # Message supprimé ou inaccessible : on reposte la carte complète
+            message_ids.clear()
+    if len(message_ids) != len(chunks):
+        message_ids.clear()
+        messages = await asyncio.gather(*(outbound.send(ctx.channel, chunk, mergeable=False) for chunk in chunks))
+        message_ids.extend(message.id for message in messages)
+        data["board_chunk_hashes"] = hashes
+
+    status = [line for line in (before, f"Bombes restantes: {bombs_left}", after) if line]
+    for message in pack_lines(status):
+        outbound.post(ctx.channel, message)
+
+async def show_board_image(ctx: Context, data: GameData, before: Optional[str], after: Optional[str], bombs_left: int):
+    """
+    Rendu image : une seule pièce jointe, éditée en place si le mode édition est
+    actif, le texte de statut dans le même message.
+    """
+    game = data["game"]
+    state, png = await game_executor.run(ctx.channel.id, game, image_renderer.render_png, game, cache_key=ctx.channel.id)
+    status = "\n".join(line for line in (before, f"Bombes restantes: {bombs_left}", after) if line)
+    attachment = (BOARD_IMAGE_NAME, png)
+    message_ids = data["board_message_ids"]
+
+    if data["edit_in_place"] and len(message_ids) == 1:
+        if data["board_chunk_hashes"] == [state]:
+            outbound.post(ctx.channel, status)
+            return
+        try:
+            await outbound.edit(ctx.channel, message_ids[0], None, attachment=attachment)
+            data["board_chunk_hashes"] = [state]
+            outbound.post(ctx.channel, status)
+            return
+        except HTTPException:
+            message_ids.clear()
+
+    message = await outbound.send(ctx.channel, status, attachment=attachment)
+    message_ids[:] = [message.id]
+    data["board_chunk_hashes"] = [state]